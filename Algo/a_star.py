@@ -0,0 +1,139 @@
+from heapq import heappush, heappop
+from Utils.utils import *
+from Utils.grid import ARENA_GRID
+
+"""This module defines the A* search engine used by the fastest path algorithm."""
+
+
+class AStar:
+    """
+    This class is a reusable A* search over the cells the robot center is allowed to stand on.
+
+    Cells are only pushed onto the open set when they are discovered and the search stops as soon as the goal is
+    popped. All per-cell bookkeeping lives in flat lists that are allocated once and reused between calls; a search
+    stamp marks which entries belong to the current search so they never have to be cleared.
+    """
+    def __init__(self, grid=ARENA_GRID):
+        """
+        Initialize the search buffers.
+
+        :param grid: The Grid of the maps searched. The robot center can stand on all but its outermost ring.
+        """
+        self.grid = grid
+        self.num_rows = num_rows = grid.rows - 2
+        self.num_cols = num_cols = grid.cols - 2
+        size = num_rows * num_cols
+
+        self._rows = [i // num_cols for i in range(size)]
+        self._cols = [i % num_cols for i in range(size)]
+        self._cells = [grid.get_grid_index(r + 1, c + 1) for (r, c) in zip(self._rows, self._cols)]
+        self._neighbours = [self._get_neighbours(i) for i in range(size)]
+
+        self._distances_from_start = [0] * size
+        self._cost = [0] * size
+        self._before = [-1] * size
+        self._seen = [0] * size
+        self._discovers = [0] * size
+        self._stamp = 0
+
+    def _get_neighbours(self, index):
+        """ Return the flat indexes of the cells above, below, left and right of a cell, in that order. """
+        r, c = index // self.num_cols, index % self.num_cols
+        neighbours = []
+        for (adj_r, adj_c) in [(r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)]:
+            if 0 <= adj_r < self.num_rows and 0 <= adj_c < self.num_cols:
+                neighbours.append(adj_r * self.num_cols + adj_c)
+        return neighbours
+
+    def search(self, free, start, goal, before_start):
+        """
+        Search for the fastest path between two cells.
+
+        The cost of a step is 1 if it continues in a straight line, that is if the cell before, the current cell and the
+        next cell share a row or a col, and 3 otherwise, which makes the path prefer straight runs over turns.
+        Ties are broken on the (row, col) of the cell, so the path found is the same as the one found by a search that
+        preloads every cell into the open set.
+
+        :param free: A sequence indexed by cell index (see Grid.get_grid_index) that is truthy where the robot center
+                     can stand, such as ClearanceMap.free.
+        :param start: The (row, col) the search starts from.
+        :param goal: The (row, col) the search ends at.
+        :param before_start: The (row, col) the robot was at before the start. Used for the turning cost of the
+                             first step and may lie outside the grid.
+        :return: The list of (row, col) from the cell after the start up to the goal, or False if there is no path.
+        """
+        num_cols = self.num_cols
+        rows = self._rows
+        cols = self._cols
+        cells = self._cells
+        neighbours = self._neighbours
+        distances_from_start = self._distances_from_start
+        cost = self._cost
+        before = self._before
+        seen = self._seen
+        discovers = self._discovers
+
+        self._stamp += 1
+        stamp = self._stamp
+
+        goal_r, goal_c = goal
+        start_index = start[0] * num_cols + start[1]
+        goal_index = goal_r * num_cols + goal_c
+
+        seen[start_index] = stamp
+        distances_from_start[start_index] = 0
+        cost[start_index] = abs(start[0] - goal_r) + abs(start[1] - goal_c)
+        before[start_index] = -1
+
+        q = [(cost[start_index], start_index)]
+        is_goal_found = False
+
+        while q:
+            v, i = heappop(q)
+            if discovers[i] == stamp or cost[i] != v:
+                continue
+
+            discovers[i] = stamp
+            if i == goal_index:
+                is_goal_found = True
+                break
+
+            r, c = rows[i], cols[i]
+            if before[i] == -1:
+                before_r, before_c = before_start
+            else:
+                before_r, before_c = rows[before[i]], cols[before[i]]
+
+            for adj in neighbours[i]:
+                if discovers[adj] == stamp:
+                    continue
+
+                adj_r, adj_c = rows[adj], cols[adj]
+                if before_r == r == adj_r or before_c == c == adj_c:
+                    distance = distances_from_start[i] + 1
+                else:
+                    distance = distances_from_start[i] + 3
+
+                estimated_cost = distance + abs(adj_r - goal_r) + abs(adj_c - goal_c)
+                if seen[adj] == stamp and cost[adj] <= estimated_cost:
+                    continue
+
+                if not free[cells[adj]]:
+                    continue
+
+                seen[adj] = stamp
+                distances_from_start[adj] = distance
+                cost[adj] = estimated_cost
+                before[adj] = i
+                heappush(q, (estimated_cost, adj))
+
+        if not is_goal_found:
+            return False
+
+        results = []
+        trace = goal_index
+        while trace != start_index:
+            results.append((rows[trace], cols[trace]))
+            trace = before[trace]
+
+        return results[::-1]
@@ -0,0 +1,103 @@
+from Utils.utils import *
+from Utils.grid import Grid
+
+"""This module defines the clearance map that tells whether the robot center can stand on a cell."""
+
+
+class ClearanceMap:
+    """
+    This class keeps track of which cells the 3x3 robot can be centered on for a given discovered map.
+
+    For every cell it stores how many obstacles (1) and unexplored cells (2) lie in the 3x3 footprint centered on it.
+    The counts are built once with a separable dilation (a 3-wide sum along the rows followed by a 3-wide sum along
+    the cols) and then kept up to date cell by cell, so checking a footprint is a single lookup.
+
+    Lookups are indexed by the cell index returned by the get_grid_index of the grid of the map.
+    """
+    def __init__(self, discovered_map):
+        """
+        Build the clearance map from a discovered map.
+
+        :param discovered_map: The map that shows whether each cell is an obstacle (1), free (0) or unexplored (2).
+        """
+        self.grid = grid = Grid.of(discovered_map)
+        size = grid.size + 1
+        self._obstacle_counts = [0] * size
+        self._unexplored_counts = [0] * size
+
+        # Whether the robot center can stand on a cell, treating unexplored cells as free.
+        self.free = bytearray(size)
+        # Whether the robot center can stand on a cell, treating unexplored cells as obstacles.
+        self.free_explored = bytearray(size)
+
+        cells = [v for row in discovered_map for v in row]
+        self._dilate(self._obstacle_counts, [int(v == 1) for v in cells])
+        self._dilate(self._unexplored_counts, [int(v == 2) for v in cells])
+
+        for y in range(1, grid.rows - 1):
+            for cell in range(grid.get_grid_index(y, 1), grid.get_grid_index(y, grid.cols - 2) + 1):
+                self._refresh(cell)
+
+    def _dilate(self, counts, marks):
+        """
+        Fill in the number of marked cells in the 3x3 footprint around every cell.
+
+        :param counts: The list to fill, indexed by cell index.
+        :param marks: The map flattened row by row, with 1 for marked cells and 0 otherwise.
+        :return: N/A
+        """
+        rows = self.grid.rows
+        cols = self.grid.cols
+        row_sums = []
+        for y in range(rows):
+            row = [0] + marks[y * cols:(y + 1) * cols] + [0]
+            row_sums.append([row[x] + row[x + 1] + row[x + 2] for x in range(cols)])
+
+        zeros = [0] * cols
+        row_sums = [zeros] + row_sums + [zeros]
+        for y in range(rows):
+            above, row, below = row_sums[y + 2], row_sums[y + 1], row_sums[y]
+            counts[y * cols + 1:(y + 1) * cols + 1] = [above[x] + row[x] + below[x] for x in range(cols)]
+
+    def _refresh(self, cell):
+        """ Recompute the free flags of a cell from its footprint counts. """
+        self.free[cell] = int(self._obstacle_counts[cell] == 0)
+        self.free_explored[cell] = int(self._obstacle_counts[cell] == 0 and self._unexplored_counts[cell] == 0)
+
+    def update_cell(self, y, x, old_value, new_value):
+        """
+        Update the clearance of the cells whose footprint covers a cell that has changed value.
+
+        :param y: The y-coordinate of the cell that has changed.
+        :param x: The x-coordinate of the cell that has changed.
+        :param old_value: The value of the cell before the change.
+        :param new_value: The value of the cell after the change.
+        :return: N/A
+        """
+        obstacle_change = int(new_value == 1) - int(old_value == 1)
+        unexplored_change = int(new_value == 2) - int(old_value == 2)
+        if not obstacle_change and not unexplored_change:
+            return
+
+        grid = self.grid
+        for center_y in range(max(y - 1, 1), min(y + 2, grid.rows - 1)):
+            for center_x in range(max(x - 1, 1), min(x + 2, grid.cols - 1)):
+                cell = grid.get_grid_index(center_y, center_x)
+                self._obstacle_counts[cell] += obstacle_change
+                self._unexplored_counts[cell] += unexplored_change
+                self._refresh(cell)
+
+    def is_free(self, y, x, is_give_up=False):
+        """
+        Check if the robot center can stand on a cell.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :param is_give_up: Whether unexplored cells should be treated as obstacles.
+        :return: True if no part of the robot would be on an obstacle or outside the maze, false otherwise.
+        """
+        if self.grid.is_at_border(y, x):
+            return False
+        if is_give_up:
+            return bool(self.free_explored[self.grid.get_grid_index(y, x)])
+        return bool(self.free[self.grid.get_grid_index(y, x)])
@@ -0,0 +1,101 @@
+from collections import deque
+from Utils.utils import *
+
+"""This module defines the distance field that answers many path queries from a single search."""
+
+
+class DistanceField:
+    """
+    This class holds the number of steps from a source cell to every cell the robot center can reach.
+
+    The field is built with a single breadth-first search over the cells the robot center can stand on. As moves are
+    reversible, the distance from the source to a cell is also the distance from that cell to the source, so the same
+    field answers queries from the robot to many targets or from many cells to one goal.
+    """
+    def __init__(self, grid, free, source):
+        """
+        Build the distance field.
+
+        :param grid: The Grid of the map.
+        :param free: A sequence indexed by cell index (see Grid.get_grid_index) that is truthy where the robot center
+                     can stand, such as ClearanceMap.free.
+        :param source: The (y, x) the distances are measured from.
+        """
+        self.grid = grid
+        self.source = source
+        self._distances = [-1] * (grid.size + 1)
+
+        if grid.is_at_border(source[0], source[1]):
+            return
+
+        distances = self._distances
+        start = grid.get_grid_index(source[0], source[1])
+        cols = grid.cols
+        distances[start] = 0
+        q = deque([start])
+        while q:
+            cell = q.popleft()
+            distance = distances[cell] + 1
+            # Border cells are never free, so stepping from an inner cell never wraps around a row.
+            for adj in (cell + cols, cell - cols, cell + 1, cell - 1):
+                if distances[adj] == -1 and free[adj]:
+                    distances[adj] = distance
+                    q.append(adj)
+
+    def distance(self, y, x):
+        """
+        Return the number of steps between the source and a cell.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :return: The number of steps, or None if the robot center cannot reach the cell.
+        """
+        if self.grid.is_at_border(y, x):
+            return None
+
+        distance = self._distances[self.grid.get_grid_index(y, x)]
+        if distance == -1:
+            return None
+        return distance
+
+    def is_reachable(self, y, x):
+        """ Check if the robot center can get between the source and a cell. """
+        return self.distance(y, x) is not None
+
+
+class DistanceFieldCache:
+    """
+    This class keeps the distance fields built for a robot until its discovered map changes.
+
+    The fields are dropped as soon as the map version of the robot moves on, so a field is never used with a map it
+    was not built from.
+    """
+    def __init__(self, robot):
+        """
+        Initialize the cache.
+
+        :param robot: The robot whose discovered map the fields are built from.
+        """
+        self._robot = robot
+        self._map_version = robot.map_version
+        self._fields = {}
+
+    def get(self, source, is_give_up=False):
+        """
+        Return the distance field from a source cell, building it if it is not cached for the current map.
+
+        :param source: The (y, x) the distances are measured from.
+        :param is_give_up: Whether unexplored cells should be treated as obstacles.
+        :return: The DistanceField.
+        """
+        if self._map_version != self._robot.map_version:
+            self._map_version = self._robot.map_version
+            self._fields = {}
+
+        key = (source, is_give_up)
+        if key not in self._fields:
+            clearance_map = self._robot.clearance_map
+            free = clearance_map.free_explored if is_give_up else clearance_map.free
+            self._fields[key] = DistanceField(clearance_map.grid, free, source)
+
+        return self._fields[key]
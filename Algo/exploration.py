@@ -1,6 +1,15 @@
 from Algo.fastest_path import *
+from Algo.distance_field import DistanceFieldCache
+from Algo.incremental_planner import IncrementalPlanner
+from Algo.speculation import WallFollowSpeculation
+from Utils.tracer import tracer, PHASE_PLANNER
+from Utils.logger import get_logger
 
 """This module defines the Exploration class that handles the exploration algorithm, along with Exceptions used."""
+
+_logger = get_logger(__name__)
+
+
 class Exploration:
     """
     This class defines and handles the exploration algorithm.
@@ -12,6 +21,8 @@ class Exploration:
         self._exploration_limit = exploration_limit
         self._time_limit = time_limit
         self._auto_update = True
+        self._distance_fields = DistanceFieldCache(robot)
+        self._planner = None
 
     def _get_nearest_unexplored(self):
         """
@@ -19,11 +30,12 @@ class Exploration:
 
         :return: The xy coordinates of the nearest unexplored cell.
         """
-        min_dist = NUM_ROWS * NUM_COLS + 1
+        grid = self._robot.grid
+        min_dist = grid.size + 1
         nearest = (-1, -1)
-        y, x = get_matrix_coords(self._robot.center)
-        for i in range(NUM_ROWS):
-            for j in range(NUM_COLS):
+        y, x = grid.get_matrix_coords(self._robot.center)
+        for i in range(grid.rows):
+            for j in range(grid.cols):
                 if self._robot.discovered_map[i][j] == 2:
                     dist = abs(y - i) + abs(x - j)
 
@@ -34,15 +46,74 @@ class Exploration:
         return nearest[0], nearest[1]
 
     def _get_unexplored(self):
+        grid = self._robot.grid
         unexplored_coors = {}
-        y, x = get_matrix_coords(self._robot.center)
-        for i in range(NUM_ROWS):
-            for j in range(NUM_COLS):
+        y, x = grid.get_matrix_coords(self._robot.center)
+        for i in range(grid.rows):
+            for j in range(grid.cols):
                 if self._robot.discovered_map[i][j] == 2:
                     unexplored_coors[(i, j)] = abs(y - i) + abs(x - j)
         return sorted(unexplored_coors.items(), key=lambda kv: kv[1])
 
 
+    def _get_moves_to_unexplored(self):
+        """
+        Find the moves to the nearest unexplored cell that the robot can get to.
+
+        Unexplored cells are tried from the nearest by Manhattan distance, falling back to the cells around them.
+        One distance field from the robot, kept until the map changes, tells which of them can be reached, so the
+        planner only runs for a cell that has a path.
+
+        :return: The list of moves, or an empty list if no unexplored cell can be reached.
+        """
+        with tracer.span(PHASE_PLANNER):
+            grid = self._robot.grid
+            center_y, center_x = grid.get_matrix_coords(self._robot.center)
+            distance_field = self._distance_fields.get((center_y, center_x))
+
+            for unexplored_coor in self._get_unexplored():
+                nearest_unexplored_y, nearest_unexplored_x = unexplored_coor[0]
+                _logger.debug('nearest_unexplored_y, nearest_unexplored_x: {}', (nearest_unexplored_y, nearest_unexplored_x))
+
+                robot_cell_index = grid.get_grid_index(nearest_unexplored_y, nearest_unexplored_x)
+                adjacent_cells = grid.get_robot_cells(robot_cell_index)
+                del adjacent_cells[4]
+
+                adj_order = [5, 6, 7, 3, 4, 0, 1, 2]
+                targets = [(nearest_unexplored_y, nearest_unexplored_x)] + \
+                          [grid.get_matrix_coords(adjacent_cells[i]) for i in adj_order]
+
+                for target in targets:
+                    if distance_field.distance(target[0], target[1]):
+                        _logger.debug('Finding shortest path moves to {}......', target)
+                        moves = self._get_moves_to(target)
+                        _logger.debug('Shortest path moves: {}', moves)
+                        return moves
+
+                _logger.warning('Cannot find shortest path moves to nearest unexplored')
+
+            return []
+
+    def _get_moves_to(self, goal):
+        """
+        Plan the moves to a goal.
+
+        The incremental planner is kept while the goal stays the same, so a new plan after the map has changed only
+        repairs the part of the search the change affects.
+
+        :param goal: The (y, x) the robot center has to reach.
+        :return: The list of moves.
+        """
+        if self._planner is None or self._planner.goal != goal:
+            self._planner = IncrementalPlanner(self._robot, goal)
+        return self._planner.get_moves()
+
+    def _update_planner(self, updated_cells):
+        """ Pass the cells updated by the robot on to the planner. """
+        if self._planner is not None:
+            with tracer.span(PHASE_PLANNER):
+                self._planner.update_cells(updated_cells)
+
     def start(self):
         """
         Simulate exploring a maze with a virtual robot.
@@ -62,7 +133,7 @@ class Exploration:
                     if is_blind_range_undetected_obstacle:
                         if self._robot.check_free(LEFT) or self._robot.check_free(FORWARD):
                             self._robot.turn_robot(RIGHT)
-                            print('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
+                            _logger.debug('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
                             yield RIGHT, TURN, {}
 
                             is_complete = False
@@ -74,7 +145,7 @@ class Exploration:
                             updated_cells = self._robot.get_sensor_readings_blind_range()
                             yield updated_cells
 
-                            print('Turn Left to get back to original track')
+                            _logger.debug('Turn Left to get back to original track')
                             self._robot.turn_robot(LEFT)
                             yield LEFT, TURN, {}
                             yield is_complete
@@ -89,19 +160,19 @@ class Exploration:
 
                         if self._robot.check_free(LEFT):
                             updated_cells = self._robot.move_robot(LEFT)
-                            print('LEFT Free')
+                            _logger.debug('LEFT Free')
                             yield LEFT, MOVE, updated_cells
                         elif self._robot.check_free(FORWARD):
-                            print('Forward Free')
+                            _logger.debug('Forward Free')
                             updated_cells = self._robot.move_robot(FORWARD)
                             yield FORWARD, MOVE, updated_cells
                         else:
                             self._robot.turn_robot(RIGHT)
                             yield RIGHT, TURN, {}
                     else:
-                        print('Robot in efficiency limit.... ')
+                        _logger.debug('Robot in efficiency limit.... ')
                         if self._robot.check_free(FORWARD):
-                            print('Forward Free')
+                            _logger.debug('Forward Free')
                             updated_cells = self._robot.move_robot(FORWARD)
                             yield FORWARD, MOVE, updated_cells
                         elif self._robot.check_free(LEFT):
@@ -114,7 +185,7 @@ class Exploration:
                             if is_complete:
                                 raise ExploreComplete
 
-                            if self._robot.center == START:
+                            if self._robot.center == self._robot.grid.start:
                                 is_back_at_start = True
                             yield is_back_at_start
                             if is_back_at_start:
@@ -135,10 +206,11 @@ class Exploration:
                     if is_complete:
                         raise ExploreComplete
 
-                    if self._robot.center != START:
+                    if self._robot.center != self._robot.grid.start:
                         is_leave_start = True
 
-                    if self._robot.center == START and is_leave_start and self._robot.get_completion_count() > 100:
+                    if self._robot.center == self._robot.grid.start and is_leave_start \
+                            and self._robot.get_completion_count() > self._robot.grid.size // 3:
                         is_back_at_start = True
 
                     yield is_back_at_start
@@ -148,42 +220,16 @@ class Exploration:
 
                 while True:
                     try:
-                        unexplored_coors = self._get_unexplored()
-                        for unexplored_coor in unexplored_coors:
-                            nearest_unexplored_y, nearest_unexplored_x = unexplored_coor[0]
-                            center_y, center_x = get_matrix_coords(self._robot.center)
-                            print('nearest_unexplored_y, nearest_unexplored_x: {}'.format((nearest_unexplored_y, nearest_unexplored_x)))
-
-                            print('Finding shortest path moves to nearest unexplored......')
-                            moves = get_shortest_path_moves(self._robot,
-                                                            (center_y, center_x),
-                                                            (nearest_unexplored_y, nearest_unexplored_x))
-                            print('Shortest path moaves to nearest unexplored: {}'.format(moves))
-
-                            if not moves:  # Check adjacent cells
-                                print('WARNING: Cannot find shortest path moves to nearest unexplored')
-
-                                print('Finding shortest valid path moves to adjacent cells......')
-                                robot_cell_index = get_grid_index(nearest_unexplored_y, nearest_unexplored_x)
-                                adjacent_cells = get_robot_cells(robot_cell_index)
-                                del adjacent_cells[4]
-
-                                adj_order = [5, 6, 7, 3, 4, 0, 1, 2]
-                                adjacent_cells = [adjacent_cells[i] for i in adj_order]
-
-                                moves = get_shortest_valid_path(self._robot,
-                                                                self._robot.center, adjacent_cells)
-
-                            if moves:
-                                break
+                        moves = self._get_moves_to_unexplored()
 
                         if not moves:
-                            print('WARNING: Cannot find shortest path moves to unexplored')
+                            _logger.warning('Cannot find shortest path moves to unexplored')
                             raise PathNotFound
 
                         for move in moves:
                             updated_cells, is_blind_range_undetected_obstacle = self._robot.get_sensor_readings(self.is_arrow_scan)
                             if updated_cells:
+                                self._update_planner(updated_cells)
                                 is_complete = self._robot.is_complete(self._exploration_limit, self._start_time,
                                                         self._time_limit)
                                 yield "updated", updated_cells, is_complete
@@ -194,13 +240,14 @@ class Exploration:
 
                             if is_blind_range_undetected_obstacle:
                                 self._robot.turn_robot(RIGHT)
-                                print('-' * 50)
-                                print('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
+                                _logger.debug('-' * 50)
+                                _logger.debug('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
                                 yield "turned", RIGHT, False
 
                                 updated_cells, is_blind_range_undetected_obstacle = self._robot.get_sensor_readings(self.is_arrow_scan)
 
                                 if updated_cells:
+                                    self._update_planner(updated_cells)
                                     is_complete = self._robot.is_complete(self._exploration_limit, self._start_time,
                                                             self._time_limit)
                                     yield "updated", updated_cells, is_complete
@@ -209,7 +256,7 @@ class Exploration:
                                         raise ExploreComplete
                                     raise CellsUpdated
 
-                                print('Turn Left to get back to original track')
+                                _logger.debug('Turn Left to get back to original track')
                                 self._robot.turn_robot(LEFT)
                                 yield "turned", LEFT, False
 
@@ -217,6 +264,7 @@ class Exploration:
                             yield "moved", move, False
 
                             if updated_cells:
+                                self._update_planner(updated_cells)
                                 is_complete = self._robot.is_complete(self._exploration_limit, self._start_time,
                                                         self._time_limit)
                                 yield "updated", updated_cells, is_complete
@@ -235,8 +283,8 @@ class Exploration:
                 break
 
         # Return to start after completion
-        center_y, center_x = get_matrix_coords(self._robot.center)
-        start_y, start_x = get_matrix_coords(START)
+        center_y, center_x = self._robot.grid.get_matrix_coords(self._robot.center)
+        start_y, start_x = self._robot.grid.start_point
 
         moves = get_shortest_path_moves(self._robot,
                                         (center_y, center_x), (start_y, start_x), is_give_up=True)
@@ -251,6 +299,19 @@ class Exploration:
 
         return True
 
+    def _get_free(self, speculation):
+        """
+        Check if the robot can step left and forward, using the answers worked out while the reading was taken.
+
+        :param speculation: The WallFollowSpeculation made when the reading was asked for.
+        :return: Whether the robot can step left, and whether it can step forward.
+        """
+        is_free = speculation.get_free(self._robot)
+        if is_free is None:
+            _logger.debug('Speculation missed: checking free again')
+            return self._robot.check_free(LEFT), self._robot.check_free(FORWARD)
+        return is_free
+
     def start_real(self, sender):
         """
         Explore the maze with the physical robot.
@@ -266,13 +327,18 @@ class Exploration:
             try:
                 # Left-wall-hugging until loop
                 while not is_back_at_start:
+                    # Work out the next move for every outcome of the reading while the Arduino takes it.
+                    self._robot.request_sensor_readings(sender)
+                    speculation = WallFollowSpeculation(self._robot)
+
                     updated_cells, is_blind_range_undetected_obstacle = self._robot.get_sensor_readings(sender, self.is_arrow_scan)
                     yield updated_cells
 
+                    is_left_free, is_forward_free = self._get_free(speculation)
                     if is_blind_range_undetected_obstacle:
-                        if self._robot.check_free(LEFT) or self._robot.check_free(FORWARD):
+                        if is_left_free or is_forward_free:
                             self._robot.turn_robot(sender, RIGHT, self.is_arrow_scan)
-                            print('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
+                            _logger.debug('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
                             yield RIGHT, TURN, {}
 
                             is_complete = False
@@ -284,7 +350,7 @@ class Exploration:
                             updated_cells = self._robot.get_sensor_readings_blind_range(sender)
                             yield updated_cells
 
-                            print('Turn Left to get back to original track')
+                            _logger.debug('Turn Left to get back to original track')
                             self._robot.turn_robot(sender, LEFT, self.is_arrow_scan)
                             yield LEFT, TURN, {}
                             yield is_complete
@@ -293,12 +359,14 @@ class Exploration:
                             updated_cells = {}
                             yield updated_cells
 
-                    if self._robot.check_free(LEFT):
+                            is_left_free, is_forward_free = self._get_free(speculation)
+
+                    if is_left_free:
                         updated_cells = self._robot.move_robot(sender, LEFT, self.is_arrow_scan)
-                        print('LEFT Free')
+                        _logger.debug('LEFT Free')
                         yield LEFT, MOVE, updated_cells
-                    elif self._robot.check_free(FORWARD):
-                        print('Forward Free')
+                    elif is_forward_free:
+                        _logger.debug('Forward Free')
                         updated_cells = self._robot.move_robot(sender, FORWARD, self.is_arrow_scan)
                         yield FORWARD, MOVE, updated_cells
                     else:
@@ -311,10 +379,11 @@ class Exploration:
                     if is_complete:
                         raise ExploreComplete
 
-                    if self._robot.center != START:
+                    if self._robot.center != self._robot.grid.start:
                         is_leave_start = True
 
-                    if self._robot.center == START and is_leave_start and self._robot.get_completion_count() > 100:
+                    if self._robot.center == self._robot.grid.start and is_leave_start \
+                            and self._robot.get_completion_count() > self._robot.grid.size // 3:
                         is_back_at_start = True
 
                     yield is_back_at_start
@@ -325,42 +394,16 @@ class Exploration:
                 # Finding shortest path to nearest unexplored square
                 while True:
                     try:
-                        unexplored_coors = self._get_unexplored()
-                        for unexplored_coor in unexplored_coors:
-                            nearest_unexplored_y, nearest_unexplored_x = unexplored_coor[0]
-                            center_y, center_x = get_matrix_coords(self._robot.center)
-                            print('nearest_unexplored_y, nearest_unexplored_x: {}'.format((nearest_unexplored_y, nearest_unexplored_x)))
-
-                            print('Finding shortest path moves to nearest unexplored......')
-                            moves = get_shortest_path_moves(self._robot,
-                                                            (center_y, center_x),
-                                                            (nearest_unexplored_y, nearest_unexplored_x))
-                            print('Shortest path moaves to nearest unexplored: {}'.format(moves))
-
-                            if not moves:  # Check adjacent cells
-                                print('WARNING: Cannot find shortest path moves to nearest unexplored')
-
-                                print('Finding shortest valid path moves to adjacent cells......')
-                                robot_cell_index = get_grid_index(nearest_unexplored_y, nearest_unexplored_x)
-                                adjacent_cells = get_robot_cells(robot_cell_index)
-                                del adjacent_cells[4]
-
-                                adj_order = [5, 6, 7, 3, 4, 0, 1, 2]
-                                adjacent_cells = [adjacent_cells[i] for i in adj_order]
-
-                                moves = get_shortest_valid_path(self._robot,
-                                                                self._robot.center, adjacent_cells)
-
-                            if moves:
-                                break
+                        moves = self._get_moves_to_unexplored()
 
                         if not moves:
-                            print('WARNING: Cannot find shortest path moves to unexplored')
+                            _logger.warning('Cannot find shortest path moves to unexplored')
                             raise PathNotFound
 
                         for move in moves:
                             updated_cells, is_blind_range_undetected_obstacle = self._robot.get_sensor_readings(sender, self.is_arrow_scan)
                             if updated_cells:
+                                self._update_planner(updated_cells)
                                 is_complete = self._robot.is_complete(self._exploration_limit, self._start_time,
                                                         self._time_limit)
                                 yield "updated", updated_cells, is_complete
@@ -371,13 +414,14 @@ class Exploration:
 
                             if is_blind_range_undetected_obstacle:
                                 self._robot.turn_robot(sender, RIGHT, self.is_arrow_scan)
-                                print('-' * 50)
-                                print('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
+                                _logger.debug('-' * 50)
+                                _logger.debug('Blind Range Undetected Obstacle Observed: Turn right to get sensor reading')
                                 yield "turned", RIGHT, False
 
                                 updated_cells, is_blind_range_undetected_obstacle = self._robot.get_sensor_readings(sender, self.is_arrow_scan)
 
                                 if updated_cells:
+                                    self._update_planner(updated_cells)
                                     is_complete = self._robot.is_complete(self._exploration_limit, self._start_time,
                                                             self._time_limit)
                                     yield "updated", updated_cells, is_complete
@@ -386,7 +430,7 @@ class Exploration:
                                         raise ExploreComplete
                                     raise CellsUpdated
 
-                                print('Turn Left to get back to original track')
+                                _logger.debug('Turn Left to get back to original track')
                                 self._robot.turn_robot(sender, LEFT, self.is_arrow_scan)
                                 yield "turned", LEFT, False
 
@@ -394,6 +438,7 @@ class Exploration:
                             yield "moved", move, False
 
                             if updated_cells:
+                                self._update_planner(updated_cells)
                                 is_complete = self._robot.is_complete(self._exploration_limit, self._start_time,
                                                         self._time_limit)
                                 yield "updated", updated_cells, is_complete
@@ -412,19 +457,19 @@ class Exploration:
                 break
 
 
-        center_y, center_x = get_matrix_coords(self._robot.center)
-        start_y, start_x = get_matrix_coords(START)
+        center_y, center_x = self._robot.grid.get_matrix_coords(self._robot.center)
+        start_y, start_x = self._robot.grid.start_point
 
         moves = get_shortest_path_moves(self._robot,
                                         (center_y, center_x), (start_y, start_x), is_give_up=True)
 
-        if not moves:
-            return True
+        for move in moves:
+            self._robot.move_robot(sender, move, self.is_arrow_scan)
+            yield move
 
-        else:
-            for move in moves:
-                self._robot.move_robot(sender, move, self.is_arrow_scan)
-                yield move
+        # Let the Arduino finish the moves still in flight, so the commands sent after the run are not mistaken for
+        # them.
+        self._robot.flush_commands(sender)
         return True
 
 
@@ -433,7 +478,7 @@ class ExploreComplete(Exception):
     This exception is raised when exploration is complete.
     """
     def __init__(self, message="Exploration complete!"):
-        print(message)
+        _logger.debug('{}', message)
 
 
 class CellsUpdated(Exception):
@@ -448,4 +493,4 @@ class PathNotFound(Exception):
     This exception is raised when a path to the location cannot be found.
     """
     def __init__(self):
-        print("Valid path not found!")
+        _logger.debug("Valid path not found!")
@@ -0,0 +1,221 @@
+from heapq import heappush, heappop
+from Utils.utils import *
+
+"""This module defines the incremental planner that repairs its path as the discovered map changes."""
+
+INFINITY = float('inf')
+
+
+class IncrementalPlanner:
+    """
+    This class plans the moves of the robot to a goal cell with D* Lite.
+
+    A state is a (cell, facing) pair, stored as cell * 4 + facing. The robot can move one step forward, which costs
+    STRAIGHT_STEP, or turn left or right on the spot, which costs TURNING_STEP. The search runs backwards from the
+    goal (with any facing) towards the robot, so the search tree stays valid as the robot moves. When cells of the
+    discovered map change, only the states around them are updated and the search only repairs the part of the tree
+    that the change affects.
+    """
+    def __init__(self, robot, goal, is_give_up=False):
+        """
+        Initialize the planner.
+
+        :param robot: The robot currently in the maze.
+        :param goal: The (y, x) the robot center has to reach.
+        :param is_give_up: Whether unexplored cells should be treated as obstacles.
+        """
+        self._robot = robot
+        self._grid = robot.grid
+        self._step_offsets = robot.grid.step_offsets
+        self.goal = goal
+        self._is_give_up = is_give_up
+        self._free = bytearray(self._get_free())
+        self._map_version = robot.map_version
+
+        size = (self._grid.size + 1) * 4
+        self._g = [INFINITY] * size
+        self._rhs = [INFINITY] * size
+        self._keys = {}
+        self._q = []
+        self._km = 0
+
+        self._goal_cell = self._grid.get_grid_index(goal[0], goal[1])
+        self._last_state = self._get_robot_state()
+
+        for facing in range(4):
+            state = self._goal_cell * 4 + facing
+            self._rhs[state] = 0
+            self._push(state)
+
+    def _get_free(self):
+        """ Return the clearance of the discovered map that the planner uses. """
+        clearance_map = self._robot.clearance_map
+        return clearance_map.free_explored if self._is_give_up else clearance_map.free
+
+    def _get_robot_state(self):
+        """ Return the state the robot is currently in. """
+        return self._robot.center * 4 + self._robot.facing
+
+    def _heuristic(self, state):
+        """ Estimate the cost between the robot and a state with the Manhattan distance. """
+        y, x = self._grid.get_matrix_coords(self._robot.center)
+        state_y, state_x = self._grid.get_matrix_coords(state // 4)
+        return (abs(y - state_y) + abs(x - state_x)) * STRAIGHT_STEP
+
+    def _calculate_key(self, state):
+        """ Return the priority of a state in the open set. """
+        g = min(self._g[state], self._rhs[state])
+        return g + self._heuristic(state) + self._km, g
+
+    def _push(self, state):
+        """ Insert or move a state in the open set. """
+        key = self._calculate_key(state)
+        self._keys[state] = key
+        heappush(self._q, (key, state))
+
+    def _top_key(self):
+        """ Return the smallest key in the open set, dropping entries that are no longer valid. """
+        q = self._q
+        while q and self._keys.get(q[0][1]) != q[0][0]:
+            heappop(q)
+        if not q:
+            return INFINITY, INFINITY
+        return q[0][0]
+
+    def _successors(self, state):
+        """
+        Return the states the robot can get to from a state with a single action, and the cost of the action.
+
+        The forward step comes first so that, among equally good moves, the robot keeps going straight.
+        """
+        cell, facing = state // 4, state % 4
+        free = self._free
+        if not free[cell]:
+            return []
+
+        successors = []
+        next_cell = cell + self._step_offsets[facing]
+        if free[next_cell]:
+            successors.append((next_cell * 4 + facing, STRAIGHT_STEP))
+        successors.append((cell * 4 + (facing - 1) % 4, TURNING_STEP))
+        successors.append((cell * 4 + (facing + 1) % 4, TURNING_STEP))
+        return successors
+
+    def _predecessors(self, state):
+        """ Return the states from which a single action leads to a state. """
+        cell, facing = state // 4, state % 4
+        if not self._free[cell]:
+            return []
+
+        predecessors = [cell * 4 + (facing + 1) % 4, cell * 4 + (facing - 1) % 4]
+        previous_cell = cell - self._step_offsets[facing]
+        if self._free[previous_cell]:
+            predecessors.append(previous_cell * 4 + facing)
+        return predecessors
+
+    def _update_state(self, state):
+        """ Recompute the one-step lookahead cost of a state and put it in the open set if it is inconsistent. """
+        if state // 4 != self._goal_cell:
+            rhs = INFINITY
+            for successor, cost in self._successors(state):
+                rhs = min(rhs, cost + self._g[successor])
+            self._rhs[state] = rhs
+
+        self._keys.pop(state, None)
+        if self._g[state] != self._rhs[state]:
+            self._push(state)
+
+    def _compute_shortest_path(self):
+        """ Expand states until the cost of the robot state is known. """
+        g = self._g
+        rhs = self._rhs
+        start = self._get_robot_state()
+
+        while self._top_key() < self._calculate_key(start) or rhs[start] != g[start]:
+            old_key, state = heappop(self._q)
+            del self._keys[state]
+
+            new_key = self._calculate_key(state)
+            if old_key < new_key:
+                self._push(state)
+            elif g[state] > rhs[state]:
+                g[state] = rhs[state]
+                for predecessor in self._predecessors(state):
+                    self._update_state(predecessor)
+            else:
+                g[state] = INFINITY
+                for predecessor in self._predecessors(state) + [state]:
+                    self._update_state(predecessor)
+
+    def _update_cell(self, cell):
+        """ Update the states whose actions changed because the clearance of a cell changed. """
+        self._free[cell] = self._get_free()[cell]
+        for facing in range(4):
+            state = cell * 4 + facing
+            self._update_state(state)
+            self._update_state((cell - self._step_offsets[facing]) * 4 + facing)
+
+    def update_cells(self, updated_cells):
+        """
+        Repair the search after cells of the discovered map have changed.
+
+        :param updated_cells: The updated cell indexes and values, as returned by Robot.get_sensor_readings or
+                              Robot.move_robot.
+        :return: N/A
+        """
+        free = self._get_free()
+        grid = self._grid
+        for cell in updated_cells:
+            y, x = grid.get_matrix_coords(cell)
+            for center_y in range(max(y - 1, 1), min(y + 2, grid.rows - 1)):
+                for center_x in range(max(x - 1, 1), min(x + 2, grid.cols - 1)):
+                    center = grid.get_grid_index(center_y, center_x)
+                    if self._free[center] != free[center]:
+                        self._update_cell(center)
+
+        self._map_version = self._robot.map_version
+
+    def _sync(self):
+        """ Catch up with changes to the discovered map that were not passed to update_cells. """
+        if self._map_version == self._robot.map_version:
+            return
+
+        free = self._get_free()
+        for cell in range(1, self._grid.size + 1):
+            if self._free[cell] != free[cell]:
+                self._update_cell(cell)
+        self._map_version = self._robot.map_version
+
+    def get_moves(self):
+        """
+        Calculate the list of moves from the current position and facing of the robot to the goal.
+
+        :return: The list of moves the robot needs to take, in the format used by Robot.move_robot, or an empty
+                 list if there is no path.
+        """
+        start = self._get_robot_state()
+        if start != self._last_state:
+            # The robot has moved since the last search.
+            self._km += self._heuristic(self._last_state)
+            self._last_state = start
+
+        self._sync()
+        self._compute_shortest_path()
+
+        if self._g[start] == INFINITY:
+            return []
+
+        moves = []
+        turn = 0
+        state = start
+        while state // 4 != self._goal_cell:
+            next_state = min(self._successors(state), key=lambda successor: successor[1] + self._g[successor[0]])[0]
+            if next_state // 4 == state // 4:
+                turn += 1 if next_state % 4 == (state % 4 + 1) % 4 else -1
+            else:
+                turn %= 4
+                moves.append(LEFT if turn == 3 else turn)
+                turn = 0
+            state = next_state
+
+        return moves
@@ -0,0 +1,125 @@
+from Utils.utils import *
+from Algo.clearance_map import ClearanceMap
+from Utils.mdf import MdfCodec
+
+"""This module defines the map state that a robot builds up while exploring."""
+
+# The state of a cell as shown to the user, from whether it is explored and whether it is an obstacle.
+CELL_UNEXPLORED = 0
+CELL_FREE = 1
+CELL_OBSTACLE = 2
+
+
+class MapState:
+    """
+    This class holds the maps a robot builds while exploring and keeps summaries of them up to date.
+
+    The maps are still nested lists indexed as [y][x], so existing code can keep reading discovered_map,
+    exploration_status and probability_map as before. Their size is taken from the maps, and kept as the Grid every
+    planner working on them numbers the cells with. All writes go through this class, which keeps the counters,
+    the clearance map, the map version, the packed MDF strings and a flat copy of the discovered map (indexed by cell
+    index) in step, so none of them has to be recomputed from the whole maze.
+    """
+    def __init__(self, exploration_status, discovered_map):
+        """
+        Initialize the map state.
+
+        :param exploration_status: The map that shows whether each cell is explored or unexplored.
+        :param discovered_map: The map that shows whether each cell is an obstacle (1), free (0) or unexplored (2).
+        """
+        self.exploration_status = exploration_status
+        self.discovered_map = discovered_map
+        self.clearance_map = ClearanceMap(discovered_map)
+        self.grid = self.clearance_map.grid
+        self.probability_map = [[[0.0, 0.0] for _ in range(self.grid.cols)] for _ in range(self.grid.rows)]
+        self.mdf = MdfCodec(exploration_status, discovered_map)
+        self.version = 0
+
+        self.cells = bytearray([0] + [value for row in discovered_map for value in row])
+        self.explored_count = sum(sum(row) for row in exploration_status)
+        self.obstacle_count = self.cells.count(1)
+
+    def mark_explored(self, y, x):
+        """ Mark a cell as explored. """
+        if not self.exploration_status[y][x]:
+            self.exploration_status[y][x] = 1
+            self.explored_count += 1
+            self.mdf.mark_explored(y, x)
+
+    def set_discovered(self, y, x, value):
+        """
+        Change the value of a cell in the discovered map.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :param value: The new value of the cell.
+        :return: N/A
+        """
+        old_value = self.discovered_map[y][x]
+        self.obstacle_count += (value == 1) - (old_value == 1)
+        self.clearance_map.update_cell(y, x, old_value, value)
+        self.mdf.set_discovered(y, x, value)
+        self.discovered_map[y][x] = value
+        self.cells[self.grid.get_grid_index(y, x)] = value
+        self.version += 1
+
+    def add_reading(self, y, x, count, total):
+        """
+        Add sensor readings to the running counts of a cell.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :param count: The number of times the cell was flagged as an obstacle.
+        :param total: The number of times the cell was scanned.
+        :return: The running counts of the cell, or None if the cell is a guaranteed non-obstacle.
+        """
+        if self.is_permanent(y, x):
+            return None
+
+        probability = self.probability_map[y][x]
+        probability[0] += count
+        probability[1] += total
+        return probability[0], probability[1]
+
+    def mark_permanent(self, y, x):
+        """ Mark a cell as a guaranteed non-obstacle in the probability map. """
+        probability = self.probability_map[y][x]
+        probability[0] = 1.0
+        probability[1] = 0.0
+
+    def is_permanent(self, y, x):
+        """ Check if a cell is a guaranteed non-obstacle, which no sensor reading can change. """
+        probability = self.probability_map[y][x]
+        return probability[0] == 1.0 and probability[1] == 0.0
+
+    def get_cell(self, y, x):
+        """ Return the state of a cell as (explored, discovered value, probability), to put back with restore_cell. """
+        return self.exploration_status[y][x], self.discovered_map[y][x], tuple(self.probability_map[y][x])
+
+    def restore_cell(self, y, x, state):
+        """
+        Put a cell back into a state returned by get_cell.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :param state: The (explored, discovered value, probability) of the cell.
+        :return: N/A
+        """
+        explored, value, probability = state
+        if self.exploration_status[y][x] != explored:
+            self.exploration_status[y][x] = explored
+            if explored:
+                self.explored_count += 1
+                self.mdf.mark_explored(y, x)
+            else:
+                self.explored_count -= 1
+                self.mdf.mark_unexplored(y, x)
+        if self.discovered_map[y][x] != value:
+            self.set_discovered(y, x, value)
+        self.probability_map[y][x][:] = probability
+
+    def get_cell_states(self):
+        """ Return the state of every cell, CELL_UNEXPLORED, CELL_FREE or CELL_OBSTACLE, indexed by cell index - 1. """
+        return bytearray(CELL_UNEXPLORED if not explored else CELL_OBSTACLE if value == 1 else CELL_FREE
+                         for explored_row, row in zip(self.exploration_status, self.discovered_map)
+                         for explored, value in zip(explored_row, row))
@@ -0,0 +1,909 @@
+from Utils.utils import *
+from Utils.tracer import tracer, PHASE_SENSOR_PARSE
+from Algo.map_state import MapState
+from Algo.sensor_rays import get_sensor_ray_table
+from time import time
+from Utils.logger import get_logger
+
+"""This module defines the robot core shared by the simulated and the physical robot, and the devices it uses."""
+
+_logger = get_logger(__name__)
+
+
+class SensorSource:
+    """
+    This class is the interface the robot takes its sensor readings and arrow photos from.
+    """
+    def request_readings(self, robot):
+        """
+        Ask for a sensor reading ahead of get_readings, so the robot can work while the reading is taken.
+
+        Sources that take their readings at once do nothing here.
+
+        :param robot: The robot taking the reading.
+        :return: N/A
+        """
+        pass
+
+    def get_readings(self, robot):
+        """
+        Take a sensor reading, or collect the one asked for by request_readings.
+
+        :param robot: The robot taking the reading.
+        :return: The reading of every sensor in the format sent by the Arduino, e.g. '0,1,0,0,2,0,'.
+        """
+        raise NotImplementedError
+
+    def get_arrows(self, robot, camera_cells):
+        """
+        Take a photo to look for arrows.
+
+        :param robot: The robot taking the photo.
+        :param camera_cells: The (x, y) of the cells in the view of the camera.
+        :return: A string with '1' for every cell in the view that has an arrow facing the camera and '0' otherwise,
+                 in the format sent by the RPi.
+        """
+        raise NotImplementedError
+
+
+class CommandsLost(Exception):
+    """Raised when the Arduino does not acknowledge the commands in flight."""
+    def __init__(self, commands):
+        """
+        :param commands: The (sequence, command, pose) of every command that was not acknowledged, oldest first.
+        """
+        super().__init__('Commands not acknowledged: {}'.format([command for _, command, _ in commands]))
+        self.commands = commands
+
+    @property
+    def pose(self):
+        """ The pose of the robot before the oldest lost command that moved it, or None if none did. """
+        for _, _, pose in self.commands:
+            if pose is not None:
+                return pose
+        return None
+
+
+class Actuator:
+    """
+    This class is the interface the robot sends its Arduino commands through.
+
+    An actuator may let several commands be in flight at once. The robot updates its pose as soon as it sends a move,
+    so the pose is speculative until the move is acknowledged.
+    """
+    def send(self, command, pose=None):
+        """
+        Start carrying out a command.
+
+        :param command: The Arduino command.
+        :param pose: The (center, facing, move_counts) of the robot before the command, if the command moves the robot.
+        :return: N/A
+        """
+        raise NotImplementedError
+
+    def wait(self):
+        """ Wait until there is room for another command in flight. Raises CommandsLost if they are not carried out. """
+        raise NotImplementedError
+
+    def flush(self):
+        """ Wait until every command sent has been carried out. Raises CommandsLost if they are not carried out. """
+        self.wait()
+
+    def execute(self, command):
+        """ Carry out a command and wait until there is room for the next. """
+        self.send(command)
+        self.wait()
+
+
+class RobotCore:
+    """
+    This class holds everything the simulated and the physical robot have in common.
+
+    The robot only talks to the outside world through a SensorSource and an Actuator, so the simulator runs the same
+    sensor fusion, calibration and arrow logic as the physical run. The methods that use them are private here;
+    sim_robot.Robot and real_robot.Robot expose them with the signatures their callers expect.
+    """
+    def __init__(self, exploration_status, facing, discovered_map, sensor_source, actuator):
+        """
+        Initialize the robot.
+
+        :param exploration_status: The map that shows whether each cell is explored or unexplored.
+        :param facing: The current facing of the robot. (N/S/E/W)
+        :param discovered_map: The map built by the robot that shows whether each cell is an obstacle or not.
+        :param sensor_source: The SensorSource the robot takes its readings from.
+        :param actuator: The Actuator the robot sends its commands through.
+        """
+        self.is_fast_path = False
+        self.map_state = MapState(exploration_status, discovered_map)
+        self.exploration_status = self.map_state.exploration_status
+        self.grid = self.map_state.grid
+        self.center = self.grid.start
+        self.facing = facing
+        self.discovered_map = self.map_state.discovered_map
+        self.clearance_map = self.map_state.clearance_map
+        self.probability_map = self.map_state.probability_map
+        self.arrow_taken_status = [[[0, 0, 0, 0] for _ in range(self.grid.cols)] for _ in range(self.grid.rows)]
+        self.arrow_taken_positions = []
+        self.arrows = []
+        self.arrows_arduino = []
+        self.arrows_results = []
+        self.move_counts = 1
+        self.is_calibration_side_time = False
+        self.is_calibration_front_time = False
+        self.calibration_side_steps = CALIBRATION_SIDE_STEPS
+        self.sensors = [
+            #   2 3 4
+            # 1       5
+            # 0
+            #
+            {"mount_loc": SWS, "facing": WEST, "range": 2, "blind_spot": 0},
+            {"mount_loc": NWS, "facing": WEST, "range": 2, "blind_spot": 0},
+            {"mount_loc": NWS, "facing": NORTH, "range": 2, "blind_spot": 0},
+            {"mount_loc": NS, "facing": NORTH, "range": 2, "blind_spot": 0},
+            {"mount_loc": NES, "facing": NORTH, "range": 2, "blind_spot": 0},
+            {"mount_loc": NES, "facing": EAST, "range": 5, "blind_spot": 3}
+        ]
+        self._sensor_rays = get_sensor_ray_table(self.sensors, self.grid)
+        self.sensor_source = sensor_source
+        self.actuator = actuator
+        # The state of the cells under the robot before each move that may still be in flight, as (pose, [(cell,
+        # state)]), oldest first, to put them back if the move is lost.
+        self._standing_changes = []
+        # The cells put back by roll backs and not yet returned as updated, with their values.
+        self._restored_cells = {}
+
+    def set_sensor_ranges(self, ranges):
+        """
+        Change how far each sensor reads.
+
+        :param ranges: The range of each sensor, in the order of the sensors. Each must be beyond its blind spot.
+        :return: N/A
+        """
+        if len(ranges) != len(self.sensors):
+            raise ValueError('Expected {} sensor ranges, got {}'.format(len(self.sensors), len(ranges)))
+
+        for sensor, sensor_range in zip(self.sensors, ranges):
+            if sensor_range <= sensor["blind_spot"]:
+                raise ValueError('Sensor range {} is within its blind spot'.format(sensor_range))
+            sensor["range"] = sensor_range
+        self._sensor_rays = get_sensor_ray_table(self.sensors, self.grid)
+
+    def _mark_probability(self, cell, count, total):
+        """
+        Mark the probability of a cell being an obstacle.
+
+        If the cell has >= 50% chance of being an obstacle, mark the cell as
+        an obstacle. Ignore cells that have been marked as guaranteed non-obstacles.
+
+        :param cell: The number of the cell being marked.
+        :param count: The number of times the cell was flagged as an obstacle when this method was called.
+        :param total: The number of times the cell was scanned when this method was called.
+        :return: Nothing if the cell is marked 100% non-obstacle. The new value of the cell otherwise.
+        """
+        y, x = self.grid.get_matrix_coords(cell)
+        _logger.debug('Current Sesnsor Reading: x, y, count, total: ({}, {}, {}, {})', x, y, count, total)
+
+        counts = self.map_state.add_reading(y, x, count, total)
+        if counts is None:
+            _logger.debug('perm')
+            return None, None
+
+        prob_obstacle, prob_total = counts
+        value = int(prob_obstacle / prob_total >= 0.5)
+
+        _logger.debug('Cumulative Sesnsor Reading: x, y, prob_obstacle, prob_total: ({}, {}, {}, {})', x, y, prob_obstacle,
+                      prob_total)
+
+        self.map_state.mark_explored(y, x)
+
+        if self.discovered_map[y][x] != value:
+            self._set_discovered(y, x, value)
+            return self.grid.get_grid_index(y, x), value
+
+        return None, None
+
+    def _mark_permanent(self, cell):
+        """
+        Mark a cell as a guaranteed non-obstacle.
+
+        Called when the robot walks over a cell.
+
+        :param cell: The number of the cell being marked.
+        :return: True if success. No definition of failure provided, however it is easy to add if required.
+        """
+        y, x = self.grid.get_matrix_coords(cell)
+
+        self.map_state.mark_permanent(y, x)
+        self.map_state.mark_explored(y, x)
+
+        if self.discovered_map[y][x] != 0:
+            self._set_discovered(y, x, 0)
+            return True
+
+        return False
+
+    def _set_discovered(self, y, x, value):
+        """
+        Change the value of a cell in the discovered map and keep the map state in step with it.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :param value: The new value of the cell.
+        :return: N/A
+        """
+        self.map_state.set_discovered(y, x, value)
+
+    @property
+    def map_version(self):
+        """ The number of changes made to the discovered map so far. """
+        return self.map_state.version
+
+    def _mark_arrow_taken(self, y, x, camera_facing):
+        """
+        Mark the face a cell having its picture taken by the arrow recognizer.
+
+        :param y: The y-coordinate of the cell to be marked.
+        :param x: The x-coordinate of the cell to be marked.
+        :param facing: The facing of the robot when the photo was taken.
+        :return: True if success. No definition of failure provided, however it is easy to add if required.
+        """
+
+        self.arrow_taken_status[y][x][camera_facing] = 1
+        _logger.debug('Mark Arrow Taken @ {}', (x, y, DIRECTIONS[camera_facing]))
+
+        return True
+
+    def _mark_arrows(self, position, result):
+        y, x, facing = tuple([int(_) for _ in position.split(',')])
+        _logger.debug('Recognizing Image taken with robot position @ {}', (x, y, DIRECTIONS[facing]))
+        discovered_map = self.discovered_map
+
+        camera_facing, camera_cells = self._get_camera_cells(y, x, facing)
+        arrow_direction = (camera_facing + 2) % 4
+
+        for index, (i, j) in enumerate(camera_cells):
+            _logger.debug('Check Arrow @ {}', (i, j, DIRECTIONS[arrow_direction]))
+            if discovered_map[j][i] == 1:
+                if result[index] == '1':
+                    self.arrows.append((j, i, arrow_direction))
+                    self.arrows_arduino.append(','.join([str(i), str(self.grid.flip_row(j)), str(arrow_direction)]))
+                    _logger.debug('Detected Arrow @ {}', (i, j, DIRECTIONS[arrow_direction]))
+
+    def _get_camera_cells(self, y, x, facing):
+        """
+        Work out the cells in the view of the RPi camera.
+
+        :param y: The y-coordinate of the robot center.
+        :param x: The x-coordinate of the robot center.
+        :param facing: The facing of the robot.
+        :return: The facing of the camera, and the (x, y) of the cells in its view or an empty list if the view is
+                 outside the maze.
+        """
+        camera_facing = (facing + CAMERA_FACING) % 4
+        distance = 2
+
+        if camera_facing == WEST:
+            new_x = x - distance
+            camera_cells = [(new_x, y - 1), (new_x, y)] if new_x >= 0 else []
+        elif camera_facing == NORTH:
+            new_y = y + distance
+            camera_cells = [(x - 1, new_y), (x, new_y)] if new_y < self.grid.rows else []
+        elif camera_facing == EAST:
+            new_x = x + distance
+            camera_cells = [(new_x, y + 1), (new_x, y)] if new_x < self.grid.cols else []
+        else:
+            new_y = y - distance
+            camera_cells = [(x + 1, new_y), (x, new_y)] if new_y >= 0 else []
+
+        return camera_facing, camera_cells
+
+    def in_efficiency_limit(self):
+        """
+        Check if the robot is one grid before the maximum limit of the maze.
+
+        The method is called to check if the robot has just moved past a 1-cell-width obstacle along
+        the wall of the maze.
+
+        :return: True if robot is in the limit, false otherwise.
+        """
+        y, x = self.grid.get_matrix_coords(self.center)
+        return self.grid.is_in_efficiency_limit(y, x, self.facing)
+
+    def mark_robot_standing(self):
+        """
+        Mark the area the robot is standing on as explored and guaranteed non-obstacles.
+
+        :return: The cells that were updated.
+        """
+        robot_cells = self.grid.get_robot_cells(self.center)
+        updated_cells = {}
+        for cell in robot_cells:
+            if self._mark_permanent(cell):
+                updated_cells[cell] = 0
+
+        return updated_cells
+
+    def get_completion_count(self):
+        """
+        Calculate how many of the cells the robot has explored in percentage.
+
+        :return: The count of the cells the robot has explored.
+        """
+        return self.map_state.explored_count
+
+    def is_complete(self, explore_limit, start_time, time_limit):
+        """
+        Check if the exploration is complete based on the exploration limit and the time limit.
+
+        :param explore_limit: The percentage of the maze up to which the robot is allowed to explore.
+        :param start_time: The start time of the exploration
+        :param time_limit: The maximum time that the robot was allowed to explore until.
+        :return: True if the exploration should be stopped, false otherwise.
+        """
+        return self.get_completion_count() >= self.grid.size \
+            or float(time() - start_time >= time_limit)
+
+    def is_complete_after_back_to_start(self, explore_limit, start_time, time_limit):
+        """
+        Check if the exploration is complete based on the exploration limit and the time limit.
+
+        :param explore_limit: The percentage of the maze up to which the robot is allowed to explore.
+        :param start_time: The start time of the exploration
+        :param time_limit: The maximum time that the robot was allowed to explore until.
+        :return: True if the exploration should be stopped, false otherwise.
+        """
+        return self.get_completion_count() >= explore_limit \
+            or float(time() - start_time >= time_limit)
+
+    def _turn_robot(self, direction, is_arrow_scan = False):
+        """
+        Turn the robot in a chosen direction.
+
+        :param direction: The direction to turn (FORWARD, LEFT, RIGHT, BACKWARD)
+        :return: Nothing. Stops the method if the direction is FORWARD to save time as the robot does not need to turn.
+        """
+
+        if direction == FORWARD:
+            return
+
+        self.actuator.send(get_arduino_cmd(direction), self._get_pose())
+        self.facing = (self.facing + direction) % 4
+        self.move_counts += TURNING_STEP
+
+        self._wait()
+
+        if self.is_calibrate_side_possible():
+            self._calibrate_side()
+
+        if is_arrow_scan and not self.is_fast_path:
+            self._check_arrow()
+
+    def _move_robot(self, direction, is_arrow_scan = False):
+        """
+        Move the robot 1 step in a chosen direction.
+
+        Turn the robot towards the chosen direction then move one step forward. Assume step is not obstacle.
+
+        :param direction: The direction to move (FORWARD, LEFT, RIGHT, BACKWARD)
+        :return: Any cells that the robot has stepped on that it had not yet before, and any cells put back because a
+                 move was lost.
+        """
+        self._turn_robot(direction, is_arrow_scan)
+
+        pose = self._get_pose()
+        self.actuator.send(get_arduino_cmd(FORWARD), pose)
+
+        if self.facing == NORTH:
+            self.center += self.grid.cols
+        elif self.facing == EAST:
+            self.center += 1
+        elif self.facing == SOUTH:
+            self.center -= self.grid.cols
+        elif self.facing == WEST:
+            self.center -= 1
+
+        self.move_counts += STRAIGHT_STEP
+        # The robot is only known to stand there once the move is acknowledged.
+        self._standing_changes.append((pose, [(cell, self.map_state.get_cell(*self.grid.get_matrix_coords(cell)))
+                                              for cell in self.grid.get_robot_cells(self.center)]))
+        updated_cells = self.mark_robot_standing()
+
+        self._wait()
+
+        if is_arrow_scan and not self.is_fast_path:
+            self._check_arrow()
+
+        updated_cells.update(self._take_restored_cells())
+        return updated_cells
+
+    def _get_pose(self):
+        """ Return the (center, facing, move_counts) of the robot, to go back to if a move is lost. """
+        return self.center, self.facing, self.move_counts
+
+    def _execute(self, command):
+        """ Send a command that does not move the robot and wait until there is room for the next. """
+        self.actuator.send(command)
+        self._wait()
+
+    def _wait(self):
+        """ Wait until there is room for another command in flight. """
+        try:
+            self.actuator.wait()
+        except CommandsLost as error:
+            self._roll_back(error)
+
+    def _flush_commands(self):
+        """ Wait until every command sent has been carried out, so the pose of the robot is no longer speculative. """
+        try:
+            self.actuator.flush()
+        except CommandsLost as error:
+            self._roll_back(error)
+        # Every move left is acknowledged, so the cells under it are known.
+        self._standing_changes = []
+
+    def _roll_back(self, error):
+        """
+        Put the robot back to where it was before the moves the Arduino did not acknowledge, and the cells those moves
+        marked as standing on back to what they were.
+        """
+        _logger.warning('{}, rolling back to {}', error, error.pose)
+        if error.pose is None:
+            return
+
+        self.center, self.facing, self.move_counts = error.pose
+        # The lost commands are the last ones sent, so their moves are at the end.
+        lost_poses = {pose for _, _, pose in error.commands}
+        while self._standing_changes and self._standing_changes[-1][0] in lost_poses:
+            pose, states = self._standing_changes.pop()
+            for cell, state in reversed(states):
+                y, x = self.grid.get_matrix_coords(cell)
+                self.map_state.restore_cell(y, x, state)
+                self._restored_cells[cell] = self.discovered_map[y][x]
+
+    def _take_restored_cells(self):
+        """ Return the cells put back by roll backs since the last call, with their values. """
+        restored_cells = self._restored_cells
+        self._restored_cells = {}
+        return restored_cells
+
+    def _calibrate_side(self):
+        _logger.debug('Calibrating Side')
+        self._execute('C')
+
+    def _calibrate_front(self):
+        surround_status = self.robot_surround_status()
+        _logger.debug('Status of cells surrounding robot: {}', surround_status)
+        CODE_MAP = {0: 'L', 1: 'M', 2: 'T'}
+        is_north_calibrate = False
+        for cell in [0,2,1]:
+            if surround_status[NORTH][cell] == 1:
+                _logger.debug('Calibrating Front {}', CODE_MAP[cell])
+                self._execute(CODE_MAP[cell])
+                is_north_calibrate = True
+                break
+        if not is_north_calibrate:
+            for cell in [0,2,1]:
+                if surround_status[SOUTH][cell] == 1:
+                    _logger.debug('Turn Backward to Calibrate Front')
+                    self._execute(get_arduino_cmd(BACKWARD))
+                    _logger.debug('Calibrating Side Front {}', CODE_MAP[cell])
+                    self._execute(CODE_MAP[cell])
+                    _logger.debug('Turn Backward after Calibrate Front')
+                    self._execute(get_arduino_cmd(BACKWARD))
+                    break
+
+        for cell in [0,2,1]:
+            if surround_status[WEST][cell] == 1:
+                _logger.debug('Turn Left to Calibrate Front')
+                self._execute(get_arduino_cmd(LEFT))
+                _logger.debug('Calibrating Side Front {}', CODE_MAP[cell])
+                self._execute(CODE_MAP[cell])
+                _logger.debug('Turn Right after Calibrate Front')
+                self._execute(get_arduino_cmd(RIGHT))
+                return True
+        for cell in [0,2,1]:
+            if surround_status[EAST][cell] == 1:
+                _logger.debug('Turn Right to Calibrate Front')
+                self._execute(get_arduino_cmd(RIGHT))
+                _logger.debug('Calibrating Side Front {}', CODE_MAP[cell])
+                self._execute(CODE_MAP[cell])
+                _logger.debug('Turn Left after Calibrate Front')
+                self._execute(get_arduino_cmd(LEFT))
+                return True
+        return False
+
+    def move_robot_algo(self, direction):
+        """
+        Turn the algo robot in a chosen direction or forward it
+
+        :param direction: The direction to turn (FORWARD, LEFT, RIGHT, BACKWARD)
+        :return: Nothing.
+        """
+        if direction == FORWARD:
+            if self.facing == NORTH:
+                self.center += self.grid.cols
+            elif self.facing == EAST:
+                self.center += 1
+            elif self.facing == SOUTH:
+                self.center -= self.grid.cols
+            elif self.facing == WEST:
+                self.center -= 1
+        else:
+            self.facing = (self.facing + direction) % 4
+
+    def check_free(self, direction):
+        """
+        Check if the adjacent cells in the chosen direction have obstacles.
+
+        The cells the robot is standing on are always free, so the robot can take the step if and only if its center
+        can stand on the next cell, which is a single lookup in the clearance map.
+
+        :param direction: The direction to check (FORWARD, LEFT, RIGHT, BACKWARD)
+        :return: true if the robot is able to take one step in that direction, false otherwise
+        """
+        y, x = self._get_step_coords(direction)
+
+        is_free = self.clearance_map.is_free(y, x)
+        _logger.debug('Checking Free towards {}: {}', MOVEMENTS[direction], is_free)
+        return is_free
+
+    def get_step_footprint(self, direction):
+        """
+        Return the cells the robot would stand on after one step in a direction.
+
+        check_free(direction) is true if and only if none of these cells is an obstacle.
+
+        :param direction: The direction of the step (FORWARD, LEFT, RIGHT, BACKWARD)
+        :return: The indexes of the 9 cells, or None if the robot would be outside the maze.
+        """
+        y, x = self._get_step_coords(direction)
+        if self.grid.is_at_border(y, x):
+            return None
+        return [self.grid.get_grid_index(y + dy, x + dx) for dy in [-1, 0, 1] for dx in [-1, 0, 1]]
+
+    def _get_step_coords(self, direction):
+        """ Return the (y, x) of the center of the robot after one step in a direction. """
+        true_bearing = (self.facing + direction) % 4
+        y, x = self.grid.get_matrix_coords(self.center)
+
+        if true_bearing == NORTH:
+            y += 1
+        elif true_bearing == EAST:
+            x += 1
+        elif true_bearing == SOUTH:
+            y -= 1
+        elif true_bearing == WEST:
+            x -= 1
+        return y, x
+
+    def get_sensed_cells(self):
+        """
+        Return the cells the next sensor reading can change, which are the cells within range of a sensor.
+
+        :return: The set of cell indexes.
+        """
+        rays = self._sensor_rays.get_rays(self.center, self.facing)
+        sensed_cells = set()
+        for ray, sensor in zip(rays, self.sensors):
+            sensed_cells.update(ray[:sensor["range"]])
+        return sensed_cells
+
+    def robot_surround_status(self):
+        _logger.debug('Getting cell status surrounding robot...')
+
+        y, x = self.grid.get_matrix_coords(self.center)
+        discovered_map = self.discovered_map
+        facing = self.facing
+
+        _logger.debug('Robot Position @ {}', (x, y, facing))
+        surround_status = {NORTH:[], EAST:[], SOUTH:[], WEST:[]}
+
+        for i in [x-1, x, x+1]:
+            if (y + 2) >= self.grid.rows:
+                surround_status[NORTH].append(1)
+            else:
+                surround_status[NORTH].append(discovered_map[y + 2][i])
+
+        for i in [y+1, y, y-1]:
+            if (x + 2) >= self.grid.cols:
+                surround_status[EAST].append(1)
+            else:
+                surround_status[EAST].append(discovered_map[i][x + 2])
+
+        for i in [x+1, x, x-1]:
+            if (y - 2) < 0:
+                surround_status[SOUTH].append(1)
+            else:
+                surround_status[SOUTH].append(discovered_map[y - 2][i])
+
+        for i in [y-1, y, y+1]:
+            if (x - 2) < 0:
+                surround_status[WEST].append(1)
+            else:
+                surround_status[WEST].append(discovered_map[i][x - 2])
+
+        return {(direction - facing) % 4: value for direction, value in surround_status.items()}
+
+
+    def is_calibrate_side_possible(self):
+        _logger.debug('Checking Whether Calibration Possible...')
+
+        y, x = self.grid.get_matrix_coords(self.center)
+        discovered_map = self.discovered_map
+        facing = self.facing
+        sensor_facing = (facing + WEST) % 4
+
+        _logger.debug('Robot Position @ {}', (x, y, facing))
+
+        cells_left = []
+        cells_right = []
+
+        if sensor_facing == WEST:
+            for distance in range(2, 4):
+                new_x = x - distance
+                if new_x < 0:
+                    cells_left.append(1)
+                    cells_right.append(1)
+                else:
+                    cells_left.append(discovered_map[y - 1][new_x])
+                    cells_right.append(discovered_map[y + 1][new_x])
+        elif sensor_facing == NORTH:
+            for distance in range(2, 4):
+                new_y = y + distance
+                if new_y >= self.grid.rows:
+                    cells_left.append(1)
+                    cells_right.append(1)
+                else:
+                    cells_left.append(discovered_map[new_y][x - 1])
+                    cells_right.append(discovered_map[new_y][x + 1])
+        elif sensor_facing == EAST:
+            for distance in range(2, 4):
+                new_x = x + distance
+                if new_x >= self.grid.cols:
+                    cells_left.append(1)
+                    cells_right.append(1)
+                else:
+                    cells_left.append(discovered_map[y + 1][new_x])
+                    cells_right.append(discovered_map[y - 1][new_x])
+        elif sensor_facing == SOUTH:
+            for distance in range(2, 4):
+                new_y = y - distance
+                if new_y < 0:
+                    cells_left.append(1)
+                    cells_right.append(1)
+                else:
+                    cells_left.append(discovered_map[new_y][x + 1])
+                    cells_right.append(discovered_map[new_y][x - 1])
+
+        _logger.debug('cells_left: {}', cells_left)
+        _logger.debug('cells_right: {}', cells_right)
+
+        if 1 in cells_left and 1 in cells_right:
+            if cells_left.index(1) == cells_right.index(1):
+                return True
+
+        return False
+
+    def is_arrow_possible(self):
+        """
+        # Camera put on the west of the robot to detect the left and middle image
+
+           # # #
+        I2 # # #
+        I1 # # #
+
+        Check if it is possible to have arrows in the chosen direction.
+
+        The method also takes into consideration obstacles that have already been scanned for arrows. Will only return
+        true if there are faces that have not been scanned that are facing the robot.
+
+        :return: True if there are unscanned faces of obstacles in the path of the RPi camera, false otherwise.
+        """
+        y, x = self.grid.get_matrix_coords(self.center)
+        discovered_map = self.discovered_map
+        arrow_taken_status = self.arrow_taken_status
+        camera_facing, camera_cells = self._get_camera_cells(y, x, self.facing)
+
+        flag = False
+        for i, j in camera_cells:
+            _logger.debug('Checking arrow @ {},{}', i, j)
+            if discovered_map[j][i] == 1 and not arrow_taken_status[j][i][camera_facing]:
+                flag = True
+        if flag:
+            for i, j in camera_cells:
+                self._mark_arrow_taken(j, i, camera_facing)
+        return flag
+
+    def _check_arrow(self):
+        """
+        Send the RPi a message to take a picture to check for arrows.
+
+        Check if there are potential unscanned arrows in the field of view of the RPi camera.
+
+        :return: N/A
+        """
+        y, x = self.grid.get_matrix_coords(self.center)
+
+        if self.is_arrow_possible():
+            _logger.debug('Arrow Possible @ Robot Position: {}', (x, y, DIRECTIONS[self.facing]))
+            position = '%s,%s,%s' % (y, x, self.facing)
+            result = self.sensor_source.get_arrows(self, self._get_camera_cells(y, x, self.facing)[1])
+            self._mark_arrows(position, result)
+        else:
+            _logger.debug('Arrow Not Possible @ Robot Position: {}', (x, y, DIRECTIONS[self.facing]))
+
+    def _request_sensor_readings(self):
+        """
+        Ask for the next sensor reading without waiting for it. It is collected by the next _get_sensor_readings.
+
+        :return: N/A
+        """
+        self.sensor_source.request_readings(self)
+
+    def _get_sensor_readings(self, is_arrow_scan = False):
+        """
+        Send a message to the Arduino to take sensor readings.
+
+        The sensors are iterated through and the number of times a cell is detected as an obstacle is added to its
+        running count. The total number of scans the cell has received is added to its running count of scans.
+
+        The counts are weighted by distance, with the weight halving for every unit further away from the robot that
+        the reading is taken.
+
+        :return: The updated cell values and indexes, and whether need to turn right to check the blind spot for long range
+        """
+        readings = self.sensor_source.get_readings(self)
+        parse_start = tracer.now()
+        readings = readings.split(',')
+        del readings[-1]
+
+        readings = [int(x) for x in readings]
+
+        rays = self._sensor_rays.get_rays(self.center, self.facing)
+        cells = self.map_state.cells
+        updated_cells = self._take_restored_cells()
+        is_blind_range_undetected_obstacle = False
+
+        for index, sensor in enumerate(self.sensors):
+            ray = rays[index]
+            reading = readings[index]
+            _logger.debug('Sensor {}', index)
+
+            # If reading is 0, means no obstacle in the covered range
+            if reading == 0 or reading > sensor['range']:
+                _logger.debug('No Obstacle in Covered Range')
+                for cell_index, weight in zip(ray, self._sensor_rays.free_weights[index]):
+                    updated_cell, value = self._mark_probability(cell_index, 0, weight)
+                    if updated_cell is not None:
+                        updated_cells[updated_cell] = value
+
+            # if reading in the read range, mark cells as 0 until the obstacle cell
+            elif sensor["blind_spot"] < reading <= sensor["range"]:
+                _logger.debug('Has Obstacle in Covered Range')
+                read_weights = self._sensor_rays.read_weights[index]
+
+                # If the robot is able to observe onstacle in covered range, there is no obstacle in the blind spot.
+                for cell_index, weight in zip(ray[:sensor["blind_spot"]], read_weights):
+                    updated_cell, value = self._mark_probability(cell_index, 0, weight)
+                    if updated_cell is not None:
+                        updated_cells[updated_cell] = value
+
+                # Check for cells in read range
+                for distance in range(sensor["blind_spot"], min(sensor["range"], len(ray))):
+                    cell_index = ray[distance]
+                    weight = read_weights[distance]
+                    updated_cell, value = self._mark_probability(cell_index, int(reading == distance + 1) * weight,
+                                                                 weight)
+                    if updated_cell is not None:
+                        updated_cells[updated_cell] = value
+
+                    # If the current cell is the one with obstacle, break the loop
+                    if cells[cell_index] == 1:
+                        break
+
+            elif index == 5 and 0 < reading <= sensor["blind_spot"]:
+                _logger.debug('Long Range Sensor: Obstacle observed in blind range')
+                blind_range_obstacle_status = [cells[cell_index] for cell_index in ray[:sensor["blind_spot"]]]
+                _logger.debug('blind_range_obstacle_status: {}', blind_range_obstacle_status)
+                if len(blind_range_obstacle_status) != 0:
+                    if 2 in blind_range_obstacle_status:
+                        if 1 not in blind_range_obstacle_status:
+                            is_blind_range_undetected_obstacle = True
+                        else:
+                            is_blind_range_undetected_obstacle = blind_range_obstacle_status.index(1) > blind_range_obstacle_status.index(2)
+            else:
+                _logger.debug('Unacceptable Reading')
+
+        tracer.add_span(PHASE_SENSOR_PARSE, parse_start, tracer.now())
+
+        _logger.debug('-' * 50)
+        _logger.debug('Total move counts: {}', self.move_counts)
+        if self.move_counts % self.calibration_side_steps == 0:
+            self.is_calibration_side_time = True
+            _logger.debug('Time to Calibrate')
+        if self.is_calibration_side_time and self.is_calibrate_side_possible():
+            self._calibrate_side()
+            self.is_calibration_side_time = False
+
+        if self.move_counts % CALIBRATION_FRONT_STEPS == 0:
+            self.is_calibration_front_time = True
+            _logger.debug('Time to Calibrate')
+        if self.is_calibration_front_time:
+            self.is_calibration_front_time = not self._calibrate_front()
+
+        if is_arrow_scan and not self.is_fast_path:
+            self._check_arrow()
+
+        return updated_cells, is_blind_range_undetected_obstacle
+
+    def _get_sensor_readings_blind_range(self):
+        """
+        Take sensor readings after turning to look at the blind spot of the long range sensor.
+
+        :return: The updated cell values and indexes.
+        """
+        readings = self.sensor_source.get_readings(self)
+        parse_start = tracer.now()
+        readings = readings.split(',')
+        del readings[-1]
+
+        readings = [int(x) for x in readings]
+
+        rays = self._sensor_rays.get_rays(self.center, self.facing)
+        cells = self.map_state.cells
+        updated_cells = self._take_restored_cells()
+
+        for index, sensor in enumerate(self.sensors):
+            ray = rays[index]
+            reading = readings[index]
+            _logger.debug('Sensor {}', index)
+
+            # If reading is 0, means no obstacle in the covered range
+            if reading == 0:
+                _logger.debug('No Obstacle in Covered Range')
+                for cell_index, weight in zip(ray, self._sensor_rays.free_weights[index]):
+                    updated_cell, value = self._mark_probability(cell_index, 0, weight)
+                    if updated_cell is not None:
+                        updated_cells[updated_cell] = value
+
+            # if reading in the read range, mark cells as 0 until the obstacle cell
+            elif sensor["blind_spot"] < reading <= sensor["range"]:
+                _logger.debug('Has Obstacle in Covered Range')
+                read_weights = self._sensor_rays.read_weights[index]
+
+                # If the robot is able to observe onstacle in covered range, there is no obstacle in the blind spot.
+                for cell_index, weight in zip(ray[:sensor["blind_spot"]], read_weights):
+                    updated_cell, value = self._mark_probability(cell_index, 0, weight)
+                    if updated_cell is not None:
+                        updated_cells[updated_cell] = value
+
+                # Check for cells in read range
+                for distance in range(sensor["blind_spot"], min(sensor["range"], len(ray))):
+                    cell_index = ray[distance]
+                    weight = read_weights[distance]
+                    updated_cell, value = self._mark_probability(cell_index, int(reading == distance + 1) * weight,
+                                                                 weight)
+                    if updated_cell is not None:
+                        updated_cells[updated_cell] = value
+
+                    # If the current cell is the one with obstacle, break the loop
+                    if cells[cell_index] == 1:
+                        break
+            else:
+                _logger.debug('Unacceptable Reading')
+
+            if index == 2 and reading not in [1, 2] and len(ray) > 2:
+                updated_cell, value = self._mark_probability(ray[2], 1, 1 * 2)
+                if updated_cell is not None:
+                    updated_cells[updated_cell] = value
+
+        tracer.add_span(PHASE_SENSOR_PARSE, parse_start, tracer.now())
+        return updated_cells
+
+    def get_explore_string(self):
+        """ Build and return the MDF string of the exploration status at the time of calling this function. """
+        return self.map_state.mdf.get_explore_string()
+
+    def get_map_string(self):
+        """ Build and return the MDF string of the robot's internal map at the time of calling this function. """
+        return self.map_state.mdf.get_map_string()
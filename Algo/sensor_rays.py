@@ -0,0 +1,107 @@
+from Utils.utils import *
+
+"""This module defines the table of the cells each sensor of the robot can see."""
+
+# Offset (y, x) of each mounting location from the robot center.
+MOUNT_OFFSETS = {
+    NWS: (1, -1), NS: (1, 0), NES: (1, 1),
+    WS: (0, -1), CS: (0, 0), ES: (0, 1),
+    SWS: (-1, -1), SS: (-1, 0), SES: (-1, 1)
+}
+
+# Offset (y, x) of one step towards each facing.
+FACING_OFFSETS = {NORTH: (1, 0), EAST: (0, 1), SOUTH: (-1, 0), WEST: (0, -1)}
+
+
+class SensorRayTable:
+    """
+    This class looks up the cells each sensor sees for every position and facing of the robot.
+
+    A ray is the tuple of indexes of the cells in front of a sensor, nearest first, up to the edge of the maze. The
+    rays of a position and facing are worked out the first time the robot is there and kept, so a sensor update
+    only walks the rays instead of working out the mounting, the origin and every cell again.
+
+    The weights of the readings only depend on the distance from the sensor, so they are kept per sensor.
+    """
+    def __init__(self, sensors, grid):
+        """
+        Initialize the table.
+
+        :param sensors: The sensors of the robot, as in Robot.sensors.
+        :param grid: The Grid of the maze.
+        """
+        self._grid = grid
+        self._sensors = [(sensor["mount_loc"], sensor["facing"]) for sensor in sensors]
+        self._rays = {}
+
+        # Weights used when a sensor sees no obstacle: halving with the distance, down to 1.
+        self.free_weights = []
+        # Weights used when a sensor sees an obstacle: 4 in the blind spot, then halving with the distance.
+        self.read_weights = []
+        for sensor in sensors:
+            free_weights = []
+            read_weights = []
+            free_weight = 4
+            read_weight = 4
+            for distance in range(sensor["range"]):
+                free_weights.append(free_weight)
+                free_weight = max(free_weight / 2, 1)
+
+                read_weights.append(read_weight)
+                if distance >= sensor["blind_spot"]:
+                    read_weight /= 2
+            self.free_weights.append(free_weights)
+            self.read_weights.append(read_weights)
+
+    def get_rays(self, center, facing):
+        """
+        Return the rays of every sensor.
+
+        :param center: The cell index of the robot center.
+        :param facing: The facing of the robot.
+        :return: A list with the ray of each sensor, in the order of the sensors.
+        """
+        key = center * 4 + facing
+        rays = self._rays.get(key)
+        if rays is None:
+            rays = [self._build_ray(center, facing, mount_loc, sensor_facing)
+                    for mount_loc, sensor_facing in self._sensors]
+            self._rays[key] = rays
+        return rays
+
+    def _build_ray(self, center, facing, mount_loc, sensor_facing):
+        """ Work out the cells a sensor sees from a position and facing of the robot. """
+        if mount_loc != CS:
+            mount_loc = (mount_loc + facing * 2) % 8
+        true_facing = (sensor_facing + facing) % 4
+
+        grid = self._grid
+        y, x = grid.get_matrix_coords(center)
+        dy, dx = MOUNT_OFFSETS[mount_loc]
+        y, x = y + dy, x + dx
+        dy, dx = FACING_OFFSETS[true_facing]
+
+        ray = []
+        while True:
+            y, x = y + dy, x + dx
+            if not grid.is_inside(y, x):
+                return tuple(ray)
+            ray.append(grid.get_grid_index(y, x))
+
+
+def get_sensor_ray_table(sensors, grid):
+    """
+    Return the ray table for a set of sensors, shared by all robots with the same sensors on the same grid.
+
+    :param sensors: The sensors of the robot, as in Robot.sensors.
+    :param grid: The Grid of the maze.
+    :return: The SensorRayTable.
+    """
+    key = (grid,) + tuple((sensor["mount_loc"], sensor["facing"], sensor["range"], sensor["blind_spot"])
+                          for sensor in sensors)
+    if key not in _tables:
+        _tables[key] = SensorRayTable(sensors, grid)
+    return _tables[key]
+
+
+_tables = {}
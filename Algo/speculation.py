@@ -0,0 +1,63 @@
+from itertools import product
+from Utils.utils import *
+
+"""This module defines the speculative planner that works out the next wall-following move before a reading lands."""
+
+
+class WallFollowSpeculation:
+    """
+    This class works out whether the robot can step left and forward for every outcome of a sensor reading that is
+    still being taken.
+
+    A step is possible if and only if no cell the robot would stand on is an obstacle. The reading can only change the
+    cells within range of a sensor, and never the cells the robot has walked over, so only those cells of the two
+    footprints are left open. Every combination of them being an obstacle or not is worked out while the Arduino takes
+    the reading, and once the reading is fused into the map the answer is looked up from the cells as they now are.
+    """
+    def __init__(self, robot):
+        """
+        Work out the answers for the current position and facing of the robot.
+
+        :param robot: The robot that has asked for a sensor reading.
+        """
+        self._center = robot.center
+        self._facing = robot.facing
+
+        map_state = robot.map_state
+        footprints = [robot.get_step_footprint(LEFT), robot.get_step_footprint(FORWARD)]
+
+        # The cells that decide the answers. The cells walked over are never obstacles, so they are left out.
+        key_cells = set()
+        grid = map_state.grid
+        for footprint in footprints:
+            if footprint is not None:
+                key_cells.update(cell for cell in footprint if not map_state.is_permanent(*grid.get_matrix_coords(cell)))
+        self._key_cells = sorted(key_cells)
+
+        sensed_cells = robot.get_sensed_cells()
+        open_positions = [position for position, cell in enumerate(self._key_cells) if cell in sensed_cells]
+        current = [map_state.cells[cell] == 1 for cell in self._key_cells]
+
+        self._answers = {}
+        for outcome in product([False, True], repeat=len(open_positions)):
+            is_obstacles = list(current)
+            for position, is_obstacle in zip(open_positions, outcome):
+                is_obstacles[position] = is_obstacle
+
+            obstacles = {cell for cell, is_obstacle in zip(self._key_cells, is_obstacles) if is_obstacle}
+            self._answers[tuple(is_obstacles)] = tuple(footprint is not None and obstacles.isdisjoint(footprint)
+                                                       for footprint in footprints)
+
+    def get_free(self, robot):
+        """
+        Look up whether the robot can step left and forward.
+
+        :param robot: The robot, after the reading has been fused into its map.
+        :return: (check_free(LEFT), check_free(FORWARD)), or None if the robot has moved or a cell outside the range of
+                 the reading has changed, in which case the answers have to be worked out again.
+        """
+        if robot.center != self._center or robot.facing != self._facing:
+            return None
+
+        cells = robot.map_state.cells
+        return self._answers.get(tuple(cells[cell] == 1 for cell in self._key_cells))
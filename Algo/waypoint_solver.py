@@ -0,0 +1,246 @@
+import weakref
+from heapq import heappush, heappop
+from Utils.utils import *
+
+"""This module defines the solver that answers fastest path queries through any way point on a fixed map."""
+
+# The turn needed to go from one facing to another, indexed by (new_facing - facing) % 4.
+TURNS = [FORWARD, RIGHT, BACKWARD, LEFT]
+
+# Cost of turning towards each direction before a straight run.
+TURN_COSTS = {FORWARD: 0, LEFT: TURNING_STEP, RIGHT: TURNING_STEP, BACKWARD: 2 * TURNING_STEP}
+
+
+class WaypointSolver:
+    """
+    This class finds the cheapest way from the start to the goal through any way point.
+
+    A state is a (cell, facing) pair. An edge is a single Arduino command: an optional turn (LEFT, RIGHT or BACKWARD)
+    followed by a straight run of 1 to max_run cells. A turn costs TURNING_STEP (twice that for BACKWARD) and every
+    cell of a run costs STRAIGHT_STEP, the same weights Robot.move_counts uses. Ties in cost are broken towards routes
+    with fewer commands.
+
+    Two cost fields are built once: the cost of getting from the start to every state, and the cost of getting from
+    every state to the goal. The cheapest route
+    through a way point is then the state at the way point with the smallest sum of both, and its moves are read off
+    the two fields in time proportional to the length of the route.
+    """
+    def __init__(self, grid, free, start, facing, goal, max_run=FAST_PATH_STEP):
+        """
+        Build the cost fields.
+
+        :param grid: The Grid of the map.
+        :param free: A sequence indexed by cell index (see Grid.get_grid_index) that is truthy where the robot center
+                     can stand, such as ClearanceMap.free.
+        :param start: The (y, x) the robot starts at.
+        :param facing: The facing of the robot at the start.
+        :param goal: The (y, x) the robot has to reach.
+        :param max_run: The maximum number of cells in one straight run.
+        """
+        self.grid = grid
+        self.start = start
+        self.facing = facing
+        self.goal = goal
+        self._free = free
+        self._max_run = max_run
+
+        size = (grid.size + 1) * 4
+        self._start_state = grid.get_grid_index(start[0], start[1]) * 4 + facing
+        self._from_start = [None] * size
+        self._before = [-1] * size
+        self._to_goal = [None] * size
+        self._after = [-1] * size
+        self._edges = [None] * size
+        self._edges_to_goal = [None] * size
+
+        if grid.is_at_border(start[0], start[1]) or grid.is_at_border(goal[0], goal[1]):
+            return
+
+        self._build_from_start()
+        self._build_to_goal()
+
+    def _build_from_start(self):
+        """ Find the cheapest cost from the start to every state. """
+        free = self._free
+        step_offsets = self.grid.step_offsets
+        costs = self._from_start
+        q = [((0, 0), self._start_state)]
+        costs[self._start_state] = (0, 0)
+        done = set()
+
+        while q:
+            cost, state = heappop(q)
+            if state in done:
+                continue
+            done.add(state)
+
+            cell, facing = state // 4, state % 4
+            for turn, turn_cost in TURN_COSTS.items():
+                new_facing = (facing + turn) % 4
+                offset = step_offsets[new_facing]
+                new_cell = cell
+                for run in range(1, self._max_run + 1):
+                    new_cell += offset
+                    if not free[new_cell]:
+                        break
+
+                    new_state = new_cell * 4 + new_facing
+                    new_cost = (cost[0] + turn_cost + run * STRAIGHT_STEP, cost[1] + 1)
+                    if costs[new_state] is not None and costs[new_state] <= new_cost:
+                        continue
+
+                    costs[new_state] = new_cost
+                    self._before[new_state] = state
+                    self._edges[new_state] = (turn, run)
+                    heappush(q, (new_cost, new_state))
+
+    def _build_to_goal(self):
+        """ Find the cheapest cost from every state to the goal, arriving with any facing. """
+        free = self._free
+        costs = self._to_goal
+        goal_cell = self.grid.get_grid_index(self.goal[0], self.goal[1])
+        if not free[goal_cell]:
+            return
+
+        q = []
+        for facing in range(4):
+            costs[goal_cell * 4 + facing] = (0, 0)
+            q.append(((0, 0), goal_cell * 4 + facing))
+        done = set()
+
+        while q:
+            cost, state = heappop(q)
+            if state in done:
+                continue
+            done.add(state)
+
+            # Walk back along the facing of the state to every cell a straight run could have started from.
+            cell, new_facing = state // 4, state % 4
+            offset = self.grid.step_offsets[new_facing]
+            before_cell = cell
+            for run in range(1, self._max_run + 1):
+                before_cell -= offset
+                if not free[before_cell]:
+                    break
+
+                for facing in range(4):
+                    turn = TURNS[(new_facing - facing) % 4]
+                    before_state = before_cell * 4 + facing
+                    new_cost = (cost[0] + TURN_COSTS[turn] + run * STRAIGHT_STEP, cost[1] + 1)
+                    if costs[before_state] is not None and costs[before_state] <= new_cost:
+                        continue
+
+                    costs[before_state] = new_cost
+                    self._after[before_state] = state
+                    self._edges_to_goal[before_state] = (turn, run)
+                    heappush(q, (new_cost, before_state))
+
+    def get_cost(self, way_point=None):
+        """
+        Return the cost of the cheapest route through a way point.
+
+        :param way_point: The (y, x) the robot has to go through, if any.
+        :return: The cost as a (steps, commands) tuple, or None if there is no route.
+        """
+        state = self._get_way_point_state(way_point)
+        if state is None:
+            return None
+        return self._add(self._from_start[state], self._to_goal[state])
+
+    def get_moves(self, way_point=None):
+        """
+        Return the moves of the cheapest route through a way point.
+
+        :param way_point: The (y, x) the robot has to go through, if any.
+        :return: The list of moves the robot needs to take, in the format used by Robot.move_robot, or an empty list
+                 if there is no route.
+        """
+        state = self._get_way_point_state(way_point)
+        if state is None:
+            return []
+
+        edges = []
+        before = state
+        while before != self._start_state:
+            edges.append(self._edges[before])
+            before = self._before[before]
+        edges.reverse()
+
+        after = state
+        while self._after[after] != -1:
+            edges.append(self._edges_to_goal[after])
+            after = self._after[after]
+
+        moves = []
+        for turn, run in edges:
+            moves.append(turn)
+            moves.extend([FORWARD] * (run - 1))
+        return moves
+
+    def rank_way_points(self):
+        """
+        Rank every cell by the cost of the cheapest route through it.
+
+        :return: A list of ((y, x), cost) for every cell there is a route through, cheapest first.
+        """
+        ranking = []
+        for y in range(1, self.grid.rows - 1):
+            for x in range(1, self.grid.cols - 1):
+                cost = self.get_cost((y, x))
+                if cost is not None:
+                    ranking.append(((y, x), cost))
+        ranking.sort(key=lambda item: item[1])
+        return ranking
+
+    def _get_way_point_state(self, way_point):
+        """ Return the cheapest state to go through at a way point, or None if there is no route through it. """
+        if way_point is None:
+            states = [self._start_state]
+        elif self.grid.is_at_border(way_point[0], way_point[1]):
+            return None
+        else:
+            cell = self.grid.get_grid_index(way_point[0], way_point[1])
+            states = range(cell * 4, cell * 4 + 4)
+
+        best_state = None
+        best_cost = None
+        for state in states:
+            cost = self._add(self._from_start[state], self._to_goal[state])
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best_state = state
+                best_cost = cost
+        return best_state
+
+    @staticmethod
+    def _add(first_cost, second_cost):
+        """ Add two costs, either of which may be None for no route. """
+        if first_cost is None or second_cost is None:
+            return None
+        return first_cost[0] + second_cost[0], first_cost[1] + second_cost[1]
+
+
+def get_way_point_solver(robot, start=None, goal=None):
+    """
+    Return the solver for the current map and facing of a robot.
+
+    The last solver of each robot is kept until the map or the facing of the robot, or the start or the goal, changes,
+    so a way point can be moved again and again without building the cost fields again. It is dropped with the robot.
+
+    :param robot: The robot currently in the maze.
+    :param start: The start position, at which the robot has its current facing. The center of the start zone if not
+                  given.
+    :param goal: The goal position. The center of the goal zone if not given.
+    :return: The WaypointSolver.
+    """
+    start = start or robot.grid.start_point
+    goal = goal or robot.grid.goal_point
+    key = (robot.map_version, robot.facing, start, goal)
+    cached = _solvers.get(robot)
+    if cached is None or cached[0] != key:
+        solver = WaypointSolver(robot.grid, robot.clearance_map.free, start, robot.facing, goal)
+        cached = _solvers[robot] = (key, solver)
+    return cached[1]
+
+
+# The (key, solver) of the last solver of each robot.
+_solvers = weakref.WeakKeyDictionary()
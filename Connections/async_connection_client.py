@@ -0,0 +1,228 @@
+import asyncio
+import socket
+from collections import deque
+from Utils.utils import *
+from Utils.tracer import tracer, message_args
+from Connections.connection_client import MessageTimeout
+from Connections.stream_decoder import StreamDecoder, ANDROID_CHANNEL, ARDUINO_CHANNEL, RPI_CHANNEL
+from Utils.logger import get_logger
+
+"""This module defines the Message Handler that handles network communications on an asyncio event loop."""
+
+_logger = get_logger(__name__)
+
+
+class Async_Message_Handler:
+    """
+    This is the Message_Handler that handles communications over the network on an asyncio event loop.
+
+    The receiver is a task on the loop, and wait_arduino and wait_rpi are coroutines, so nothing polls or needs a
+    thread of its own. Code that has to block, such as the robot while the exploration runs in an executor, talks to
+    the RPi through the handler's blocking attribute instead.
+    """
+    def __init__(self, android_receive_handler, loop=None, host=WIFI_HOST, port=RPI_PORT):
+        """
+        Initialize the handler. Call connect() on the loop to start it; messages sent before then are kept until
+        the connection is made.
+
+        :param android_receive_handler: The function called on the loop with every message from the Android.
+        :param loop: The event loop to run on, or None for the current one.
+        :param host: The address of the RPi.
+        :param port: The port of the RPi.
+        """
+        self._loop = loop or asyncio.get_event_loop()
+        self._host = host
+        self._port = port
+        self._android_receive_handler = android_receive_handler
+        self._reader = None
+        self._writer = None
+        self._recv_condition = None
+        self._arduino_recv_queue = deque()
+        self._rpi_recv_queue = deque()
+        self._is_connected = False
+        self._pending_writes = []
+        self.blocking = Blocking_Message_Handler(self)
+
+    async def connect(self):
+        """
+        Connect to the RPi and start receiving.
+
+        :return: The receiver task, which finishes when the RPi disconnects.
+        """
+        self._reader, self._writer = await asyncio.open_connection(self._host, self._port)
+        # Send each command at once instead of holding it back until the last one is acknowledged.
+        self._writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._recv_condition = asyncio.Condition()
+        self._is_connected = True
+
+        for data in self._pending_writes:
+            self._writer.write(data)
+        self._pending_writes = []
+        return self._loop.create_task(self._receiver_rpi())
+
+    async def _receiver_rpi(self):
+        """
+        Listen for messages from the RPi and store the messages into the queue of their channel.
+
+        :return: N/A
+        """
+        decoder = StreamDecoder()
+        queues = {RPI_CHANNEL: self._rpi_recv_queue, ARDUINO_CHANNEL: self._arduino_recv_queue}
+        try:
+            while True:
+                data = await self._reader.read(decoder.max_frame_length)
+                if not data:
+                    _logger.info('RPi disconnected')
+                    break
+
+                messages = decoder.feed(data)
+                _logger.debug('RECEIVED PRi: {}', messages)
+
+                is_received = False
+                for channel, message in messages:
+                    if tracer.is_enabled:
+                        tracer.instant('receive', channel or 'unknown', message_args(message))
+                    if channel == ANDROID_CHANNEL:
+                        _logger.debug('Pop Andoird Command: {}', message)
+                        self._android_receive_handler(message)
+                    elif channel in queues:
+                        queues[channel].append(message)
+                        is_received = True
+                    else:
+                        _logger.debug('Data from Unknown Devices: {}', message)
+
+                if is_received:
+                    async with self._recv_condition:
+                        self._recv_condition.notify_all()
+        except OSError as error:
+            _logger.error('RPi connection lost: {!r}', error)
+        finally:
+            # Wake up the waiting coroutines however the receiver stops, so none of them waits forever.
+            async with self._recv_condition:
+                self._is_connected = False
+                self._recv_condition.notify_all()
+
+    def send_android(self, msg):
+        """Send a message to the Android. Safe to call from any thread."""
+        self._send('AN%s\n' % msg)
+
+    def send_arduino(self, msg):
+        """Send a message to the Arduino. Safe to call from any thread."""
+        self._send('AR%s\n' % msg)
+
+    def send_rpi(self, msg):
+        """Send a message to the RPi. Safe to call from any thread."""
+        self._send('RP%s\n' % msg)
+
+    def _send(self, msg):
+        """Queue a message to be written by the loop, in the order the messages are sent."""
+        _logger.debug('SENDING {}', msg)
+        if tracer.is_enabled:
+            tracer.instant('send', msg[:2], message_args(msg[2:-1]))
+        self._loop.call_soon_threadsafe(self._write, msg.encode())
+
+    def _write(self, data):
+        """Write data to the RPi, or keep it until connected."""
+        if self._writer is None:
+            self._pending_writes.append(data)
+        else:
+            self._writer.write(data)
+
+    async def wait_arduino(self, msg_or_pattern, is_regex=False, timeout=None):
+        """
+        Wait for a message from the Arduino.
+
+        :param msg_or_pattern: message to wait for, or pattern for message to match.
+        :param is_regex: true if waiting for pattern, false if waiting for message.
+        :param timeout: The number of seconds to wait for before raising MessageTimeout, or None to wait forever.
+        :return: returns matched string if waiting for pattern, nothing otherwise.
+        """
+        _logger.debug("WAITING {} from Arduino", msg_or_pattern)
+        next_command = await self._wait(self._arduino_recv_queue, msg_or_pattern, is_regex, timeout)
+        _logger.debug('RECEIVED ARDUINO {}', next_command)
+        if is_regex:
+            return next_command
+
+    async def wait_rpi(self, msg_or_pattern, is_regex=False, timeout=None):
+        """
+        Wait for a message from the RPi.
+
+        :param msg_or_pattern: message to wait for, or pattern for message to match.
+        :param is_regex: true if waiting for pattern, false if waiting for message.
+        :param timeout: The number of seconds to wait for before raising MessageTimeout, or None to wait forever.
+        :return: returns matched string if waiting for pattern, nothing otherwise.
+        """
+        _logger.debug("WAITING {} from RPi", msg_or_pattern)
+        next_command = await self._wait(self._rpi_recv_queue, msg_or_pattern, is_regex, timeout)
+        _logger.debug('RECEIVED RPI {}', next_command)
+        if is_regex:
+            return next_command
+
+    async def _wait(self, queue, msg_or_pattern, is_regex, timeout):
+        """
+        Wait for a matching message on the queue of a channel, for at most timeout seconds if given.
+
+        Raises ConnectionError if connect() has not been called yet, as there is no connection to receive it on.
+        """
+        if self._recv_condition is None:
+            raise ConnectionError('Not connected to the RPi while waiting for {}, call connect() first'
+                                  .format(msg_or_pattern))
+
+        if timeout is None:
+            return await self._wait_forever(queue, msg_or_pattern, is_regex)
+
+        try:
+            return await asyncio.wait_for(self._wait_forever(queue, msg_or_pattern, is_regex), timeout)
+        except asyncio.TimeoutError:
+            raise MessageTimeout('Timed out waiting for {}'.format(msg_or_pattern))
+
+    async def _wait_forever(self, queue, msg_or_pattern, is_regex):
+        """
+        Sleep until a message that matches arrives on the queue of a channel.
+
+        Messages that do not match are dropped, as the thread client does.
+        """
+        async with self._recv_condition:
+            while True:
+                while queue:
+                    next_command = queue.popleft()
+                    if is_regex:
+                        if msg_or_pattern.fullmatch(next_command):
+                            return next_command
+                    elif next_command == msg_or_pattern:
+                        return next_command
+
+                if not self._is_connected:
+                    raise ConnectionError('RPi disconnected while waiting for {}'.format(msg_or_pattern))
+
+                await self._recv_condition.wait()
+
+
+class Blocking_Message_Handler:
+    """
+    This class lets code running outside the event loop use an Async_Message_Handler as if it were a Message_Handler.
+
+    The waits block the calling thread until the loop has received the message, so it must not be used from the loop
+    itself.
+    """
+    def __init__(self, handler):
+        self._handler = handler
+
+    def send_android(self, msg):
+        self._handler.send_android(msg)
+
+    def send_arduino(self, msg):
+        self._handler.send_arduino(msg)
+
+    def send_rpi(self, msg):
+        self._handler.send_rpi(msg)
+
+    def wait_arduino(self, msg_or_pattern, is_regex=False, timeout=None):
+        return self._run(self._handler.wait_arduino(msg_or_pattern, is_regex, timeout))
+
+    def wait_rpi(self, msg_or_pattern, is_regex=False, timeout=None):
+        return self._run(self._handler.wait_rpi(msg_or_pattern, is_regex, timeout))
+
+    def _run(self, coroutine):
+        """ Run a coroutine on the loop of the handler and wait for its result. """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._handler._loop).result()
@@ -1,23 +1,48 @@
 # Threading
 import socket
 import threading
+from collections import deque
+from time import time
 from Utils.utils import *
+from Utils.tracer import tracer, message_args
+from Connections.stream_decoder import StreamDecoder, ANDROID_CHANNEL, ARDUINO_CHANNEL, RPI_CHANNEL
+from Utils.logger import get_logger
 
 
 """This module defines the Message Handler class that handles network communications."""
 
+_logger = get_logger(__name__)
+
+
+class MessageTimeout(Exception):
+    """Raised when an awaited message does not arrive in time."""
+    pass
+
+
 class Message_Handler:
     """This is the Message_Handler that handles communications over the network."""
-    def __init__(self, android_receive_handler):
-        """Initialize the sender."""
+    def __init__(self, android_receive_handler, host=WIFI_HOST, port=RPI_PORT):
+        """
+        Initialize the sender and connect to the RPi.
+
+        :param android_receive_handler: The function called with every message from the Android.
+        :param host: The address of the RPi.
+        :param port: The port of the RPi.
+        """
         # Socket to listen for messages from RPi
         self._rpi_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self._rpi_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self._rpi_sock.connect((WIFI_HOST, RPI_PORT))
-
-        self._android_recv_queue = []
-        self._arduino_recv_queue = []
-        self._rpi_recv_queue = []
+        # Send each command at once instead of holding it back until the last one is acknowledged.
+        self._rpi_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rpi_sock.connect((host, port))
+
+        # Messages of each channel wait in their own queue. The receiver thread notifies the condition whenever it adds
+        # messages or the connection drops, so the waiting threads sleep instead of polling the queues.
+        self._android_recv_queue = deque()
+        self._arduino_recv_queue = deque()
+        self._rpi_recv_queue = deque()
+        self._recv_condition = threading.Condition()
+        self._is_connected = True
         self._android_receive_handler = android_receive_handler
 
         rpi_recv_thread = threading.Thread(target=self._receiver_rpi, args=(self._rpi_sock,))
@@ -26,50 +51,92 @@ class Message_Handler:
 
     def _receiver_rpi(self, sock):
         """
-        Listen for messages from the RPi and store the messages into a queue.
+        Listen for messages from the RPi and store the messages into the queue of their channel.
 
         :param sock: The socket to listen on.
         :return: N/A
         """
-        while True:
-            data = sock.recv(1024)
-            data = data.decode().strip()
-            print('RECEIVED PRi: {}'.format(data))
-            if not data:
-                enable_print()
-                print('RPi disconnected')
-                disable_print()
-                break
-
-            if data.startswith('RP'):
-                data = data.split('RP')
-                data[:] = [x for x in data if x != '']
-                print('Data from RPi: {}'.format(data))
-                self._rpi_recv_queue.extend(data)
-                print('rpi_recv_queue: {}'.format(self._rpi_recv_queue))
-
-            elif data.startswith('AN'):
-                data = data.split('AN')
-                data[:] = [x for x in data if x != '']
-                print('Data from Android: {}'.format(data))
-                self._android_recv_queue.extend(data)
-                print('android_recv_queue: {}'.format(self._android_recv_queue))
-
-            elif data.startswith('AR'):
-                data = data.split('AR')
-                data[:] = [x for x in data if x != '']
-                print('Data from Arduino: {}'.format(data))
-                self._arduino_recv_queue.extend(data)
-                print('arduino_recv_queue: {}'.format(self._arduino_recv_queue))
-
-            else:
-                print('Data from Unknown Devices: {}'.format(data))
-
-            if self._android_recv_queue:
-                next_command = self._android_recv_queue.pop(0)
-                print('Pop Andoird Command: {}'.format(next_command))
-                print('arduino_recv_queue: {}'.format(self._arduino_recv_queue))
-                self._android_receive_handler(next_command)
+        decoder = StreamDecoder()
+        queues = {RPI_CHANNEL: self._rpi_recv_queue, ARDUINO_CHANNEL: self._arduino_recv_queue}
+        try:
+            while True:
+                size = sock.recv_into(decoder.recv_view)
+                if not size:
+                    _logger.info('RPi disconnected')
+                    break
+
+                messages = decoder.feed(decoder.recv_view[:size])
+                _logger.debug('RECEIVED PRi: {}', messages)
+
+                received = {RPI_CHANNEL: [], ARDUINO_CHANNEL: []}
+                for channel, message in messages:
+                    if tracer.is_enabled:
+                        tracer.instant('receive', channel or 'unknown', message_args(message))
+                    if channel == ANDROID_CHANNEL:
+                        _logger.debug('Data from Android: {}', message)
+                        self._android_recv_queue.append(message)
+                    elif channel in received:
+                        received[channel].append(message)
+                    else:
+                        _logger.debug('Data from Unknown Devices: {}', message)
+
+                for channel, channel_messages in received.items():
+                    if channel_messages:
+                        _logger.debug('Data from {}: {}', channel, channel_messages)
+                        self._put(queues[channel], channel_messages)
+
+                while self._android_recv_queue:
+                    next_command = self._android_recv_queue.popleft()
+                    _logger.debug('Pop Andoird Command: {}', next_command)
+                    self._android_receive_handler(next_command)
+        except OSError as error:
+            _logger.error('RPi connection lost: {!r}', error)
+        finally:
+            # Wake up the waiting threads however the receiver stops, so none of them waits forever.
+            with self._recv_condition:
+                self._is_connected = False
+                self._recv_condition.notify_all()
+
+    def _put(self, queue, messages):
+        """Add messages to the queue of a channel and wake up the threads waiting for them."""
+        with self._recv_condition:
+            queue.extend(messages)
+            _logger.debug('recv_queue: {}', list(queue))
+            self._recv_condition.notify_all()
+
+    def _wait(self, queue, msg_or_pattern, is_regex, timeout):
+        """
+        Sleep until a message that matches arrives on the queue of a channel.
+
+        Messages that do not match are dropped, as they were when the queues were polled.
+
+        :param queue: The queue of the channel.
+        :param msg_or_pattern: message to wait for, or pattern for message to match.
+        :param is_regex: true if waiting for pattern, false if waiting for message.
+        :param timeout: The number of seconds to wait for before giving up, or None to wait for as long as it takes.
+        :return: The matched message.
+        """
+        deadline = None if timeout is None else time() + timeout
+        with self._recv_condition:
+            while True:
+                while queue:
+                    next_command = queue.popleft()
+                    if is_regex:
+                        if msg_or_pattern.fullmatch(next_command):
+                            return next_command
+                    elif next_command == msg_or_pattern:
+                        return next_command
+
+                if not self._is_connected:
+                    raise ConnectionError('RPi disconnected while waiting for {}'.format(msg_or_pattern))
+
+                if deadline is None:
+                    self._recv_condition.wait()
+                else:
+                    remaining = deadline - time()
+                    if remaining <= 0:
+                        raise MessageTimeout('Timed out waiting for {}'.format(msg_or_pattern))
+                    self._recv_condition.wait(remaining)
 
     def send_android(self, msg):
         """Send a message to the Android."""
@@ -86,52 +153,39 @@ class Message_Handler:
         to_send = 'RP%s\n' % msg
         _send(self._rpi_sock, to_send)
 
-    def wait_arduino(self, msg_or_pattern, is_regex=False):
+    def wait_arduino(self, msg_or_pattern, is_regex=False, timeout=None):
         """
         Wait for a message from the Arduino.
 
         :param msg_or_pattern: message to wait for, or pattern for message to match.
         :param is_regex: true if waiting for pattern, false if waiting for message.
+        :param timeout: The number of seconds to wait for before raising MessageTimeout, or None to wait forever.
         :return: returns matched string if waiting for pattern, nothing otherwise.
         """
-        print("WAITING {} from Arduino".format(msg_or_pattern))
-        while True:
-            if self._arduino_recv_queue:
-                next_command = self._arduino_recv_queue.pop(0)
-
-                if not is_regex:
-                    if next_command == msg_or_pattern:
-                        print("RECEIVED ARDUINO", next_command)
-                        break
-                else:
-                    match = msg_or_pattern.fullmatch(next_command)
-                    if match:
-                        print("RECEIVED ARDUINO", next_command)
-                        return next_command
+        _logger.debug("WAITING {} from Arduino", msg_or_pattern)
+        next_command = self._wait(self._arduino_recv_queue, msg_or_pattern, is_regex, timeout)
+        _logger.debug('RECEIVED ARDUINO {}', next_command)
+        if is_regex:
+            return next_command
 
-    def wait_rpi(self, msg_or_pattern, is_regex=False):
+    def wait_rpi(self, msg_or_pattern, is_regex=False, timeout=None):
         """
         Wait for a message from the RPi.
 
-        :param msg: The message to wait for.
-        :return: N/A
+        :param msg_or_pattern: message to wait for, or pattern for message to match.
+        :param is_regex: true if waiting for pattern, false if waiting for message.
+        :param timeout: The number of seconds to wait for before raising MessageTimeout, or None to wait forever.
+        :return: returns matched string if waiting for pattern, nothing otherwise.
         """
-        print("WAITING {} from RPi".format(msg_or_pattern))
-        while True:
-            if self._rpi_recv_queue:
-                next_command = self._rpi_recv_queue.pop(0)
-
-                if not is_regex:
-                    if next_command == msg:
-                        print("WAITED RPI", next_command)
-                        break
-                else:
-                    match = msg_or_pattern.fullmatch(next_command)
-                    if match:
-                        print("RECEIVED RPI", next_command)
-                        return next_command
+        _logger.debug("WAITING {} from RPi", msg_or_pattern)
+        next_command = self._wait(self._rpi_recv_queue, msg_or_pattern, is_regex, timeout)
+        _logger.debug('RECEIVED RPI {}', next_command)
+        if is_regex:
+            return next_command
 
 def _send(sock, msg):
     """Send a message on a socket."""
-    print("SENDING", msg)
+    _logger.debug('SENDING {}', msg)
+    if tracer.is_enabled:
+        tracer.instant('send', msg[:2], message_args(msg[2:-1]))
     sock.sendall(msg.encode())
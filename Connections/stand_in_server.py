@@ -0,0 +1,261 @@
+import heapq
+import random
+import socket
+import threading
+from time import time, sleep
+
+from Utils.utils import *
+from Algo.sim_robot import Robot
+from Utils.grid import ARENA_GRID
+from Connections.stream_decoder import StreamDecoder, ANDROID_CHANNEL, ARDUINO_CHANNEL, RPI_CHANNEL
+from Utils.logger import get_logger
+
+"""This module defines the stand-in server that emulates the RPi, the Arduino and the Android on the network."""
+
+_logger = get_logger(__name__)
+
+# Commands the Arduino carries out and acknowledges: moves, turns and calibrations. A digit is that many steps forward.
+ARDUINO_COMMANDS = 'WADSCLMT23456'
+
+# Seconds between the pieces of a fragmented write, so each piece reaches the client in a read of its own.
+FRAGMENT_GAP = 0.001
+
+
+class StandInServer:
+    """
+    This class stands in for the RPi multiplexer, so a controller can be run end to end without the hardware.
+
+    It keeps a simulated robot on a real map in step with the commands sent to the Arduino. Sensor requests are answered
+    with the readings of the simulated robot, photo requests with the arrows in the view of its camera, and every other
+    Arduino command with an acknowledgement. The Arduino carries out one command at a time, so each reply is due once the
+    commands before it are done and its own latency, plus a random jitter, has passed. Photos are taken by the RPi,
+    which works alongside the Arduino.
+
+    Replies can be fragmented into several writes, or the replies due close together coalesced into one, to test how
+    the client frames the stream. Android messages can be scripted to be sent at set times after the client connects.
+    """
+    def __init__(self, real_map, host=WIFI_HOST, port=RPI_PORT, move_latency=0.0, sensor_latency=0.0,
+                 photo_latency=0.0, jitter=0.0, fragment=0, coalesce=0.0, script=(), idle_timeout=None, seed=None):
+        """
+        Initialize the server.
+
+        :param real_map: The map of the arena, as loaded by load_arena.
+        :param host: The address to listen on.
+        :param port: The port to listen on.
+        :param move_latency: The seconds the Arduino takes to carry out a move, turn or calibration.
+        :param sensor_latency: The seconds the Arduino takes to take a sensor reading.
+        :param photo_latency: The seconds the RPi takes to take a photo.
+        :param jitter: The most seconds randomly added to every latency.
+        :param fragment: The largest number of bytes per write, with each reply split at random points, or 0 to write
+                         each reply whole.
+        :param coalesce: The seconds to hold a reply back so it is written together with the replies due after it, or
+                         0 to write each reply when it is due.
+        :param script: The (seconds after connecting, message) of every message to send from the Android.
+        :param idle_timeout: The seconds without any message from the client after which to disconnect it, or None to
+                             wait until the client disconnects.
+        :param seed: The seed of the random jitter and fragmentation, or None for a different run every time.
+        """
+        self.host = host
+        self.port = port
+        self.move_latency = move_latency
+        self.sensor_latency = sensor_latency
+        self.photo_latency = photo_latency
+        self.jitter = jitter
+        self.fragment = fragment
+        self.coalesce = coalesce
+        self.script = sorted(script)
+        self.idle_timeout = idle_timeout
+
+        self.robot = Robot(exploration_status=[[0] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)],
+                           facing=NORTH,
+                           discovered_map=[[2] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)],
+                           real_map=real_map)
+        self.stats = {'arduino': {}, 'readings': 0, 'photos': 0, 'android': 0, 'unknown': 0,
+                      'bytes_received': 0, 'bytes_sent': 0, 'writes': 0, 'connected_at': None, 'last_message_at': None}
+        self.android_messages = []
+
+        self._random = random.Random(seed)
+        self._server_sock = None
+        self._conn = None
+        self._thread = None
+        self._replies = []
+        self._reply_count = 0
+        self._reply_condition = threading.Condition()
+        self._is_closed = False
+        self._arduino_free_at = 0.0
+
+    def start(self):
+        """
+        Listen on the address and serve the first client to connect in a thread of its own.
+
+        :return: N/A
+        """
+        self._server_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server_sock.bind((self.host, self.port))
+        # Port 0 picks a free port, which the client has to be told.
+        self.port = self._server_sock.getsockname()[1]
+        self._server_sock.listen(1)
+
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def join(self, timeout=None):
+        """
+        Wait until the client has disconnected or has been disconnected.
+
+        :param timeout: The most seconds to wait, or None to wait forever.
+        :return: True if the client is done, false if the wait timed out.
+        """
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def run(self):
+        """
+        Serve the first client to connect until it is done.
+
+        :return: The stats of the run.
+        """
+        self.start()
+        self.join()
+        return self.stats
+
+    def _serve(self):
+        """ Accept a client and handle its messages until it disconnects or stays idle for too long. """
+        conn, addr = self._server_sock.accept()
+        self._server_sock.close()
+        _logger.info('Connected by {}', addr)
+
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn.settimeout(self.idle_timeout)
+        self._conn = conn
+
+        writer = threading.Thread(target=self._writer)
+        writer.daemon = True
+        writer.start()
+
+        self.stats['connected_at'] = time()
+        for delay, message in self.script:
+            self._reply(self.stats['connected_at'] + delay, 'AN%s\n' % message)
+
+        decoder = StreamDecoder()
+        try:
+            while True:
+                size = conn.recv_into(decoder.recv_view)
+                if not size:
+                    break
+                self.stats['bytes_received'] += size
+                self.stats['last_message_at'] = time()
+                for channel, message in decoder.feed(decoder.recv_view[:size]):
+                    self._handle(channel, message)
+        except socket.timeout:
+            _logger.info('Client idle for {}s: disconnecting', self.idle_timeout)
+        except OSError:
+            pass
+
+        with self._reply_condition:
+            self._is_closed = True
+            self._reply_condition.notify_all()
+        writer.join()
+        conn.close()
+
+    def _handle(self, channel, message):
+        """ Carry out a message from the client and queue its reply. """
+        now = time()
+        if channel == ARDUINO_CHANNEL:
+            if message == ARDUINO_SENSOR:
+                self.stats['readings'] += 1
+                due = self._run_arduino(now, self.sensor_latency)
+                self._reply(due, 'AR%s\n' % self.robot.sensor_source.get_readings(self.robot))
+            elif all(command in ARDUINO_COMMANDS for command in message):
+                due = now
+                for command in message:
+                    self._count_arduino(command)
+                    self._move(command)
+                    due = self._run_arduino(now, self.move_latency)
+                self._reply(due, 'AR%s\n' % ARDUIMO_MOVED)
+            else:
+                self.stats['unknown'] += 1
+        elif channel == RPI_CHANNEL and message == API_TAKEN_PHOTO:
+            self.stats['photos'] += 1
+            y, x = self.robot.grid.get_matrix_coords(self.robot.center)
+            camera_cells = self.robot._get_camera_cells(y, x, self.robot.facing)[1]
+            arrows = self.robot.sensor_source.get_arrows(self.robot, camera_cells) if camera_cells else '00'
+            self._reply(now + self.photo_latency + self._get_jitter(), 'RP%s\n' % arrows)
+        elif channel == ANDROID_CHANNEL:
+            self.stats['android'] += 1
+            self.android_messages.append(message)
+        else:
+            self.stats['unknown'] += 1
+
+    def _count_arduino(self, command):
+        counts = self.stats['arduino']
+        counts[command] = counts.get(command, 0) + 1
+
+    def _move(self, command):
+        """ Move the simulated robot as the Arduino would for a command. Calibrations leave it where it is. """
+        if command in ARDUINO_FORWARD + ARDUINO_TURN_LEFT + ARDUINO_TURN_RIGHT + ARDUINO_TURN_TO_BACKWARD:
+            self.robot.move_robot_algo(convert_arduino_cmd_to_direction(command))
+        elif command.isdigit():
+            for _ in range(int(command)):
+                self.robot.move_robot_algo(FORWARD)
+
+    def _run_arduino(self, now, latency):
+        """ Return when the Arduino is done with a command that arrives now, after the commands before it. """
+        self._arduino_free_at = max(now, self._arduino_free_at) + latency + self._get_jitter()
+        return self._arduino_free_at
+
+    def _get_jitter(self):
+        return self._random.uniform(0, self.jitter) if self.jitter else 0.0
+
+    def _reply(self, due, text):
+        """ Queue a reply to be written once it is due. """
+        with self._reply_condition:
+            heapq.heappush(self._replies, (due, self._reply_count, text.encode()))
+            self._reply_count += 1
+            self._reply_condition.notify()
+
+    def _writer(self):
+        """ Write the replies to the client in the order they are due. """
+        while True:
+            with self._reply_condition:
+                while not self._replies and not self._is_closed:
+                    self._reply_condition.wait()
+                if self._is_closed:
+                    return
+
+                due = self._replies[0][0] + self.coalesce
+                delay = due - time()
+                if delay > 0:
+                    # Wake up early if a reply that is due sooner is queued.
+                    self._reply_condition.wait(delay)
+                    continue
+
+                data = b''
+                while self._replies and self._replies[0][0] <= due:
+                    data += heapq.heappop(self._replies)[2]
+
+            try:
+                self._write(data)
+            except OSError:
+                return
+
+    def _write(self, data):
+        """ Write data to the client, split into fragments of random sizes if asked to. """
+        if not self.fragment:
+            self._send(data)
+            return
+
+        start = 0
+        while start < len(data):
+            end = start + self._random.randint(1, self.fragment)
+            self._send(data[start:end])
+            start = end
+            if start < len(data):
+                sleep(FRAGMENT_GAP)
+
+    def _send(self, data):
+        self._conn.sendall(data)
+        self.stats['bytes_sent'] += len(data)
+        self.stats['writes'] += 1
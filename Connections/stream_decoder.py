@@ -0,0 +1,86 @@
+from Utils.utils import *
+from Utils.logger import get_logger
+
+"""This module defines the decoder that splits the byte stream from the RPi into messages."""
+
+_logger = get_logger(__name__)
+
+# The prefixes of the channels the RPi forwards messages from.
+ANDROID_CHANNEL = 'AN'
+ARDUINO_CHANNEL = 'AR'
+RPI_CHANNEL = 'RP'
+CHANNELS = [ANDROID_CHANNEL, ARDUINO_CHANNEL, RPI_CHANNEL]
+
+
+class StreamDecoder:
+    """
+    This class splits the byte stream from the RPi into newline terminated frames and routes each to its channel.
+
+    A read from the socket may hold part of a frame, or several frames, so the bytes are kept in a buffer until their
+    newline arrives. The decoder does no I/O itself: the thread client reads into recv_buffer and feeds the bytes
+    read, and an asyncio client can feed whatever its StreamReader returns.
+    """
+    def __init__(self, max_frame_length=4096):
+        """
+        Initialize the decoder.
+
+        :param max_frame_length: The longest frame accepted. Longer frames are dropped, so a peer that never sends a
+                                 newline cannot grow the buffer forever.
+        """
+        self.max_frame_length = max_frame_length
+        self.recv_buffer = bytearray(max_frame_length)
+        self.recv_view = memoryview(self.recv_buffer)
+        self._buffer = bytearray()
+        self._scan_start = 0
+        self._is_dropping = False
+
+    def feed(self, data):
+        """
+        Add bytes read from the stream and return the messages they complete.
+
+        :param data: The bytes read, as bytes, bytearray or memoryview.
+        :return: A list of (channel, message) for each complete frame, in order. The channel is one of CHANNELS, or
+                 None if the frame does not start with a known prefix, in which case the message is the whole frame.
+        """
+        buffer = self._buffer
+        buffer += data
+
+        messages = []
+        start = 0
+        end = buffer.find(b'\n', self._scan_start)
+        while end != -1:
+            if self._is_dropping:
+                # The end of a frame that was too long: skip it.
+                self._is_dropping = False
+            else:
+                message = self._decode(buffer[start:end])
+                if message is not None:
+                    messages.append(message)
+            start = end + 1
+            end = buffer.find(b'\n', start)
+
+        del buffer[:start]
+        self._scan_start = len(buffer)
+
+        if len(buffer) > self.max_frame_length:
+            if not self._is_dropping:
+                _logger.warning('Dropping frame longer than {} bytes', self.max_frame_length)
+            del buffer[:]
+            self._scan_start = 0
+            self._is_dropping = True
+
+        return messages
+
+    @staticmethod
+    def _decode(frame):
+        """ Turn a frame into a (channel, message), or None if it is blank or has an empty message. """
+        text = frame.decode('utf-8', 'replace').strip()
+        if not text:
+            return None
+
+        channel = text[:2]
+        if channel not in CHANNELS:
+            return None, text
+        if len(text) == 2:
+            return None
+        return channel, text[2:]
@@ -0,0 +1,172 @@
+import threading
+from time import perf_counter
+
+from Utils.utils import *
+from Utils.logger import get_logger
+
+"""This module defines the updater that keeps the Android up to date with the map and the position of the robot."""
+
+_logger = get_logger(__name__)
+
+
+def get_keyframe(robot):
+    """
+    Build the full update of a robot: both MDF strings, its position and every arrow found.
+
+    :param robot: The robot.
+    :return: The message to send to the Android.
+    """
+    msgs = []
+    msgs.append('"exploreMap":"%s"'%robot.get_explore_string())
+    msgs.append('"obstacleMap":"%s"'%robot.get_map_string())
+    msgs.append(_get_robot_position(robot.grid, robot.center, robot.facing))
+    msgs.append(_get_arrow_position(robot))
+    return '{' + ','.join(msgs) + '}'
+
+
+def _get_robot_position(grid, center, facing):
+    y, x = grid.get_matrix_coords(center)
+    return '"robotPosition":"%s,%s,%s"' % (str(x), str(grid.flip_row(y)), str(facing))
+
+
+def _get_arrow_position(robot):
+    return '"arrowPosition":"{}"'.format(';'.join(robot.arrows_arduino))
+
+
+class AndroidUpdater:
+    """
+    This class sends the Android what changed since the last update, instead of both MDF strings every time.
+
+    The first update of a robot is a keyframe, the same full message the Android has always been sent. The updates
+    after it are deltas, which only have the keys that changed:
+
+        "cells": the cells that changed, as x,y,state separated by ';', with the state as given by
+                 MapState.get_cell_states, and x and y in the same coordinates as robotPosition
+        "robotPosition": the new position and facing of the robot
+        "arrowPosition": every arrow found, once a new one is found
+
+    Nothing is sent if nothing changed. Every ANDROID_KEYFRAME_EVERY deltas a keyframe is sent again, so an Android
+    that joins late or misses a delta catches up.
+
+    Updates are sent at most once every ANDROID_UPDATE_INTERVAL_SEC. An update asked for sooner is held back and
+    merged with any that follow it, and sent once the interval is over, so the Android always ends up with the latest
+    state. Safe to use from several threads.
+    """
+    def __init__(self, send, schedule, interval=ANDROID_UPDATE_INTERVAL_SEC, keyframe_every=ANDROID_KEYFRAME_EVERY):
+        """
+        Initialize the updater.
+
+        :param send: The function that sends a message to the Android.
+        :param schedule: The function that calls a function, given as its second argument, after the seconds given as
+                         its first, from any thread.
+        :param interval: The shortest time in seconds between two updates.
+        :param keyframe_every: The number of deltas between two keyframes.
+        """
+        self._send = send
+        self._schedule = schedule
+        self._interval = interval
+        self._keyframe_every = keyframe_every
+        self._lock = threading.Lock()
+
+        self._robot = None
+        self._is_keyframe_asked = False
+        self._is_flush_scheduled = False
+        self._sent_at = None
+
+        # What the Android was last sent.
+        self._sent_robot = None
+        self._sent_states = None
+        self._sent_version = None
+        self._sent_explored_count = None
+        self._sent_pose = None
+        self._sent_arrow_count = None
+        self._deltas_since_keyframe = 0
+
+        self.stats = {'keyframes': 0, 'deltas': 0, 'merged': 0, 'bytes': 0}
+
+    def update(self, robot, is_keyframe=False):
+        """
+        Send the Android the latest state of a robot, now or once the interval since the last update is over.
+
+        :param robot: The robot.
+        :param is_keyframe: True to send a keyframe even if a delta would do.
+        :return: N/A
+        """
+        with self._lock:
+            self._robot = robot
+            self._is_keyframe_asked = self._is_keyframe_asked or is_keyframe
+            if self._is_flush_scheduled:
+                self.stats['merged'] += 1
+                return
+
+            if self._sent_at is not None:
+                wait = self._sent_at + self._interval - perf_counter()
+                if wait > 0:
+                    self._is_flush_scheduled = True
+                    self.stats['merged'] += 1
+                    self._schedule(wait, self._flush)
+                    return
+
+            self._send_update()
+
+    def _flush(self):
+        """ Send the update held back. """
+        with self._lock:
+            self._is_flush_scheduled = False
+            self._send_update()
+
+    def _send_update(self):
+        """ Send a keyframe or a delta of the latest state. Must be called with the lock held. """
+        robot = self._robot
+        map_state = robot.map_state
+        # Read before the cell states, as the map may be written to while they are read. A cell written in between is
+        # then sent again with the next update rather than taken as sent.
+        version = map_state.version
+        explored_count = map_state.explored_count
+        pose = (robot.center, robot.facing)
+        arrow_count = len(robot.arrows_arduino)
+
+        is_keyframe = (self._is_keyframe_asked or robot is not self._sent_robot
+                       or self._deltas_since_keyframe >= self._keyframe_every)
+        states = self._sent_states
+        if is_keyframe:
+            states = map_state.get_cell_states()
+            msg = get_keyframe(robot)
+        else:
+            msgs = []
+            # The cells can only have changed if the map was written to or a cell was explored since the last update.
+            if version != self._sent_version or explored_count != self._sent_explored_count:
+                states = map_state.get_cell_states()
+                changed = [index for index, (state, sent_state) in enumerate(zip(states, self._sent_states))
+                           if state != sent_state]
+                if changed:
+                    grid = robot.grid
+                    msgs.append('"cells":"{}"'.format(';'.join(
+                        '{},{},{}'.format(index % grid.cols, grid.flip_row(index // grid.cols), states[index])
+                        for index in changed)))
+            if pose != self._sent_pose:
+                msgs.append(_get_robot_position(robot.grid, *pose))
+            if arrow_count != self._sent_arrow_count:
+                msgs.append(_get_arrow_position(robot))
+            if not msgs:
+                return
+            msg = '{' + ','.join(msgs) + '}'
+
+        self._send(msg)
+
+        self._sent_at = perf_counter()
+        self._sent_robot = robot
+        self._sent_states = states
+        self._sent_version = version
+        self._sent_explored_count = explored_count
+        self._sent_pose = pose
+        self._sent_arrow_count = arrow_count
+        self.stats['bytes'] += len(msg)
+        if is_keyframe:
+            self._is_keyframe_asked = False
+            self._deltas_since_keyframe = 0
+            self.stats['keyframes'] += 1
+        else:
+            self._deltas_since_keyframe += 1
+            self.stats['deltas'] += 1
+        _logger.debug('Sent {} of {} bytes', 'keyframe' if is_keyframe else 'delta', len(msg))
@@ -0,0 +1,158 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+
+from Utils.utils import *
+from Algo.exploration import Exploration
+from Controllers.controller import Controller
+from Connections.async_connection_client import Async_Message_Handler
+from Utils.logger import get_logger
+
+"""This module defines the controller that runs a physical run on an asyncio event loop."""
+
+_logger = get_logger(__name__)
+
+
+class AsyncController(Controller):
+    """
+    This class is the controller that relays messages to the Android, with every command running on one event loop.
+
+    Commands from the Android become tasks on the loop instead of threads. The robot still blocks while it waits for
+    the Arduino, so its moves are run one at a time in a single worker thread, and the exploration generator is
+    stepped from a coroutine that sends the Android updates from the loop in between.
+    """
+    def __init__(self, loop=None, host=WIFI_HOST, port=RPI_PORT):
+        """
+        Initialize the AsyncController class.
+
+        :param loop: The event loop to run on, or None for the current one.
+        :param host: The address of the RPi.
+        :param port: The port of the RPi.
+        """
+        self._loop = loop or asyncio.get_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        super().__init__(host, port)
+        self._robot_sender = self._sender.blocking
+
+    async def run(self):
+        """
+        Connect to the RPi and handle its messages until it disconnects.
+
+        :return: N/A
+        """
+        receiver = await self._sender.connect()
+        await receiver
+
+    def _connect(self):
+        return Async_Message_Handler(self._receive_handler, self._loop, self._host, self._port)
+
+    def _schedule(self, delay, callback):
+        """ Call a function on the loop after a delay in seconds. Safe to call from the worker thread. """
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, callback)
+
+    def _start(self, target, msg):
+        """
+        Run a command as a task on the loop so the receiver can carry on.
+
+        :param target: The coroutine method that carries out the command.
+        :param msg: The message to print once the command is started.
+        :return: N/A
+        """
+        self._loop.create_task(target())
+        _logger.info(msg)
+
+    def _run_blocking(self, func, *args):
+        """ Run a function that blocks on the robot in the worker thread, and return an awaitable of its result. """
+        return self._loop.run_in_executor(self._executor, func, *args)
+
+    async def _calibrate(self):
+        """
+        Calibrate the robot.
+
+        :return: N/A
+        """
+        for move in ['C', 'S', 'L', 'D', 'C', 'L', 'D', 'C']:
+            self._sender.send_arduino(move)
+            await self._sender.wait_arduino(ARDUIMO_MOVED)
+
+        _logger.info('Calibrating Done!')
+
+    async def _battery_drainer(self):
+        for j in range(2):
+            for i in range(min(BATTERY_DRAINER_STEP_Y, self._robot.grid.rows - 3)):
+                await self._run_blocking(self._robot.move_robot, self._robot_sender, FORWARD)
+            await self._run_blocking(self._robot.flush_commands, self._robot_sender)
+            self._sender.send_arduino(BATTERY_DRAINER_TURN)
+            await self._sender.wait_arduino(ARDUIMO_MOVED)
+            for i in range(min(BATTERY_DRAINER_STEP_X, self._robot.grid.cols - 3)):
+                await self._run_blocking(self._robot.move_robot, self._robot_sender, FORWARD)
+            await self._run_blocking(self._robot.flush_commands, self._robot_sender)
+            self._sender.send_arduino(BATTERY_DRAINER_TURN)
+            await self._sender.wait_arduino(ARDUIMO_MOVED)
+
+    async def _load_explore_map(self):
+        from Algo.real_robot import Robot
+        self._robot = Robot(exploration_status=EXPLORE_STATUS_MAP,
+                            facing=NORTH,
+                            discovered_map=EXPLORATION_OBSTACLE_MAP)
+
+        self._update_android()
+
+        await self._calibrate()
+        await asyncio.sleep(1)
+
+        await self._run_blocking(self._calibrate_after_exploration)
+        await asyncio.sleep(1)
+
+    async def _explore(self):
+        """Start the exploration."""
+
+        start_time = time()
+        exploration = Exploration(self._robot, start_time, self.is_arrow_scan, self._explore_limit, self._time_limit)
+
+        run = exploration.start_real(self._robot_sender)
+
+        # Every step of the run is taken in the worker thread. The Android is updated after each step that reports
+        # cells or a move, which is every step except the ones that only report whether the run is complete.
+        is_done = object()
+        while True:
+            value = await self._run_blocking(next, run, is_done)
+            if value is is_done:
+                break
+            if not isinstance(value, bool):
+                self._update_android()
+            print_map_info(self._robot)
+
+        _logger.info('Exploration Done')
+
+        await self._calibrate()
+        await asyncio.sleep(1)
+
+        await self._run_blocking(self._calibrate_after_exploration)
+        await asyncio.sleep(1)
+
+        # The map is final, so send all of it once more.
+        self._update_android(is_keyframe=True)
+        print_map_info(self._robot)
+
+    async def _move_fastest_path(self):
+        """Move the robot along the fastest path."""
+        if self._fastest_path:
+            self._robot.is_fast_path = True
+            self._moves_arduino = get_fastest_path_moves(self._fastest_path)
+            moves_ardiono_with_calibration = add_calibration_to_arduino_moves(self._moves_arduino, self._robot)
+
+            self._loop.create_task(self._update_android_fast_path())
+
+            self._sender.send_arduino(''.join([s for s in moves_ardiono_with_calibration if s !='C']))
+
+            _logger.info('Reached GOAL!')
+        else:
+            _logger.warning("No valid path")
+
+    async def _update_android_fast_path(self):
+        for move in ''.join(self._moves_arduino):
+            await asyncio.sleep(ANDROID_FAST_PATH_SLEEP_SEC)
+
+            self._robot.move_robot_algo(convert_arduino_cmd_to_direction(move))
+            self._update_android()
@@ -0,0 +1,176 @@
+import csv
+import glob
+import json
+from time import time
+
+from Utils.utils import *
+from Algo.exploration import Exploration
+from Algo.sim_robot import Robot
+from Utils.arena_library import ArenaLibrary, LIBRARY_EXTENSION, read_arena
+from Utils.grid import Grid
+
+"""This module runs simulated explorations without the GUI and records how well and how fast each one went."""
+
+__author__ = 'MDPTeam15'
+
+# Columns written to the CSV report, in order. The coverage over time is only written to the JSON report.
+CSV_FIELDS = ['arena', 'is_parsed', 'is_complete', 'explored', 'wrong_cells', 'steps', 'path_length', 'turns',
+              'calibration_turns', 'side_calibrations', 'front_calibrations', 'arrows_found', 'arrows_total', 'yields',
+              'wall_clock']
+
+TURN_COMMANDS = [ARDUINO_TURN_LEFT, ARDUINO_TURN_RIGHT, ARDUINO_TURN_TO_BACKWARD]
+FRONT_CALIBRATION_COMMANDS = ['L', 'M', 'T']
+
+# Separates the name of a library file from the name of an arena in it, such as Maps/arenas.mdpa#image_maps/SampleArena1
+LIBRARY_SEPARATOR = '#'
+
+# The libraries opened by this process, by file name.
+_libraries = {}
+
+
+def find_arenas(patterns):
+    """
+    Find the arenas matching a list of glob patterns.
+
+    :param patterns: The glob patterns, such as 'Maps/*/*.txt'. A library file matched stands for every arena in it.
+    :return: The sorted list of arena file names and library arenas, without duplicates.
+    """
+    filenames = set()
+    for pattern in patterns:
+        for filename in glob.glob(pattern):
+            if filename.endswith(LIBRARY_EXTENSION):
+                filenames.update(filename + LIBRARY_SEPARATOR + name for name in _open_library(filename).names)
+            else:
+                filenames.add(filename)
+    return sorted(filenames)
+
+
+def load_arena(filename):
+    """
+    Load an arena, from a file in the same format the GUI loads or from a library.
+
+    :param filename: The name of the arena file, or the name of a library file and of an arena in it joined by
+                     LIBRARY_SEPARATOR.
+    :return: The real map as a list of rows, top row first, or None if the arena cannot be parsed or found. Arenas of
+             any size are loaded.
+    """
+    library_filename, separator, name = filename.partition(LIBRARY_SEPARATOR)
+    if separator and library_filename.endswith(LIBRARY_EXTENSION):
+        library = _open_library(library_filename)
+        index = library.get_index(name)
+        return library.get_arena(index) if index is not None else None
+    return read_arena(filename, grid=None)
+
+
+def _open_library(filename):
+    """ Return the library in a file, opening it the first time this process asks for it. """
+    library = _libraries.get(filename)
+    if library is None:
+        library = _libraries[filename] = ArenaLibrary(filename)
+    return library
+
+
+def simulate(filename, explore_limit=None, time_limit=TIME_LIMITE, is_arrow_scan=IS_ARROW_SCAN,
+             calibration_side_steps=CALIBRATION_SIDE_STEPS, sensor_ranges=None):
+    """
+    Explore one arena with the simulated robot, as the GUI does but without drawing or waiting between moves.
+
+    :param filename: The name of the arena file.
+    :param explore_limit: The number of explored cells at which the exploration stops, or None for every cell.
+    :param time_limit: The number of seconds after which the exploration stops.
+    :param is_arrow_scan: Whether to scan for arrows during the exploration.
+    :param calibration_side_steps: The number of steps per side calibration.
+    :param sensor_ranges: The range of each sensor, in the order of Robot.sensors, or None to keep the robot's own.
+    :return: A dict with the results of the run. The coverage is a list of [steps, explored] taken each time the
+             number of explored cells changed.
+    """
+    record = {'arena': filename, 'is_parsed': False}
+    real_map = load_arena(filename)
+    if real_map is None:
+        return record
+
+    grid = Grid.of(real_map)
+    if explore_limit is None:
+        explore_limit = grid.size
+
+    robot = Robot(exploration_status=[[0] * grid.cols for _ in range(grid.rows)],
+                  facing=NORTH,
+                  discovered_map=[[2] * grid.cols for _ in range(grid.rows)],
+                  real_map=real_map)
+    robot.calibration_side_steps = calibration_side_steps
+    if sensor_ranges is not None:
+        robot.set_sensor_ranges(sensor_ranges)
+
+    start_time = time()
+    exploration = Exploration(robot, start_time, is_arrow_scan, explore_limit, time_limit)
+
+    yields = 0
+    explored = robot.get_completion_count()
+    coverage = [[robot.move_counts, explored]]
+    for _ in exploration.start():
+        yields += 1
+        if robot.get_completion_count() != explored:
+            explored = robot.get_completion_count()
+            coverage.append([robot.move_counts, explored])
+    wall_clock = time() - start_time
+
+    # Every forward move counts STRAIGHT_STEP and every turn TURNING_STEP, on top of the 1 the robot starts with. Turns
+    # made to calibrate the front are sent to the Arduino but not counted as steps.
+    counts = robot.actuator.command_counts
+    turns = (robot.move_counts - 1 - counts.get(ARDUINO_FORWARD, 0) * STRAIGHT_STEP) // TURNING_STEP
+    record.update({
+        'is_parsed': True,
+        'is_complete': explored == grid.size,
+        'explored': explored,
+        'wrong_cells': count_wrong_cells(robot.discovered_map, real_map),
+        'steps': robot.move_counts,
+        'path_length': counts.get(ARDUINO_FORWARD, 0),
+        'turns': turns,
+        'calibration_turns': sum(counts.get(command, 0) for command in TURN_COMMANDS) - turns,
+        'side_calibrations': counts.get('C', 0),
+        'front_calibrations': sum(counts.get(command, 0) for command in FRONT_CALIBRATION_COMMANDS),
+        'arrows_found': len(set(robot.arrows)),
+        'arrows_total': sum(value > 1 for row in real_map for value in row),
+        'yields': yields,
+        'wall_clock': round(wall_clock, 4),
+        'coverage': coverage
+    })
+    return record
+
+
+def simulate_all(filenames, explore_limit=None, time_limit=TIME_LIMITE, is_arrow_scan=IS_ARROW_SCAN):
+    """
+    Explore every arena in turn.
+
+    :param filenames: The names of the arena files.
+    :return: The list of results, one dict per arena, in the order of the file names.
+    """
+    return [simulate(filename, explore_limit, time_limit, is_arrow_scan) for filename in filenames]
+
+
+def write_json(records, filename):
+    """ Write the results of the runs, including the coverage over time, to a JSON file. """
+    with open(filename, mode="w") as file:
+        json.dump(records, file, indent=2, sort_keys=True)
+
+
+def write_csv(records, filename, fields=CSV_FIELDS):
+    """ Write one row per run to a CSV file, leaving out the coverage over time. """
+    with open(filename, mode="w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+
+
+def count_wrong_cells(discovered_map, real_map):
+    """ Count the explored cells whose obstacle status in the discovered map differs from the real map. """
+    wrong_cells = 0
+    rows = len(real_map)
+    for y in range(rows):
+        real_row = real_map[rows - 1 - y]
+        for x in range(len(real_row)):
+            value = discovered_map[y][x]
+            if value != 2 and value != (real_row[x] != 0):
+                wrong_cells += 1
+    return wrong_cells
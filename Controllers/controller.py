@@ -1,54 +1,95 @@
 from tkinter import *
 from tkinter.filedialog import askopenfilename
-import re
 from time import time, sleep
 
 from Utils.utils import *
 from Algo.exploration import Exploration
 from Algo.fastest_path import *
+from Algo.waypoint_solver import get_way_point_solver
 from Utils.constants import *
+from Utils.tracer import tracer, PHASE_ANDROID_UPDATE, PHASE_PLANNER
 
 import threading
 from ast import literal_eval
 from Connections.connection_client import Message_Handler
+from Controllers.android_updater import AndroidUpdater
+from Utils.arena_library import read_arena
+from Utils.grid import ARENA_GRID
+from Utils.logger import get_logger
 
 """This module defines the controller that sends messages to the Android."""
 
+_logger = get_logger(__name__)
+
+
 class Controller:
     """
     This class is the controller that relays messages to the Android.
     """
-    def __init__(self):
-        enable_print()
+    def __init__(self, host=WIFI_HOST, port=RPI_PORT):
 
         """
         Initialize the Controller class.
+
+        :param host: The address of the RPi.
+        :param port: The port of the RPi.
         """
         self._filename = ''
+        self._host = host
+        self._port = port
 
-        print('Real run')
+        _logger.info('Real run')
         from Algo.real_robot import Robot
-        self._robot = Robot(exploration_status=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)],
+        self._robot = Robot(exploration_status=[[0] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)],
                             facing=NORTH,
-                            discovered_map=[[2] * ROW_LENGTH for _ in range(COL_LENGTH)])
+                            discovered_map=[[2] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)])
 
         self._explore_limit = COMPLETION_THRESHOLD
         self._time_limit = TIME_LIMITE
 
         # Initialize connention client thread
-        self._sender = Message_Handler(self._receive_handler)
+        self._sender = self._connect()
+        # The sender the robot waits on for the replies of the Arduino and the RPi.
+        self._robot_sender = self._sender
+        self._android = AndroidUpdater(self._sender.send_android, self._schedule)
         self._auto_update = True
 
-        print('Init complete!')
+        _logger.info('Init complete!')
         self._sender.send_rpi("Hello from PC to RPi\n")
         self._sender.send_arduino("Hello from PC to Arduino\n")
         self._sender.send_android("Hello from PC to Android\n")
-        disable_print()
 
         self.is_arrow_scan = IS_ARROW_SCAN
 
         self._set_way_point('3,17')
 
+    def _connect(self):
+        """
+        Connect to the RPi.
+
+        :return: The Message_Handler that communicates with the RPi.
+        """
+        return Message_Handler(self._receive_handler, self._host, self._port)
+
+    def _schedule(self, delay, callback):
+        """ Call a function after a delay in seconds, from a daemon thread of its own. """
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+    def _start(self, target, msg):
+        """
+        Run a command in a daemon thread of its own so the receiver can carry on.
+
+        :param target: The method that carries out the command.
+        :param msg: The message to print once the command is started.
+        :return: N/A
+        """
+        thread = threading.Thread(target=target)
+        thread.daemon = True
+        thread.start()
+        _logger.info(msg)
+
     def _receive_handler(self, msg):
         """
         Parse and handle messages from the Android device.
@@ -59,33 +100,13 @@ class Controller:
         if msg[0:8] == ANDROID_WAYPOINT:
             self._set_way_point(msg[8:])
         elif msg == ANDROID_CALIBRATE:
-            thread = threading.Thread(target=self._calibrate)
-            thread.daemon = True
-            thread.start()
-            enable_print()
-            print('Start CALIBRATION')
-            disable_print()
+            self._start(self._calibrate, 'Start CALIBRATION')
         elif msg == ANDROID_EXPLORE:
-            thread = threading.Thread(target=self._explore)
-            thread.daemon = True
-            thread.start()
-            enable_print()
-            print('Start EXPLORATION')
-            disable_print()
+            self._start(self._explore, 'Start EXPLORATION')
         elif msg == ANDROID_MOVE_FAST_PATH:
-            thread = threading.Thread(target=self._move_fastest_path)
-            thread.daemon = True
-            thread.start()
-            enable_print()
-            print('Start FAST PATH')
-            disable_print()
+            self._start(self._move_fastest_path, 'Start FAST PATH')
         elif msg == ANDROID_LOAD_EXPLORE_MAP:
-            thread = threading.Thread(target=self._load_explore_map)
-            thread.daemon = True
-            thread.start()
-            enable_print()
-            print('LOAD EXPLORE MAP')
-            disable_print()
+            self._start(self._load_explore_map, 'LOAD EXPLORE MAP')
         elif msg == ANDROID_FORWARD:
             self._sender.send_arduino(ARDUINO_FORWARD)
         elif msg == ANDROID_TURN_LEFT:
@@ -101,12 +122,7 @@ class Controller:
         elif msg == 'S':
             self._sender.send_arduino(ARDUINO_SENSOR)
         elif msg == ANDROID_BATTERY_DRAINER:
-            thread = threading.Thread(target=self._battery_drainer)
-            thread.daemon = True
-            thread.start()
-            enable_print()
-            print('START BATTERY DRAINER')
-            disable_print()
+            self._start(self._battery_drainer, 'START BATTERY DRAINER')
 
     def _load_explore_map(self):
 
@@ -132,11 +148,9 @@ class Controller:
         :param coordinate: The coordinates received from the Android device.
         :return: N/A
         """
-        enable_print()
         (col, row) = literal_eval(coordinate)
-        self._way_point = (19 - row, col)
-        print('Set Waypoint: {}'.format(self._way_point))
-        disable_print()
+        self._way_point = (self._robot.grid.flip_row(row), col)
+        _logger.info('Set Waypoint: {}', self._way_point)
 
     def _calibrate(self):
         """
@@ -148,36 +162,32 @@ class Controller:
             self._sender.send_arduino(move)
             self._sender.wait_arduino(ARDUIMO_MOVED)
 
-        enable_print()
-        print('Calibrating Done!')
-        disable_print()
+        _logger.info('Calibrating Done!')
 
     def _battery_drainer(self):
         for j in range(2):
-            for i in range(min(BATTERY_DRAINER_STEP_Y, 17)):
-                self._robot.move_robot(self._sender, FORWARD)
+            for i in range(min(BATTERY_DRAINER_STEP_Y, self._robot.grid.rows - 3)):
+                self._robot.move_robot(self._robot_sender, FORWARD)
+            self._robot.flush_commands(self._robot_sender)
             self._sender.send_arduino(BATTERY_DRAINER_TURN)
             self._sender.wait_arduino(ARDUIMO_MOVED)
-            for i in range(min(BATTERY_DRAINER_STEP_X, 12)):
-                self._robot.move_robot(self._sender, FORWARD)
+            for i in range(min(BATTERY_DRAINER_STEP_X, self._robot.grid.cols - 3)):
+                self._robot.move_robot(self._robot_sender, FORWARD)
+            self._robot.flush_commands(self._robot_sender)
             self._sender.send_arduino(BATTERY_DRAINER_TURN)
             self._sender.wait_arduino(ARDUIMO_MOVED)
 
-    def _update_android(self):
+    def _update_android(self, is_keyframe=False):
         """
         Send the latest updates to the Android device.
 
+        Only what changed since the last update is sent, and updates asked for in quick succession are merged.
+
+        :param is_keyframe: True to send both MDF strings even if nothing changed.
         :return: N/A
         """
-        msgs = []
-        # Send the latest MDF strings to the Android device.
-        msgs.append('"exploreMap":"%s"'%self._robot.get_explore_string())
-        msgs.append('"obstacleMap":"%s"'%self._robot.get_map_string())
-        y, x = get_matrix_coords(self._robot.center)
-        msgs.append('"robotPosition":"%s,%s,%s"' % (str(x), str(19 - y), str(self._robot.facing)))
-        msgs.append('"arrowPosition":"{}"'.format(';'.join(self._robot.arrows_arduino)))
-
-        self._sender.send_android('{' + ','.join(msgs) + '}')
+        with tracer.span(PHASE_ANDROID_UPDATE):
+            self._android.update(self._robot, is_keyframe)
 
     def _explore(self):
         """Start the exploration."""
@@ -185,7 +195,7 @@ class Controller:
         start_time = time()
         exploration = Exploration(self._robot, start_time, self.is_arrow_scan, self._explore_limit, self._time_limit)
 
-        run = exploration.start_real(self._sender)
+        run = exploration.start_real(self._robot_sender)
 
         initial_pos = next(run)
         self._update_android()
@@ -194,17 +204,17 @@ class Controller:
             try:
                 # Exploration until completion
                 while True:
-                    print('=' * 100)
+                    _logger.debug('=' * 100)
 
                     updated_cells = run.send(0)
 
-                    print('-' * 50)
-                    print('updated_cells (sensor_readings): {}'.format(updated_cells)) # sensor_reading
+                    _logger.debug('-' * 50)
+                    _logger.debug('updated_cells (sensor_readings): {}', updated_cells) # sensor_reading
 
                     self._update_android()
 
                     direction, move_or_turn, updated_cells = run.send(0)
-                    print('direction, move_or_turn, updated_cells (robot standing): {}'.format((MOVEMENTS[direction], MOVE_TURN[move_or_turn], updated_cells)))
+                    _logger.debug('direction, move_or_turn, updated_cells (robot standing): {}', (MOVEMENTS[direction], MOVE_TURN[move_or_turn], updated_cells))
 
                     self._update_android()
                     print_map_info(self._robot)
@@ -213,34 +223,30 @@ class Controller:
                     if is_complete:
                         self._update_android()
 
-                        enable_print()
                         print_map_info(self._robot)
-                        disable_print()
                         break
 
                     is_back_at_start = run.send(0)
                     if is_back_at_start:
 
-                        enable_print()
-                        print('Back to start......')
+                        _logger.info('Back to start......')
                         print_map_info(self._robot)
-                        disable_print()
 
                         # Move to unexplored area
                         while True:
-                            print('=' * 100)
+                            _logger.debug('=' * 100)
                             updated_or_moved_or_turned, value, is_complete = run.send(0)
 
-                            print('-' * 50)
+                            _logger.debug('-' * 50)
                             if updated_or_moved_or_turned == "updated":
                                 self._update_android()
-                                print('updated_cells: {}'.format(value)) # sensor_reading
+                                _logger.debug('updated_cells: {}', value) # sensor_reading
                             elif updated_or_moved_or_turned == "moved":
                                 self._update_android()
-                                print('moved robot: {}'.format(MOVEMENTS[value])) # sensor_reading
+                                _logger.debug('moved robot: {}', MOVEMENTS[value]) # sensor_reading
                             elif updated_or_moved_or_turned == "turned":
                                 self._update_android()
-                                print('turned robot: {}'.format(MOVEMENTS[value])) # sensor_reading
+                                _logger.debug('turned robot: {}', MOVEMENTS[value]) # sensor_reading
                             else:
                                 # invalid (no path find)
                                 break
@@ -248,18 +254,14 @@ class Controller:
                             if is_complete:
                                 self._update_android()
 
-                                enable_print()
                                 print_map_info(self._robot)
-                                disable_print()
                                 break
                             print_map_info(self._robot)
 
                         break
 
                 # Returning to start after completion
-                enable_print()
-                print("Returning to Start...")
-                disable_print()
+                _logger.info("Returning to Start...")
                 while True:
                     direction = run.send(0)
                     self._update_android()
@@ -268,9 +270,7 @@ class Controller:
                 print_map_info(self._robot)
                 break
 
-        enable_print()
-        print('Exploration Done')
-        disable_print()
+        _logger.info('Exploration Done')
 
         self._calibrate()
         sleep(1)
@@ -278,10 +278,9 @@ class Controller:
         self._calibrate_after_exploration()
         sleep(1)
 
-        self._update_android()
-        enable_print()
+        # The map is final, so send all of it once more.
+        self._update_android(is_keyframe=True)
         print_map_info(self._robot)
-        disable_print()
 
     def _calibrate_after_exploration(self):
         """
@@ -289,47 +288,24 @@ class Controller:
 
         :return: N/A
         """
-        enable_print()
-        print('Calibrating for fast path...')
-        disable_print()
+        _logger.info('Calibrating for fast path...')
         self._fastest_path = self._find_fastest_path()
 
         if self._fastest_path[0] != FORWARD:
-            print('Turning Robot')
-            self._robot.turn_robot(self._sender, self._fastest_path[0], self.is_arrow_scan)
-            print('Robot Turned')
+            _logger.debug('Turning Robot')
+            self._robot.turn_robot(self._robot_sender, self._fastest_path[0], self.is_arrow_scan)
+            self._robot.flush_commands(self._robot_sender)
+            _logger.debug('Robot Turned')
 
         self._fastest_path[0] = FORWARD
         self._update_android()
 
-        enable_print()
-        print('Calibrating Done!')
-        disable_print()
+        _logger.info('Calibrating Done!')
 
     def _find_fastest_path(self):
         """Calculate and return the set of moves required for the fastest path."""
-        from Algo.sim_robot import Robot
-        clone_robot = Robot(exploration_status=self._robot.exploration_status,
-                            facing=self._robot.facing,
-                            discovered_map=self._robot.discovered_map,
-                            real_map=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)])
-
-        fastest_path_start_way_point = get_shortest_path_moves(clone_robot,
-                                                               start=(1, 1),
-                                                               goal=self._way_point)
-
-        if fastest_path_start_way_point:
-            for move in fastest_path_start_way_point:
-                clone_robot.move_robot(move)
-
-        before_way_point = previous_cell(clone_robot.center, clone_robot.facing)
-
-        fastest_path_way_point_goal = get_shortest_path_moves(clone_robot,
-                                                              start=self._way_point,
-                                                              goal=(18, 13),
-                                                              before_start_point=before_way_point)
-
-        return fastest_path_start_way_point + fastest_path_way_point_goal
+        with tracer.span(PHASE_PLANNER):
+            return get_way_point_solver(self._robot).get_moves(self._way_point)
 
     def _move_fastest_path(self):
         """Move the robot along the fastest path."""
@@ -349,13 +325,9 @@ class Controller:
             #     self._sender.send_arduino(moves)
             #     self._sender.wait_arduino(ARDUIMO_MOVED)
 
-            enable_print()
-            print('Reached GOAL!')
-            disable_print()
+            _logger.info('Reached GOAL!')
         else:
-            enable_print()
-            print("No valid path")
-            disable_print()
+            _logger.warning("No valid path")
 
     def _update_android_fast_path(self):
         for move in ''.join(self._moves_arduino):
@@ -373,13 +345,13 @@ class Controller:
         self._filename = askopenfilename(title="Select Map Descriptor", filetypes=[("Text Files (*.txt)", "*.txt")])
 
         if self._filename:
-            print(self._filename)
+            _logger.debug('{}', self._filename)
             if self._parse_map(self._filename):
                 self._paint_map()
                 return True
-            print("File %s cannot be parsed" % self._filename)
+            _logger.debug('File {} cannot be parsed', self._filename)
             return False
-        print("File %s does not exist" % self._filename)
+        _logger.debug('File {} does not exist', self._filename)
         return False
 
     def _parse_map(self, filename):
@@ -389,19 +361,9 @@ class Controller:
         :param filename: The name of the map descriptor file
         :return: True if the file is able to be successfully parsed, false otherwise.
         """
-        file = open(filename, mode="r")
-        map_str = file.read()
-
-        match = re.fullmatch("[012345\n]*", map_str)
-        if match:
-            self._grid_map = []
-            row_strings = map_str.split("\n")
-            for row_string in row_strings[:NUM_ROWS]:
-                grid_row = []
-                for char in row_string:
-                    bit = int(char)
-                    grid_row.append(bit)
-                self._grid_map.append(grid_row)
-            return True
+        grid_map = read_arena(filename)
+        if grid_map is None:
+            return False
 
-        return False
+        self._grid_map = grid_map
+        return True
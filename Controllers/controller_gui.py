@@ -1,27 +1,34 @@
 from tkinter import *
 from tkinter.filedialog import askopenfilename
-import re
 from time import time, sleep
 
 from Utils.utils import *
 from Algo.exploration import Exploration
 from Algo.fastest_path import *
+from Algo.waypoint_solver import get_way_point_solver
 from Utils.constants import *
 
 import threading
 from ast import literal_eval
 from Connections.connection_client import Message_Handler
+from Controllers.android_updater import AndroidUpdater
+from Utils.arena_library import read_arena
+from Utils.grid import ARENA_GRID
+from Utils.tracer import tracer, PHASE_PLANNER
+from Utils.logger import get_logger
 
 
 """This module defines the main GUI window for the robot simulation."""
 
+_logger = get_logger(__name__)
+
 __author__ = 'MDPTeam15'
 
 
 class TimeUp(Exception):
     """Raised when the time limit has reached."""
     def __init__(self):
-        print("TIME'S UP (GUI)")
+        _logger.debug("TIME'S UP (GUI)")
 
 
 class Window(Frame):
@@ -30,9 +37,9 @@ class Window(Frame):
     """
 
     _grid_size = 30                     # size of one grid square in pixels
+    _grid = ARENA_GRID                  # grid of the arena drawn
 
     def __init__(self, master):
-        enable_print()
 
         """Initializes the GUI."""
         Frame.__init__(self, master)
@@ -40,17 +47,17 @@ class Window(Frame):
         self._master = master
         self._filename = ''
 
-        print("Init window starting")
+        _logger.info("Init window starting")
         self._init_window()
-        print("Init window completed")
+        _logger.info("Init window completed")
 
         """
         Initialize the Controller class.
         """
         from Algo.real_robot import Robot
-        self._robot = Robot(exploration_status=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)],
+        self._robot = Robot(exploration_status=[[0] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)],
                             facing=NORTH,
-                            discovered_map=[[2] * ROW_LENGTH for _ in range(COL_LENGTH)])
+                            discovered_map=[[2] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)])
 
         self._paint_map()
 
@@ -59,19 +66,19 @@ class Window(Frame):
 
         # Initialize connention client thread
         self._sender = Message_Handler(self._receive_handler)
+        self._android = AndroidUpdater(self._sender.send_android, self._schedule)
         self._auto_update = True
 
-        print('Init complete!')
+        _logger.info('Init complete!')
         self._sender.send_rpi("Hello from PC to RPi\n")
         self._sender.send_arduino("Hello from PC to Arduino\n")
         self._sender.send_android("Hello from PC to Android\n")
 
         self._facing = self._robot.facing
-        self._draw_robot(START, self._facing)
+        self._draw_robot(self._grid.start, self._facing)
 
         self.is_arrow_scan = IS_ARROW_SCAN
 
-        disable_print()
 
         self._set_way_point('3,17')
 
@@ -98,7 +105,8 @@ class Window(Frame):
         self._time_spent_label = Label(bg_frame, text="0.0s")
         self._time_spent_label.grid(row=1, column=1)
 
-        self._canvas = Canvas(self, height=COL_LENGTH * self._grid_size + 1, width=ROW_LENGTH * self._grid_size + 1,
+        self._canvas = Canvas(self, height=self._grid.rows * self._grid_size + 1,
+                              width=self._grid.cols * self._grid_size + 1,
                               borderwidth=0, highlightthickness=0, background='#ffffff')
         self._canvas.pack(padx=20, pady=20)
 
@@ -118,30 +126,22 @@ class Window(Frame):
             thread = threading.Thread(target=self._calibrate)
             thread.daemon = True
             thread.start()
-            enable_print()
-            print('Start CALIBRATION')
-            disable_print()
+            _logger.info('Start CALIBRATION')
         elif msg == ANDROID_EXPLORE:
             thread = threading.Thread(target=self._explore)
             thread.daemon = True
             thread.start()
-            enable_print()
-            print('Start EXPLORATION')
-            disable_print()
+            _logger.info('Start EXPLORATION')
         elif msg == ANDROID_MOVE_FAST_PATH:
             thread = threading.Thread(target=self._move_fastest_path)
             thread.daemon = True
             thread.start()
-            enable_print()
-            print('Start FAST PATH')
-            disable_print()
+            _logger.info('Start FAST PATH')
         elif msg == ANDROID_LOAD_EXPLORE_MAP:
             thread = threading.Thread(target=self._load_explore_map)
             thread.daemon = True
             thread.start()
-            enable_print()
-            print('LOAD EXPLORE MAP')
-            disable_print()
+            _logger.info('LOAD EXPLORE MAP')
         elif msg == ANDROID_FORWARD:
             self._sender.send_arduino(ARDUINO_FORWARD)
         elif msg == ANDROID_TURN_LEFT:
@@ -160,9 +160,7 @@ class Window(Frame):
             thread = threading.Thread(target=self._battery_drainer)
             thread.daemon = True
             thread.start()
-            enable_print()
-            print('START BATTERY DRAINER')
-            disable_print()
+            _logger.info('START BATTERY DRAINER')
 
     def _load_explore_map(self):
         from Algo.real_robot import Robot
@@ -188,12 +186,10 @@ class Window(Frame):
         :param coordinate: The coordinates received from the Android device.
         :return: N/A
         """
-        enable_print()
         (col, row) = literal_eval(coordinate)
-        self._way_point = (19 - row, col)
-        print('Set Waypoint: {}'.format(self._way_point))
-        self._mark_way_point(get_grid_index(19 - row, col))
-        disable_print()
+        self._way_point = (self._robot.grid.flip_row(row), col)
+        _logger.info('Set Waypoint: {}', self._way_point)
+        self._mark_way_point(self._grid.get_grid_index(self._grid.flip_row(row), col))
 
     def _calibrate(self):
         """
@@ -205,36 +201,37 @@ class Window(Frame):
             self._sender.send_arduino(move)
             self._sender.wait_arduino(ARDUIMO_MOVED)
 
-        enable_print()
-        print('Calibrating Done!')
-        disable_print()
+        _logger.info('Calibrating Done!')
 
     def _battery_drainer(self):
         for j in range(2):
-            for i in range(min(BATTERY_DRAINER_STEP_Y, 17)):
+            for i in range(min(BATTERY_DRAINER_STEP_Y, self._robot.grid.rows - 3)):
                 self._robot.move_robot(self._sender, FORWARD)
+            self._robot.flush_commands(self._sender)
             self._sender.send_arduino(BATTERY_DRAINER_TURN)
             self._sender.wait_arduino(ARDUIMO_MOVED)
-            for i in range(min(BATTERY_DRAINER_STEP_X, 12)):
+            for i in range(min(BATTERY_DRAINER_STEP_X, self._robot.grid.cols - 3)):
                 self._robot.move_robot(self._sender, FORWARD)
+            self._robot.flush_commands(self._sender)
             self._sender.send_arduino(BATTERY_DRAINER_TURN)
             self._sender.wait_arduino(ARDUIMO_MOVED)
 
-    def _update_android(self):
+    def _schedule(self, delay, callback):
+        """ Call a function after a delay in seconds, from a daemon thread of its own. """
+        timer = threading.Timer(delay, callback)
+        timer.daemon = True
+        timer.start()
+
+    def _update_android(self, is_keyframe=False):
         """
         Send the latest updates to the Android device.
 
+        Only what changed since the last update is sent, and updates asked for in quick succession are merged.
+
+        :param is_keyframe: True to send both MDF strings even if nothing changed.
         :return: N/A
         """
-        msgs = []
-        # Send the latest MDF strings to the Android device.
-        msgs.append('"exploreMap":"%s"'%self._robot.get_explore_string())
-        msgs.append('"obstacleMap":"%s"'%self._robot.get_map_string())
-        y, x = get_matrix_coords(self._robot.center)
-        msgs.append('"robotPosition":"%s,%s,%s"' % (str(x), str(19 - y), str(self._robot.facing)))
-        msgs.append('"arrowPosition":"{}"'.format(';'.join(self._robot.arrows_arduino)))
-
-        self._sender.send_android('{' + ','.join(msgs) + '}')
+        self._android.update(self._robot, is_keyframe)
 
     def _explore(self):
         """Start the exploration."""
@@ -252,18 +249,18 @@ class Window(Frame):
             try:
                 # Exploration until completion
                 while True:
-                    print('=' * 100)
+                    _logger.debug('=' * 100)
 
                     updated_cells = run.send(0)
 
-                    print('-' * 50)
-                    print('updated_cells (sensor_readings): {}'.format(updated_cells)) # sensor_reading
+                    _logger.debug('-' * 50)
+                    _logger.debug('updated_cells (sensor_readings): {}', updated_cells) # sensor_reading
 
                     self._update_cells(updated_cells)
                     self._update_android()
 
                     direction, move_or_turn, updated_cells = run.send(0)
-                    print('direction, move_or_turn, updated_cells (robot standing): {}'.format((MOVEMENTS[direction], MOVE_TURN[move_or_turn], updated_cells)))
+                    _logger.debug('direction, move_or_turn, updated_cells (robot standing): {}', (MOVEMENTS[direction], MOVE_TURN[move_or_turn], updated_cells))
 
                     self._time_spent_label.config(text="%.2f" % get_time_elapsed(start_time) + "s")
                     self._update_cells(updated_cells)
@@ -280,39 +277,35 @@ class Window(Frame):
                     if is_complete:
                         self._update_android()
 
-                        enable_print()
                         print_map_info(self._robot)
-                        disable_print()
                         break
 
                     is_back_at_start = run.send(0)
                     if is_back_at_start:
 
-                        enable_print()
-                        print('Back to start......')
+                        _logger.info('Back to start......')
                         print_map_info(self._robot)
-                        disable_print()
 
                         # Move to unexplored area
                         while True:
-                            print('=' * 100)
+                            _logger.debug('=' * 100)
                             updated_or_moved_or_turned, value, is_complete = run.send(0)
 
                             self._time_spent_label.config(text="%.2f" % get_time_elapsed(start_time) + "s")
 
-                            print('-' * 50)
+                            _logger.debug('-' * 50)
                             if updated_or_moved_or_turned == "updated":
                                 self._update_cells(value)
                                 self._update_android()
-                                print('updated_cells: {}'.format(value)) # sensor_reading
+                                _logger.debug('updated_cells: {}', value) # sensor_reading
                             elif updated_or_moved_or_turned == "moved":
                                 self._move_robot(value)
                                 self._update_android()
-                                print('moved robot: {}'.format(MOVEMENTS[value])) # sensor_reading
+                                _logger.debug('moved robot: {}', MOVEMENTS[value]) # sensor_reading
                             elif updated_or_moved_or_turned == "turned":
                                 self._turn_head(self._facing, value)
                                 self._update_android()
-                                print('turned robot: {}'.format(MOVEMENTS[value])) # sensor_reading
+                                _logger.debug('turned robot: {}', MOVEMENTS[value]) # sensor_reading
                             else:
                                 # invalid (no path find)
                                 break
@@ -320,18 +313,14 @@ class Window(Frame):
                             if is_complete:
                                 self._update_android()
 
-                                enable_print()
                                 print_map_info(self._robot)
-                                disable_print()
                                 break
                             print_map_info(self._robot)
 
                         break
 
                 # Returning to start after completion
-                enable_print()
-                print("Returning to Start...")
-                disable_print()
+                _logger.info("Returning to Start...")
                 while True:
                     direction = run.send(0)
 
@@ -342,9 +331,7 @@ class Window(Frame):
                 print_map_info(self._robot)
                 break
 
-        enable_print()
-        print('Exploration Done')
-        disable_print()
+        _logger.info('Exploration Done')
 
         self._calibrate()
         sleep(1)
@@ -355,12 +342,10 @@ class Window(Frame):
         if self.is_arrow_scan:
             if self._robot.arrows:
                 for y, x, facing in self._robot.arrows:
-                    self._draw_arrow(get_grid_index(y, x), facing)
+                    self._draw_arrow(self._grid.get_grid_index(y, x), facing)
 
         self._update_android()
-        enable_print()
         print_map_info(self._robot)
-        disable_print()
 
     def _calibrate_after_exploration(self):
         """
@@ -368,48 +353,25 @@ class Window(Frame):
 
         :return: N/A
         """
-        enable_print()
-        print('Calibrating for fast path...')
-        disable_print()
+        _logger.info('Calibrating for fast path...')
         self._fastest_path = self._find_fastest_path()
 
         if self._fastest_path[0] != FORWARD:
-            print('Turning Robot')
+            _logger.debug('Turning Robot')
             self._robot.turn_robot(self._sender, self._fastest_path[0], self.is_arrow_scan)
-            print('Robot Turned')
+            self._robot.flush_commands(self._sender)
+            _logger.debug('Robot Turned')
             self._turn_head(self._facing, self._fastest_path[0])
 
         self._fastest_path[0] = FORWARD
         self._update_android()
 
-        enable_print()
-        print('Calibrating Done!')
-        disable_print()
+        _logger.info('Calibrating Done!')
 
     def _find_fastest_path(self):
         """Calculate and return the set of moves required for the fastest path."""
-        from Algo.sim_robot import Robot
-        clone_robot = Robot(exploration_status=self._robot.exploration_status,
-                            facing=self._robot.facing,
-                            discovered_map=self._robot.discovered_map,
-                            real_map=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)])
-
-        fastest_path_start_way_point = get_shortest_path_moves(clone_robot,
-                                                               start=(1, 1),
-                                                               goal=self._way_point)
-
-        if fastest_path_start_way_point:
-            for move in fastest_path_start_way_point:
-                clone_robot.move_robot(move)
-
-        before_way_point = previous_cell(clone_robot.center, clone_robot.facing)
-
-        fastest_path_way_point_goal = get_shortest_path_moves(clone_robot,
-                                                              start=self._way_point,
-                                                              goal=(18, 13),
-                                                              before_start_point=before_way_point)
-
-        return fastest_path_start_way_point + fastest_path_way_point_goal
+        with tracer.span(PHASE_PLANNER):
+            return get_way_point_solver(self._robot).get_moves(self._way_point)
 
     def _move_fastest_path(self):
         """Move the robot along the fastest path."""
@@ -428,13 +390,9 @@ class Window(Frame):
             #     self._sender.send_arduino(moves)
             #     self._sender.wait_arduino(ARDUIMO_MOVED)
 
-            enable_print()
-            print('Reached GOAL!')
-            disable_print()
+            _logger.info('Reached GOAL!')
         else:
-            enable_print()
-            print("No valid path")
-            disable_print()
+            _logger.warning("No valid path")
 
     def _update_android_fast_path(self):
         for move in ''.join(self._moves_arduino):
@@ -453,24 +411,24 @@ class Window(Frame):
         """Draw the virtual maze."""
         self._grid_squares = []
 
-        for y in range(COL_LENGTH):
+        for y in range(self._grid.rows):
             temp_row = []
-            for x in range(ROW_LENGTH):
-                temp_square = self._canvas.create_rectangle(x * self._grid_size, (COL_LENGTH - 1 - y) * self._grid_size,
+            for x in range(self._grid.cols):
+                temp_square = self._canvas.create_rectangle(x * self._grid_size,
+                                                            (self._grid.rows - 1 - y) * self._grid_size,
                                                             (x + 1) * self._grid_size,
-                                                            (COL_LENGTH - y) * self._grid_size, width=3)
+                                                            (self._grid.rows - y) * self._grid_size, width=3)
                 temp_row.append(temp_square)
 
             self._grid_squares.append(temp_row)
 
     def _draw_robot(self, location, facing):
         """Draw the robot in a given location with a given facing."""
-        if location in BORDERS[NORTH] or location in BORDERS[SOUTH] \
-                or location in BORDERS[EAST] or location in BORDERS[WEST]:
-            print("invalid location")
+        if self._grid.is_on_edge(location):
+            _logger.debug("invalid location")
             return
 
-        top_left_grid = self._canvas.coords(location + ROW_LENGTH - 1)
+        top_left_grid = self._canvas.coords(location + self._grid.cols - 1)
         x = top_left_grid[0]
         y = top_left_grid[1]
 
@@ -481,9 +439,9 @@ class Window(Frame):
     def _draw_head(self, location, facing):
         """Draw the head of the robot based on the robot's location and facing."""
         if facing == NORTH:
-            corner = self._canvas.coords(location + ROW_LENGTH)
+            corner = self._canvas.coords(location + self._grid.cols)
         elif facing == SOUTH:
-            corner = self._canvas.coords(location - ROW_LENGTH)
+            corner = self._canvas.coords(location - self._grid.cols)
         elif facing == EAST:
             corner = self._canvas.coords(location + 1)
         else:
@@ -637,8 +595,8 @@ class Window(Frame):
 
     def _update_cells(self, updated_cells):
         """Repaint the cells that have been updated."""
-        start_cells = get_robot_cells(START)
-        goal_cells = get_robot_cells(GOAL)
+        start_cells = self._grid.get_robot_cells(self._grid.start)
+        goal_cells = self._grid.get_robot_cells(self._grid.goal)
         for cell, value in updated_cells.items():
             if cell in start_cells:
                 self.mark_cell(cell, START_AREA)
@@ -651,7 +609,7 @@ class Window(Frame):
 
         if self.is_arrow_scan:
             for y, x, facing in self._robot.arrows:
-                self._draw_arrow(get_grid_index(y, x), facing)
+                self._draw_arrow(self._grid.get_grid_index(y, x), facing)
 
         self._completion_label.config(text=(str(self._robot.get_completion_count())))
 
@@ -664,13 +622,13 @@ class Window(Frame):
         self._filename = askopenfilename(title="Select Map Descriptor", filetypes=[("Text Files (*.txt)", "*.txt")])
 
         if self._filename:
-            print(self._filename)
+            _logger.debug('{}', self._filename)
             if self._parse_map(self._filename):
                 self._paint_map()
                 return True
-            print("File %s cannot be parsed" % self._filename)
+            _logger.debug('File {} cannot be parsed', self._filename)
             return False
-        print("File %s does not exist" % self._filename)
+        _logger.debug('File {} does not exist', self._filename)
         return False
 
     def _mark_way_point(self, grid_num):
@@ -690,28 +648,18 @@ class Window(Frame):
         :param filename: The name of the map descriptor file
         :return: True if the file is able to be successfully parsed, false otherwise.
         """
-        file = open(filename, mode="r")
-        map_str = file.read()
-
-        match = re.fullmatch("[012345\n]*", map_str)
-        if match:
-            self._grid_map = []
-            row_strings = map_str.split("\n")
-            for row_string in row_strings[:NUM_ROWS]:
-                grid_row = []
-                for char in row_string:
-                    bit = int(char)
-                    grid_row.append(bit)
-                self._grid_map.append(grid_row)
-            return True
+        grid_map = read_arena(filename)
+        if grid_map is None:
+            return False
 
-        return False
+        self._grid_map = grid_map
+        return True
 
     def _paint_map(self):
         """Paint the unexplored map on the grid."""
-        for i in range(NUM_ROWS):
-            for j in range(NUM_COLS):
-                grid_num = i * ROW_LENGTH + j + 1
+        for i in range(self._grid.rows):
+            for j in range(self._grid.cols):
+                grid_num = i * self._grid.cols + j + 1
                 self.mark_cell(grid_num, UNEXPLORED)
 
     def mark_cell(self, cell_index, cell_type):
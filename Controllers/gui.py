@@ -1,46 +1,61 @@
 from tkinter import *
 from tkinter.filedialog import askopenfilename
-import re
+import threading
 from time import time, sleep
 
 from Utils.utils import *
 from Algo.exploration import Exploration
 from Algo.fastest_path import *
+from Algo.waypoint_solver import get_way_point_solver
 from Utils.constants import *
 from Algo.sim_robot import Robot
+from Algo.map_state import CELL_UNEXPLORED, CELL_FREE
+from Utils.arena_library import read_arena
+from Utils.grid import ARENA_GRID
+from Utils.tracer import tracer, PHASE_PLANNER
+from Utils.logger import get_logger
 
 """This module defines the main GUI window for the robot simulation."""
 
+_logger = get_logger(__name__)
+
 __author__ = 'MDPTeam15'
 
 
 class TimeUp(Exception):
     """Raised when the time limit has reached."""
     def __init__(self):
-        print("TIME'S UP (GUI)")
+        _logger.debug("TIME'S UP (GUI)")
 
 
 class Window(Frame):
     """
     This class is the main GUI window.
+
+    Runs are carried out in a worker thread, which never touches Tk. The canvas is redrawn from the state of the robot
+    on an after() tick at most _frame_rate times a second, so the window stays responsive however fast the run goes.
+    Each frame only repaints the cells whose state changed since the last one, and moves the canvas items of the robot
+    and the arrows instead of creating new ones.
     """
 
     _grid_size = 30                     # size of one grid square in pixels
+    _grid = ARENA_GRID                  # grid of the arena drawn
+    _frame_rate = 30                    # most frames drawn per second
 
     def __init__(self, master):
-        enable_print()
 
         """Initializes the GUI."""
         Frame.__init__(self, master)
 
         self._master = master
         self._filename = ''
+        self._run_thread = None
+        self._time_spent = 0.0
 
-        print("Init window starting")
+        _logger.info("Init window starting")
         self._init_window()
-        print("Init window completed")
+        _logger.info("Init window completed")
 
-        disable_print()
 
     def _init_window(self):
         """
@@ -89,24 +104,52 @@ class Window(Frame):
         self._fp_button = Button(bg_frame, text="Move Fastest Path", command=self._move_fastest_path)
         self._fp_button.grid(row=3, column=2)
 
-        self._canvas = Canvas(self, height=COL_LENGTH * self._grid_size + 1, width=ROW_LENGTH * self._grid_size + 1,
+        self._canvas = Canvas(self, height=self._grid.rows * self._grid_size + 1,
+                              width=self._grid.cols * self._grid_size + 1,
                               borderwidth=0, highlightthickness=0, background='#ffffff')
         self._canvas.pack(padx=20, pady=20)
 
         # Draw grid
         self._draw_grid()
 
-        self._robot = Robot(exploration_status=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)],
+        self._robot = Robot(exploration_status=[[0] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)],
                             facing=NORTH,
-                            discovered_map=[[2] * ROW_LENGTH for _ in range(COL_LENGTH)],
+                            discovered_map=[[2] * ARENA_GRID.cols for _ in range(ARENA_GRID.rows)],
                             real_map=[[]])
 
         # Draw robot
-        self._facing = self._robot.facing
-        self._draw_robot(START, self._facing)
+        self._robot_graphic = self._canvas.create_oval(0, 0, 0, 0, width=2, fill="#354458", outline="#252a33")
+        self._head = self._canvas.create_oval(0, 0, 0, 0, width=0, fill="#7acdc8")
+        self._arrow_graphics = []
+
+        # What the canvas currently shows
+        self._drawn_states = bytearray(self._grid.rows * self._grid.cols)
+        self._drawn_version = None
+        self._drawn_pose = None
+        self._drawn_time_spent = None
+        self._start_cells = set(self._grid.get_robot_cells(self._grid.start))
+        self._goal_cells = set(self._grid.get_robot_cells(self._grid.goal))
 
         self.is_arrow_scan = IS_ARROW_SCAN
 
+        self._render_frame()
+
+    def _start(self, target, *args):
+        """
+        Run a run in a daemon thread of its own, unless one is running already.
+
+        :param target: The method that carries out the run.
+        :param args: The arguments of the method.
+        :return: N/A
+        """
+        if self._run_thread is not None and self._run_thread.is_alive():
+            _logger.warning('A run is still going on')
+            return
+
+        self._run_thread = threading.Thread(target=target, args=args)
+        self._run_thread.daemon = True
+        self._run_thread.start()
+
     def _explore(self):
         """Start the exploration."""
         start_time = time()
@@ -115,194 +158,95 @@ class Window(Frame):
         explore_limit = float(self._explore_entry.get().strip())
         timestep = float(self._timestep_entry.get().strip())
 
+        self._start(self._run_exploration, start_time, time_limit, explore_limit, timestep)
+
+    def _run_exploration(self, start_time, time_limit, explore_limit, timestep):
+        """
+        Carry out the exploration, in the worker thread.
+
+        :param start_time: The time the exploration was started.
+        :param time_limit: The number of seconds the exploration may take.
+        :param explore_limit: The number of cells to explore before returning to the start.
+        :param timestep: The number of seconds to wait after every move or turn of the robot.
+        :return: N/A
+        """
         self._robot.real_map = self._grid_map
         exploration = Exploration(self._robot, start_time, self.is_arrow_scan, explore_limit, time_limit)
 
-        run = exploration.start()
-
-        initial_pos = next(run)
-        self._update_cells(initial_pos)
-
-        while True:
-            try:
-                # Exploration until completion
-                while True:
-                    print('=' * 100)
-
-                    updated_cells = run.send(0)
-
-                    print('-' * 50)
-                    print('updated_cells (sensor_readings): {}'.format(updated_cells)) # sensor_reading
-
-                    self._update_cells(updated_cells)
-
-                    direction, move_or_turn, updated_cells = run.send(0)
-                    print('direction, move_or_turn, updated_cells (robot standing): {}'.format((MOVEMENTS[direction], MOVE_TURN[move_or_turn], updated_cells)))
-
-                    sleep(timestep)
-                    self._time_spent_label.config(text="%.2f" % get_time_elapsed(start_time) + "s")
-                    self._update_cells(updated_cells)
-
-                    if move_or_turn == MOVE:
-                        self._move_robot(direction)
-                    elif move_or_turn == TURN:
-                        self._turn_head(self._facing, direction)
-
-                    print_map_info(self._robot)
-
-                    is_complete = run.send(0)
-                    if is_complete:
-                        enable_print()
-                        print_map_info(self._robot)
-                        disable_print()
-                        break
-
-                    is_back_at_start = run.send(0)
-                    if is_back_at_start:
-
-                        enable_print()
-                        print('Back to start......')
-                        print_map_info(self._robot)
-                        disable_print()
-
-                        # Move to unexplored area
-                        while True:
-                            print('=' * 100)
-                            updated_or_moved_or_turned, value, is_complete = run.send(0)
-                            sleep(timestep)
-                            self._time_spent_label.config(text="%.2f" % get_time_elapsed(start_time) + "s")
-
-                            print('-' * 50)
-                            if updated_or_moved_or_turned == "updated":
-                                self._update_cells(value)
-                                print('updated_cells: {}'.format(value)) # sensor_reading
-                            elif updated_or_moved_or_turned == "moved":
-                                self._move_robot(value)
-                                print('moved robot: {}'.format(MOVEMENTS[value])) # sensor_reading
-                            elif updated_or_moved_or_turned == "turned":
-                                self._turn_head(self._facing, value)
-                                print('turned robot: {}'.format(MOVEMENTS[value])) # sensor_reading
-                            else:
-                                # invalid (no path find)
-                                break
-
-                            if is_complete:
-                                enable_print()
-                                print_map_info(self._robot)
-                                disable_print()
-                                break
-
-                            print_map_info(self._robot)
-
-                        break
-
-                # Returning to start after completion
-                enable_print()
-                print("Returning to Start...")
-                disable_print()
-
-                while True:
-                    direction = run.send(0)
-                    sleep(timestep)
-                    self._move_robot(direction)
-
-            except StopIteration:
-                print_map_info(self._robot)
-                break
-
-        enable_print()
-        print('Exploration Done')
-        print('Filepath: ' + self._filename)
-        disable_print()
-
-        self._calibrate_after_exploration()
+        # Every step of the run is taken here and the canvas catches up on its next frame. The robot is given time to
+        # be seen after each step that moves or turns it.
+        pose = (self._robot.center, self._robot.facing)
+        for value in exploration.start():
+            _logger.debug('step: {}', value)
+            if (self._robot.center, self._robot.facing) != pose:
+                pose = (self._robot.center, self._robot.facing)
+                sleep(timestep)
+                self._time_spent = get_time_elapsed(start_time)
+            print_map_info(self._robot)
 
-        if IS_ARROW_SCAN:
-            # self._robot.postprocess_arrow_images()
-            if self._robot.arrows:
-                for y, x, facing in self._robot.arrows:
-                    self._draw_arrow(get_grid_index(y, x), facing)
+        _logger.info('Exploration Done')
+        _logger.info('Filepath: {}', self._filename)
+
+        self._calibrate_after_exploration(timestep)
 
-        enable_print()
         print_map_info(self._robot)
-        disable_print()
 
-    def _calibrate_after_exploration(self):
+    def _calibrate_after_exploration(self, timestep):
         """
         Post-exploration calibration to prepare the robot for the fastest path.
 
+        :param timestep: The number of seconds to wait before the robot turns.
         :return: N/A
         """
-        enable_print()
-        print('Calibrating for fast path...')
-        disable_print()
+        _logger.info('Calibrating for fast path...')
 
-        timestep = float(self._timestep_entry.get().strip())
         self._fastest_path = self._find_fastest_path()
 
         sleep(timestep)
         self._robot.turn_robot(self._fastest_path[0])
-        self._turn_head(self._facing, self._fastest_path[0])
 
         self._fastest_path[0] = FORWARD
 
-        enable_print()
-        print('Calibrating Done!')
-        disable_print()
+        _logger.info('Calibrating Done!')
 
     def _find_fastest_path(self):
         """Calculate and return the set of moves required for the fastest path."""
-        from Algo.sim_robot import Robot
-        clone_robot = Robot(exploration_status=self._robot.exploration_status,
-                            facing=self._robot.facing,
-                            discovered_map=self._robot.discovered_map,
-                            real_map=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)])
-
-        fastest_path_start_way_point = get_shortest_path_moves(clone_robot,
-                                                               start=(1, 1),
-                                                               goal=self._way_point)
-
-        if fastest_path_start_way_point:
-            for move in fastest_path_start_way_point:
-                clone_robot.move_robot(move)
-
-        before_way_point = previous_cell(clone_robot.center, clone_robot.facing)
-
-        fastest_path_way_point_goal = get_shortest_path_moves(clone_robot,
-                                                              start=self._way_point,
-                                                              goal=(18, 13),
-                                                              before_start_point=before_way_point)
-
-        return fastest_path_start_way_point + fastest_path_way_point_goal
+        with tracer.span(PHASE_PLANNER):
+            return get_way_point_solver(self._robot).get_moves(self._way_point)
 
     def _move_fastest_path(self):
         """Move the robot along the fastest path."""
+        timestep = float(self._timestep_entry.get().strip())
+        self._start(self._run_fastest_path, timestep)
+
+    def _run_fastest_path(self, timestep):
+        """
+        Move the robot along the fastest path, in the worker thread.
+
+        :param timestep: The number of seconds to wait before every move of the robot.
+        :return: N/A
+        """
         if self._fastest_path:
             self._robot.is_fast_path = True
-            timestep = float(self._timestep_entry.get().strip())
             for move in self._fastest_path:
                 sleep(timestep)
                 self._robot.move_robot(move)
-                self._move_robot(move)
-            enable_print()
-            print('Reached GOAL!')
-            print('Filepath: ' + self._filename)
-            disable_print()
+            _logger.info('Reached GOAL!')
+            _logger.info('Filepath: {}', self._filename)
         else:
-            enable_print()
-            print("No valid path")
-            disable_print()
+            _logger.warning("No valid path")
 
     def _draw_grid(self):
         """Draw the virtual maze."""
         self._grid_squares = []
 
-        for y in range(COL_LENGTH):
+        for y in range(self._grid.rows):
             temp_row = []
-            for x in range(ROW_LENGTH):
-                temp_square = self._canvas.create_rectangle(x * self._grid_size, (COL_LENGTH - 1 - y) * self._grid_size,
+            for x in range(self._grid.cols):
+                temp_square = self._canvas.create_rectangle(x * self._grid_size,
+                                                            (self._grid.rows - 1 - y) * self._grid_size,
                                                             (x + 1) * self._grid_size,
-                                                            (COL_LENGTH - y) * self._grid_size, width=3)
+                                                            (self._grid.rows - y) * self._grid_size, width=3)
 
                 self._canvas.tag_bind(temp_square, "<Button-1>",
                                       lambda event, arg=temp_square: self._on_grid_click(event, arg))
@@ -310,196 +254,80 @@ class Window(Frame):
 
             self._grid_squares.append(temp_row)
 
-    def _draw_robot(self, location, facing):
-        """Draw the robot in a given location with a given facing."""
-        if location in BORDERS[NORTH] or location in BORDERS[SOUTH] \
-                or location in BORDERS[EAST] or location in BORDERS[WEST]:
-            print("invalid location")
+    def _render_frame(self):
+        """Bring the canvas up to date with the robot, and schedule the next frame."""
+        self.after(1000 // self._frame_rate, self._render_frame)
+
+        self._render_cells()
+        if IS_ARROW_SCAN:
+            self._render_arrows()
+        self._render_robot()
+
+        if self._time_spent != self._drawn_time_spent:
+            self._drawn_time_spent = self._time_spent
+            self._time_spent_label.config(text="%.2f" % self._time_spent + "s")
+
+    def _render_cells(self):
+        """Repaint the cells whose state changed since the last frame."""
+        map_state = self._robot.map_state
+        # The states can only have changed if the map was written to or a cell was explored since the last frame.
+        version = (map_state.version, map_state.explored_count)
+        if version == self._drawn_version:
             return
 
-        top_left_grid = self._canvas.coords(location + ROW_LENGTH - 1)
-        x = top_left_grid[0]
-        y = top_left_grid[1]
+        states = map_state.get_cell_states()
+        for index, (state, drawn_state) in enumerate(zip(states, self._drawn_states)):
+            if state != drawn_state:
+                self.mark_cell(index + 1, self._get_cell_type(index + 1, state))
 
-        self._robot_graphic = self._canvas.create_oval(x, y, x + (3 * self._grid_size), y + (3 * self._grid_size),
-                                                       width=2, fill="#354458", outline="#252a33")
-        self._draw_head(location, facing)
+        self._drawn_states = states
+        self._drawn_version = version
+        self._completion_label.config(text=(str(self._robot.get_completion_count())))
 
-    def _draw_head(self, location, facing):
-        """Draw the head of the robot based on the robot's location and facing."""
-        if facing == NORTH:
-            corner = self._canvas.coords(location + ROW_LENGTH)
-        elif facing == SOUTH:
-            corner = self._canvas.coords(location - ROW_LENGTH)
-        elif facing == EAST:
-            corner = self._canvas.coords(location + 1)
-        else:
-            corner = self._canvas.coords(location - 1)
-        x, y = corner[0], corner[1]
-        self._head = self._canvas.create_oval(x + (self._grid_size // 3), y + (self._grid_size // 3),
-                                              x + (2 * (self._grid_size // 3)) + 1,
-                                              y + (2 * (self._grid_size // 3)) + 1,
-                                              width=0, fill="#7acdc8")
-
-    def _turn_head(self, facing, direction):
-        """Move the graphical head of the robot in a certain direction."""
-        if facing == NORTH:
-            if direction == LEFT:
-                self._canvas.move(self._head, -self._grid_size, self._grid_size)
-                self._facing = WEST
-            elif direction == RIGHT:
-                self._canvas.move(self._head, self._grid_size, self._grid_size)
-                self._facing = EAST
-            elif direction == BACKWARD:
-                self._canvas.move(self._head, 0, self._grid_size * 2)
-                self._facing = SOUTH
-        elif facing == SOUTH:
-            if direction == LEFT:
-                self._canvas.move(self._head, self._grid_size, -self._grid_size)
-                self._facing = EAST
-            elif direction == RIGHT:
-                self._canvas.move(self._head, -self._grid_size, -self._grid_size)
-                self._facing = WEST
-            elif direction == BACKWARD:
-                self._canvas.move(self._head, 0, -self._grid_size * 2)
-                self._facing = NORTH
-        elif facing == EAST:
-            if direction == LEFT:
-                self._canvas.move(self._head, -self._grid_size, -self._grid_size)
-                self._facing = NORTH
-            elif direction == RIGHT:
-                self._canvas.move(self._head, -self._grid_size, self._grid_size)
-                self._facing = SOUTH
-            elif direction == BACKWARD:
-                self._canvas.move(self._head, -self._grid_size * 2, 0)
-                self._facing = WEST
+    def _get_cell_type(self, cell_index, state):
+        """Return the colour of a cell in a given state."""
+        if state == CELL_UNEXPLORED:
+            return UNEXPLORED
+        elif cell_index in self._start_cells:
+            return START_AREA
+        elif cell_index in self._goal_cells:
+            return GOAL_AREA
+        elif state == CELL_FREE:
+            return EXPLORED
+        return OBSTACLE
+
+    def _render_arrows(self):
+        """Draw the arrows found since the last frame."""
+        arrows = self._robot.arrows
+        for y, x, facing in arrows[len(self._arrow_graphics):]:
+            self._arrow_graphics.append(self._draw_arrow(self._grid.get_grid_index(y, x), facing))
+
+    def _render_robot(self):
+        """Move the robot and its head to where the robot is now."""
+        pose = (self._robot.center, self._robot.facing)
+        if pose == self._drawn_pose:
+            return
+        self._drawn_pose = pose
+
+        y, x = self._grid.get_matrix_coords(self._robot.center)
+        left, top = self._get_cell_corner(y + 1, x - 1)
+        self._canvas.coords(self._robot_graphic, left, top, left + (3 * self._grid_size), top + (3 * self._grid_size))
+
+        if self._robot.facing == NORTH:
+            y += 1
+        elif self._robot.facing == SOUTH:
+            y -= 1
+        elif self._robot.facing == EAST:
+            x += 1
         else:
-            if direction == LEFT:
-                self._canvas.move(self._head, self._grid_size, self._grid_size)
-                self._facing = SOUTH
-            elif direction == RIGHT:
-                self._canvas.move(self._head, self._grid_size, -self._grid_size)
-                self._facing = NORTH
-            elif direction == BACKWARD:
-                self._canvas.move(self._head, self._grid_size * 2, 0)
-                self._facing = EAST
+            x -= 1
+        left, top = self._get_cell_corner(y, x)
+        self._canvas.coords(self._head, left + (self._grid_size // 3), top + (self._grid_size // 3),
+                            left + (2 * (self._grid_size // 3)) + 1, top + (2 * (self._grid_size // 3)) + 1)
 
-        self.update()
-
-    def _move_robot(self, direction):
-        """Move the graphical robot in a certain direction."""
-        switcher = {
-            NORTH: self._north_facing_move,
-            SOUTH: self._south_facing_move,
-            EAST: self._east_facing_move,
-            WEST: self._west_facing_move
-        }
-
-        f = switcher.get(self._facing)
-
-        if direction == BACKWARD:
-            self._turn_head(self._facing, RIGHT)
-            self._turn_head(self._facing, RIGHT)
-        elif direction != FORWARD:
-            self._turn_head(self._facing, direction)
-
-        f(direction)
-
-    def _north_facing_move(self, direction):
-        """Move the graphical robot as it is facing north."""
-        switcher = {
-            FORWARD: self._move_up,
-            LEFT: self._move_left,
-            RIGHT: self._move_right,
-            BACKWARD: self._move_down
-        }
-
-        f = switcher.get(direction)
-
-        f()
-
-    def _south_facing_move(self, direction):
-        """Move the graphical robot as it is facing south."""
-        switcher = {
-            FORWARD: self._move_down,
-            LEFT: self._move_right,
-            RIGHT: self._move_left,
-            BACKWARD: self._move_up
-        }
-
-        f = switcher.get(direction)
-
-        f()
-
-    def _east_facing_move(self, direction):
-        """Move the graphical robot as it is facing east."""
-        switcher = {
-            FORWARD: self._move_right,
-            LEFT: self._move_up,
-            RIGHT: self._move_down,
-            BACKWARD: self._move_left
-        }
-
-        f = switcher.get(direction)
-
-        f()
-
-    def _west_facing_move(self, direction):
-        """Move the graphical robot as it is facing west."""
-        switcher = {
-            FORWARD: self._move_left,
-            LEFT: self._move_down,
-            RIGHT: self._move_up,
-            BACKWARD: self._move_right
-        }
-
-        f = switcher.get(direction)
-
-        f()
-
-    def _move_up(self):
-        """Move the graphical robot toward the top of the maze regardless of its facing."""
-        self._canvas.move(self._robot_graphic, 0, -self._grid_size)
-        self._canvas.move(self._head, 0, -self._grid_size)
-        self.update()
-
-    def _move_left(self):
-        """Move the graphical robot toward the left of the maze regardless of its facing."""
-        self._canvas.move(self._robot_graphic, -self._grid_size, 0)
-        self._canvas.move(self._head, -self._grid_size, 0)
-        self.update()
-
-    def _move_right(self):
-        """Move the graphical robot toward the right of the maze regardless of its facing."""
-        self._canvas.move(self._robot_graphic, self._grid_size, 0)
-        self._canvas.move(self._head, self._grid_size, 0)
-        self.update()
-
-    def _move_down(self):
-        """Move the graphical robot toward the right of the maze regardless of its facing."""
-        self._canvas.move(self._robot_graphic, 0, self._grid_size)
-        self._canvas.move(self._head, 0, self._grid_size)
-        self.update()
-
-    def _update_cells(self, updated_cells):
-        """Repaint the cells that have been updated."""
-        start_cells = get_robot_cells(START)
-        goal_cells = get_robot_cells(GOAL)
-        for cell, value in updated_cells.items():
-            if cell in start_cells:
-                self.mark_cell(cell, START_AREA)
-            elif cell in goal_cells:
-                self.mark_cell(cell, GOAL_AREA)
-            elif not value:
-                self.mark_cell(cell, EXPLORED)
-            else:
-                self.mark_cell(cell, OBSTACLE)
-
-        if IS_ARROW_SCAN:
-            for y, x, facing in self._robot.arrows:
-                self._draw_arrow(get_grid_index(y, x), facing)
-
-        self._completion_label.config(text=(str(self._robot.get_completion_count())))
+    def _get_cell_corner(self, y, x):
+        """Return the canvas coordinates of the top left corner of a cell."""
+        return x * self._grid_size, (self._grid.rows - 1 - y) * self._grid_size
 
     def _load_map(self):
         """
@@ -510,13 +338,13 @@ class Window(Frame):
         self._filename = askopenfilename(title="Select Map Descriptor", filetypes=[("Text Files (*.txt)", "*.txt")])
 
         if self._filename:
-            print(self._filename)
+            _logger.debug('{}', self._filename)
             if self._parse_map(self._filename):
                 self._paint_map()
                 return True
-            print("File %s cannot be parsed" % self._filename)
+            _logger.debug('File {} cannot be parsed', self._filename)
             return False
-        print("File %s does not exist" % self._filename)
+        _logger.debug('File {} does not exist', self._filename)
         return False
 
     def _mark_way_point(self, grid_num):
@@ -536,36 +364,30 @@ class Window(Frame):
         :param filename: The name of the map descriptor file
         :return: True if the file is able to be successfully parsed, false otherwise.
         """
-        file = open(filename, mode="r")
-        map_str = file.read()
-
-        match = re.fullmatch("[012345\n]*", map_str)
-        if match:
-            self._grid_map = []
-            row_strings = map_str.split("\n")
-            for row_string in row_strings[:NUM_ROWS]:
-                grid_row = []
-                for char in row_string:
-                    bit = int(char)
-                    grid_row.append(bit)
-                self._grid_map.append(grid_row)
-            return True
+        grid_map = read_arena(filename)
+        if grid_map is None:
+            return False
 
-        return False
+        self._grid_map = grid_map
+        return True
 
     def _paint_map(self):
         """Paint the unexplored map on the grid."""
-        for i in range(NUM_ROWS):
-            for j in range(NUM_COLS):
-                grid_num = i * ROW_LENGTH + j + 1
+        for i in range(self._grid.rows):
+            for j in range(self._grid.cols):
+                grid_num = i * self._grid.cols + j + 1
                 self.mark_cell(grid_num, UNEXPLORED)
 
+        # Repaint the cells the robot has explored on the next frame
+        self._drawn_states = bytearray(self._grid.rows * self._grid.cols)
+        self._drawn_version = None
+
     def mark_cell(self, cell_index, cell_type):
         """Mark a cell as a certain type."""
         self._canvas.itemconfig(cell_index, fill=cell_type)
-        self.update()
 
     def _draw_arrow(self, location, facing):
+        """Draw an arrow on a cell pointing in a given facing, and return its canvas item."""
         top_left_grid = self._canvas.coords(location)
         x, y = top_left_grid[0], top_left_grid[1]
 
@@ -578,13 +400,13 @@ class Window(Frame):
         else:
             points = [x + self._grid_size, y, x + self._grid_size, y + self._grid_size, x, y + self._grid_size/2]
 
-        self._canvas.create_polygon(points, fill='gold', width=3)
+        return self._canvas.create_polygon(points, fill='gold', width=3)
 
     def _on_grid_click(self, event, arg):
         """Mark a cell as the waypoint."""
 
-        self._way_point = (19 - int(event.y/30), int(event.x/30))
-        self._mark_way_point(self._way_point[0] * ROW_LENGTH + self._way_point[1] + 1)
+        self._way_point = (self._grid.flip_row(int(event.y/self._grid_size)), int(event.x/self._grid_size))
+        self._mark_way_point(self._grid.get_grid_index(*self._way_point))
         event.widget.itemconfig(arg, activefill="#00ffff")
 
 
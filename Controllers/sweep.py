@@ -0,0 +1,113 @@
+from itertools import product
+from multiprocessing import Pool, cpu_count
+
+from Utils.utils import *
+from Controllers.batch import CSV_FIELDS, simulate
+
+"""This module explores every arena under every combination of a grid of settings, across all cores."""
+
+__author__ = 'MDPTeam15'
+
+# The settings a variant can change, with the value each takes when a grid leaves it out.
+DEFAULT_VARIANT = {
+    'calibration_side_steps': CALIBRATION_SIDE_STEPS,
+    # None explores every cell of the arena, whatever its size.
+    'explore_limit': None,
+    'time_limit': TIME_LIMITE,
+    'is_arrow_scan': IS_ARROW_SCAN,
+    'sensor_ranges': None
+}
+
+# Columns written to the CSV table: the variant first, then the results of the run.
+SWEEP_CSV_FIELDS = ['variant'] + sorted(DEFAULT_VARIANT) + CSV_FIELDS
+
+# Columns of the summary of each variant over all arenas.
+SUMMARY_FIELDS = ['variant', 'arenas', 'complete', 'mean_explored', 'mean_steps', 'max_steps', 'wrong_cells',
+                  'mean_path_length', 'mean_turns', 'mean_calibrations', 'arrows_found', 'wall_clock']
+
+
+def expand_grid(grid):
+    """
+    List every combination of the values in a grid of settings.
+
+    :param grid: A dict from the name of a setting in DEFAULT_VARIANT to the list of values to try.
+    :return: The list of variants, each a dict with a value for every setting in DEFAULT_VARIANT.
+    """
+    for name in grid:
+        if name not in DEFAULT_VARIANT:
+            raise ValueError('Unknown setting {}'.format(name))
+
+    names = sorted(grid)
+    variants = []
+    for values in product(*[grid[name] for name in names]):
+        variant = dict(DEFAULT_VARIANT)
+        variant.update(zip(names, values))
+        variants.append(variant)
+    return variants
+
+
+def run_sweep(filenames, variants, processes=None):
+    """
+    Explore every arena under every variant, spreading the runs over a pool of processes.
+
+    :param filenames: The names of the arena files.
+    :param variants: The list of variants, as returned by expand_grid.
+    :param processes: The number of processes to use, or None for one per core.
+    :return: The merged table of results, one dict per run, holding the index of the variant, its settings and the
+             results of simulate(). The rows are ordered by variant, then by arena.
+    """
+    jobs = [(index, variant, filename) for index, variant in enumerate(variants) for filename in filenames]
+    if not jobs:
+        return []
+
+    processes = min(processes or cpu_count(), len(jobs))
+    if processes == 1:
+        records = [_run_job(job) for job in jobs]
+    else:
+        with Pool(processes) as pool:
+            records = pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // (processes * 4)))
+    return records
+
+
+def summarize(records):
+    """
+    Sum up the results of each variant over all arenas.
+
+    :param records: The table returned by run_sweep.
+    :return: One dict per variant, with the fields in SUMMARY_FIELDS, in the order of the variants.
+    """
+    groups = {}
+    for record in records:
+        if record['is_parsed']:
+            groups.setdefault(record['variant'], []).append(record)
+
+    summaries = []
+    for variant in sorted(groups):
+        group = groups[variant]
+        count = len(group)
+        summaries.append({
+            'variant': variant,
+            'arenas': count,
+            'complete': sum(record['is_complete'] for record in group),
+            'mean_explored': round(sum(record['explored'] for record in group) / count, 2),
+            'mean_steps': round(sum(record['steps'] for record in group) / count, 2),
+            'max_steps': max(record['steps'] for record in group),
+            'wrong_cells': sum(record['wrong_cells'] for record in group),
+            'mean_path_length': round(sum(record['path_length'] for record in group) / count, 2),
+            'mean_turns': round(sum(record['turns'] for record in group) / count, 2),
+            'mean_calibrations': round(sum(record['side_calibrations'] + record['front_calibrations']
+                                           for record in group) / count, 2),
+            'arrows_found': sum(record['arrows_found'] for record in group),
+            'wall_clock': round(sum(record['wall_clock'] for record in group), 4)
+        })
+    return summaries
+
+
+def _run_job(job):
+    """ Explore one arena under one variant. """
+    index, variant, filename = job
+    record = simulate(filename, variant['explore_limit'], variant['time_limit'], variant['is_arrow_scan'],
+                      variant['calibration_side_steps'], variant['sensor_ranges'])
+    record['variant'] = index
+    record.update(variant)
+    return record
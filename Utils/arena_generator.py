@@ -0,0 +1,214 @@
+import random
+from collections import deque
+
+from Utils.constants import NORTH, EAST, SOUTH, WEST
+from Utils.grid import ARENA_GRID
+from Utils.arena_library import FIRST_ARROW
+
+"""This module generates random arenas that follow the conventions of the hand-drawn ones under Maps/."""
+
+# The obstacle pieces drawn by hand, as the (row, col) of their cells from their top left, with how often each is
+# picked. Most are single blocks, bars of three and walls of six, with a few L and T shapes.
+SHAPES = {
+    'block': ([(0, 0)], 10),
+    'bar2': ([(0, 0), (0, 1)], 2),
+    'bar3': ([(0, 0), (0, 1), (0, 2)], 8),
+    'wall6': ([(0, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5)], 2),
+    'square': ([(0, 0), (0, 1), (1, 0), (1, 1)], 1),
+    'l': ([(0, 0), (1, 0), (1, 1), (1, 2)], 2),
+    't': ([(0, 0), (0, 1), (0, 2), (1, 1)], 1),
+}
+
+# Ready-made settings, from arenas like the hand-drawn ones to pathological ones.
+PRESETS = {
+    # As dense as the hand-drawn arenas, with room for the robot between the obstacles.
+    'standard': {'density': 0.09, 'corridor_width': 2, 'arrow_count': 5},
+    'sparse': {'density': 0.03, 'corridor_width': 3, 'arrow_count': 3},
+    'dense': {'density': 0.2, 'corridor_width': 1, 'arrow_count': 5},
+    # Obstacles packed as tight as they go, which makes narrow dead ends and pockets the robot cannot reach.
+    'maze': {'density': 0.35, 'corridor_width': 1, 'arrow_count': 8, 'shapes': ['bar3', 'wall6', 'l']},
+    # Scattered single blocks, so nearly every reading sees a different obstacle.
+    'scatter': {'density': 0.12, 'corridor_width': 1, 'arrow_count': 10, 'shapes': ['block']},
+    # As dense as 'maze' with the pieces side by side, so the goal is all but always walled off.
+    'blocked': {'density': 0.35, 'corridor_width': 0, 'arrow_count': 5, 'is_path_required': False},
+}
+
+# The most pieces tried per arena before settling for a lower density than asked for, on an arena of the size of the
+# real one, and in proportion to the number of cells on others.
+MAX_PLACEMENTS = 500
+
+# The offset from an obstacle to the cell a camera facing each direction sees its arrow from, in (row, col) with the
+# top row first.
+_CAMERA_OFFSETS = {NORTH: (1, 0), EAST: (0, -1), SOUTH: (-1, 0), WEST: (0, 1)}
+
+
+def generate_arena(rng, density=0.09, corridor_width=2, arrow_count=5, shapes=None, is_path_required=True,
+                   rows=ARENA_GRID.rows, cols=ARENA_GRID.cols):
+    """
+    Generate a random arena.
+
+    Pieces of the given shapes are dropped at random spots, turned at random, until the share of obstacle cells reaches
+    the density, or MAX_PLACEMENTS pieces have been tried. The start and goal zones, the 3 by 3 corners at the bottom
+    left and top right, are kept free.
+
+    :param rng: The random.Random to draw from, which makes the arena reproducible from its seed.
+    :param density: The share of the cells to make obstacles.
+    :param corridor_width: The fewest free cells between two pieces, in every direction including diagonals. The robot
+                           fits between two pieces 3 apart.
+    :param arrow_count: The number of arrows to put on the faces of obstacles that have a free cell in front.
+    :param shapes: The names of the shapes in SHAPES to use, or None for all of them.
+    :param is_path_required: Whether the robot must be able to drive from the start zone to the goal zone.
+    :param rows: The number of rows of the arena.
+    :param cols: The number of columns of the arena.
+    :return: The real map as a list of rows, top row first, in the format of the arena files.
+    """
+    # Every shape is in the pool as many times as its weight.
+    pool = [name for name in (shapes or sorted(SHAPES)) for _ in range(SHAPES[name][1])]
+
+    grid_map = [[0] * cols for _ in range(rows)]
+    # Cells no piece may cover: the zones, and the cells around each piece placed.
+    blocked = _get_zone_cells(rows, cols)
+    target = int(round(density * rows * cols))
+    obstacle_count = 0
+    # The cells the robot covers on its way from the start to the goal. A piece off them cannot cut the way off.
+    path_cells = _find_path_cells(grid_map)
+
+    for _ in range(MAX_PLACEMENTS * rows * cols // ARENA_GRID.size):
+        if obstacle_count >= target:
+            break
+        cells = _turn(SHAPES[rng.choice(pool)][0], rng.randrange(4))
+        row = rng.randrange(rows)
+        col = rng.randrange(cols)
+        cells = [(row + r, col + c) for r, c in cells]
+        if any(not (0 <= r < rows and 0 <= c < cols) or (r, c) in blocked for r, c in cells):
+            continue
+
+        for r, c in cells:
+            grid_map[r][c] = 1
+        # A piece that cuts the robot off from the goal is taken away again.
+        if is_path_required and not path_cells.isdisjoint(cells):
+            new_path_cells = _find_path_cells(grid_map)
+            if new_path_cells is None:
+                for r, c in cells:
+                    grid_map[r][c] = 0
+                continue
+            path_cells = new_path_cells
+
+        for r, c in cells:
+            for dr in range(-corridor_width, corridor_width + 1):
+                for dc in range(-corridor_width, corridor_width + 1):
+                    blocked.add((r + dr, c + dc))
+        obstacle_count += len(cells)
+
+    _place_arrows(rng, grid_map, arrow_count)
+    return grid_map
+
+
+def generate_arenas(count, seed, preset='standard', **settings):
+    """
+    Generate arenas, each reproducible on its own from the seed and its index.
+
+    :param count: The number of arenas.
+    :param seed: The seed of the arenas.
+    :param preset: The name of the settings in PRESETS to start from.
+    :param settings: Settings of generate_arena that override the preset.
+    :return: A list of (name, real map), the names telling the preset, the seed and the index, and the size if it is not
+             the size of the real arena.
+    """
+    arguments = dict(PRESETS[preset])
+    arguments.update(settings)
+    prefix = preset
+    rows = arguments.get('rows', ARENA_GRID.rows)
+    cols = arguments.get('cols', ARENA_GRID.cols)
+    if (rows, cols) != (ARENA_GRID.rows, ARENA_GRID.cols):
+        prefix += '_{}x{}'.format(rows, cols)
+
+    arenas = []
+    for index in range(count):
+        rng = random.Random('{}-{}'.format(seed, index))
+        arenas.append(('{}_{}_{}'.format(prefix, seed, index), generate_arena(rng, **arguments)))
+    return arenas
+
+
+def format_arena(grid_map):
+    """ Write a real map in the format of the arena files. """
+    return '\n'.join(''.join(str(value) for value in row) for row in grid_map)
+
+
+def _turn(cells, turns):
+    """ Turn the cells of a shape clockwise a number of quarter turns, and move it back to start at (0, 0). """
+    for _ in range(turns):
+        cells = [(c, -r) for r, c in cells]
+    top = min(r for r, c in cells)
+    left = min(c for r, c in cells)
+    return [(r - top, c - left) for r, c in cells]
+
+
+def _get_zone_cells(rows, cols):
+    """ Return the cells of the start zone at the bottom left and the goal zone at the top right. """
+    zones = set()
+    for r in range(3):
+        for c in range(3):
+            zones.add((rows - 1 - r, c))
+            zones.add((r, cols - 1 - c))
+    return zones
+
+
+def _find_path_cells(grid_map):
+    """
+    Find a way for the robot, 3 by 3, from the center of the start zone to the center of the goal zone.
+
+    :param grid_map: The real map, top row first.
+    :return: The set of cells the robot covers along the shortest way, or None if there is none.
+    """
+    rows = len(grid_map)
+    cols = len(grid_map[0])
+
+    def fits(row, col):
+        return (1 <= row < rows - 1 and 1 <= col < cols - 1
+                and not any(grid_map[row + dr][col + dc] for dr in (-1, 0, 1) for dc in (-1, 0, 1)))
+
+    start = (rows - 2, 1)
+    goal = (1, cols - 2)
+    parents = {start: None}
+    queue = deque([start])
+    while queue:
+        center = queue.popleft()
+        if center == goal:
+            cells = set()
+            while center is not None:
+                cells.update((center[0] + dr, center[1] + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1))
+                center = parents[center]
+            return cells
+
+        row, col = center
+        for next_center in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+            if next_center not in parents and fits(*next_center):
+                parents[next_center] = center
+                queue.append(next_center)
+    return None
+
+
+def _place_arrows(rng, grid_map, arrow_count):
+    """ Put arrows on obstacles, each on a face with a free cell in front of it for the camera to see it from. """
+    rows = len(grid_map)
+    cols = len(grid_map[0])
+    faces = []
+    for r in range(rows):
+        for c in range(cols):
+            if grid_map[r][c] != 1:
+                continue
+            for camera_facing in (NORTH, EAST, SOUTH, WEST):
+                dr, dc = _CAMERA_OFFSETS[camera_facing]
+                if 0 <= r + dr < rows and 0 <= c + dc < cols and grid_map[r + dr][c + dc] == 0:
+                    faces.append((r, c, camera_facing))
+
+    rng.shuffle(faces)
+    placed = 0
+    for r, c, camera_facing in faces:
+        if placed == arrow_count:
+            break
+        # An arena file has room for one arrow per obstacle.
+        if grid_map[r][c] == 1:
+            grid_map[r][c] = FIRST_ARROW + camera_facing
+            placed += 1
@@ -0,0 +1,218 @@
+import mmap
+import re
+import struct
+
+from Utils.grid import ARENA_GRID, Grid
+
+"""This module reads arenas, from the text files under Maps/ or from a packed binary library of many arenas."""
+
+# The characters of an arena file: 0 is a free cell, 1 an obstacle, and 2 to 5 an obstacle with an arrow on the face
+# seen by a camera facing NORTH, EAST, SOUTH or WEST respectively.
+ARENA_PATTERN = re.compile('[012345\n]*')
+FIRST_ARROW = 2
+
+# The way point written in the name of an arena file, such as week10_2_WP(10,12), as (col, row) like the Android.
+WAY_POINT_PATTERN = re.compile(r'WP\((\d+),(\d+)\)')
+
+LIBRARY_EXTENSION = '.mdpa'
+LIBRARY_MAGIC = b'MDPA'
+LIBRARY_VERSION = 2
+
+# The header of a library: magic, version, number of rows, number of columns and number of arenas.
+_HEADER = struct.Struct('<4sHHHI')
+# The fixed part of the entry of an arena, followed by its obstacle bitmap: offset of its data, length of its name,
+# number of arrows, and the col and row of its way point, or -1 if it has none.
+_ENTRY = struct.Struct('<IHHhh')
+# An arrow in the data of an arena, as (cell << 2) | face, with the cells numbered row by row from the top left.
+_ARROW = struct.Struct('<I')
+
+# The largest arenas the fields above hold: the way point is signed, and the cell of an arrow has 30 bits.
+MAX_LIBRARY_SIDE = 2 ** 15 - 1
+MAX_LIBRARY_CELLS = 2 ** 30
+
+# Turns the digits of a binary string into bytes holding the values of the digits.
+_BINARY_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def parse_arena(map_str, grid=ARENA_GRID):
+    """
+    Parse the text of an arena file.
+
+    :param map_str: The text of the file.
+    :param grid: The Grid the arena must have, or None to take the size from the text, every row as long as the first.
+    :return: The real map as a list of rows, top row first, or None if the text cannot be parsed.
+    """
+    if not ARENA_PATTERN.fullmatch(map_str):
+        return None
+
+    row_strings = map_str.split("\n")
+    if grid is None:
+        row_strings = [row_string for row_string in row_strings if row_string]
+        if len(row_strings) < 3 or len(row_strings[0]) < 3:
+            return None
+        grid = Grid(len(row_strings), len(row_strings[0]))
+
+    grid_map = [[int(char) for char in row_string] for row_string in row_strings[:grid.rows]]
+    if len(grid_map) != grid.rows or any(len(row) != grid.cols for row in grid_map):
+        return None
+    return grid_map
+
+
+def read_arena(filename, grid=ARENA_GRID):
+    """
+    Read an arena file.
+
+    :param filename: The name of the arena file.
+    :param grid: The Grid the arena must have, or None to take the size from the file.
+    :return: The real map as a list of rows, top row first, or None if the file cannot be parsed.
+    """
+    with open(filename, mode="r") as file:
+        return parse_arena(file.read(), grid)
+
+
+def get_way_point(name):
+    """ Return the way point written in the name of an arena as (col, row), or None if it has none. """
+    match = WAY_POINT_PATTERN.search(name)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def write_library(filename, arenas):
+    """
+    Pack arenas into a library file.
+
+    The file starts with a header, followed by one fixed-size entry per arena holding its obstacle bitmap, then by the
+    names and arrows of the arenas. The bitmap has one bit per cell, row by row from the top left, most significant
+    bit first. Every number is little-endian.
+
+    :param filename: The name of the library file.
+    The arenas may have up to MAX_LIBRARY_SIDE rows and cols and MAX_LIBRARY_CELLS cells, and up to 65535 arrows each.
+
+    :param arenas: A list of (name, real map, way point as (col, row) or None), every map the same size.
+    :return: N/A
+    """
+    rows = len(arenas[0][1]) if arenas else ARENA_GRID.rows
+    cols = len(arenas[0][1][0]) if arenas else ARENA_GRID.cols
+    if rows > MAX_LIBRARY_SIDE or cols > MAX_LIBRARY_SIDE or rows * cols > MAX_LIBRARY_CELLS:
+        raise ValueError('A library holds arenas of up to {} by {} and {} cells, not {} by {}'
+                         .format(MAX_LIBRARY_SIDE, MAX_LIBRARY_SIDE, MAX_LIBRARY_CELLS, rows, cols))
+    bitmap_length = _get_bitmap_length(rows, cols)
+    data_offset = _HEADER.size + len(arenas) * (_ENTRY.size + bitmap_length)
+
+    entries = []
+    data = []
+    for name, grid_map, way_point in arenas:
+        if len(grid_map) != rows or any(len(row) != cols for row in grid_map):
+            raise ValueError('Arena {} is not {} by {}'.format(name, rows, cols))
+
+        cells = [value for row in grid_map for value in row]
+        bitmap = 0
+        for value in cells:
+            bitmap = (bitmap << 1) | (value != 0)
+        bitmap <<= bitmap_length * 8 - len(cells)
+        arrows = [(cell << 2) | (value - FIRST_ARROW) for cell, value in enumerate(cells) if value >= FIRST_ARROW]
+        if len(arrows) > 0xffff:
+            raise ValueError('Arena {} has {} arrows, more than a library holds'.format(name, len(arrows)))
+        encoded_name = name.encode()
+        col, row = way_point if way_point is not None else (-1, -1)
+
+        entries.append(_ENTRY.pack(data_offset, len(encoded_name), len(arrows), col, row))
+        entries.append(bitmap.to_bytes(bitmap_length, 'big'))
+        data.append(encoded_name)
+        data.extend(_ARROW.pack(arrow) for arrow in arrows)
+        data_offset += len(encoded_name) + len(arrows) * _ARROW.size
+
+    with open(filename, mode="wb") as file:
+        file.write(_HEADER.pack(LIBRARY_MAGIC, LIBRARY_VERSION, rows, cols, len(arenas)))
+        file.write(b''.join(entries))
+        file.write(b''.join(data))
+
+
+def _get_bitmap_length(rows, cols):
+    return -(-rows * cols // 8)
+
+
+class ArenaLibrary:
+    """
+    This class reads the arenas of a library file, which is memory-mapped rather than read.
+
+    Opening a library only reads its header and the names of its arenas. An arena is unpacked from the mapped file
+    when it is asked for, so a library of any size opens at once, and processes that open the same library share its
+    pages.
+    """
+    def __init__(self, filename):
+        """
+        Open a library file.
+
+        :param filename: The name of the library file.
+        """
+        self.filename = filename
+        with open(filename, mode="rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            self.close()
+            raise ValueError('{} is not an arena library'.format(filename))
+        magic, version, self.rows, self.cols, count = _HEADER.unpack_from(self._mmap)
+        if magic != LIBRARY_MAGIC or version != LIBRARY_VERSION:
+            self.close()
+            raise ValueError('{} is not an arena library of version {}'.format(filename, LIBRARY_VERSION))
+
+        self._bitmap_length = _get_bitmap_length(self.rows, self.cols)
+        self._entry_size = _ENTRY.size + self._bitmap_length
+        self.names = []
+        for index in range(count):
+            data_offset, name_length, arrow_count, col, row = self._get_entry(index)
+            self.names.append(self._mmap[data_offset:data_offset + name_length].decode())
+        self._indexes = {name: index for index, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """ Unmap the file. """
+        self._mmap.close()
+
+    def _get_entry(self, index):
+        return _ENTRY.unpack_from(self._mmap, _HEADER.size + index * self._entry_size)
+
+    def get_index(self, name):
+        """ Return the index of the arena with a name, or None if the library has none. """
+        return self._indexes.get(name)
+
+    def get_arena(self, index):
+        """
+        Unpack an arena.
+
+        :param index: The index of the arena.
+        :return: The real map as a list of rows, top row first, the same as reading the arena file gives.
+        """
+        data_offset, name_length, arrow_count, col, row = self._get_entry(index)
+        bitmap_offset = _HEADER.size + index * self._entry_size + _ENTRY.size
+        bitmap = int.from_bytes(self._mmap[bitmap_offset:bitmap_offset + self._bitmap_length], 'big')
+
+        cell_count = self.rows * self.cols
+        cells = '{:0{}b}'.format(bitmap >> (self._bitmap_length * 8 - cell_count), cell_count).encode()
+        cells = cells.translate(_BINARY_DIGITS)
+        grid_map = [list(cells[start:start + self.cols]) for start in range(0, cell_count, self.cols)]
+
+        arrows_offset = data_offset + name_length
+        for (arrow,) in _ARROW.iter_unpack(self._mmap[arrows_offset:arrows_offset + arrow_count * _ARROW.size]):
+            cell = arrow >> 2
+            grid_map[cell // self.cols][cell % self.cols] = FIRST_ARROW + (arrow & 0b11)
+        return grid_map
+
+    def get_way_point(self, index):
+        """ Return the way point of an arena as (col, row), or None if it has none. """
+        data_offset, name_length, arrow_count, col, row = self._get_entry(index)
+        if col < 0:
+            return None
+        return col, row
@@ -1,7 +1,8 @@
 """ This module defines all the constants that are used throughout the program. """
 
 """ Constants to play with (Start)"""
-IS_DEBUG_MODE = False # Whether enable console printout at the cost of a slower run
+IS_DEBUG_MODE = False # Whether to log debug messages of every module, at the cost of a slower run
+LOG_LEVELS = {} # Levels of the modules logged differently from the rest, e.g. {'Algo.exploration': 'DEBUG'}
 IS_ARROW_SCAN = True # Whether scan for arrows during exploration
 CALIBRATION_SIDE_STEPS = 6 # Number of steps per side calibration
 CALIBRATION_FRONT_STEPS = 6 # Number of steps per front calibration
@@ -12,6 +13,8 @@ TIME_LIMITE = 330
 FAST_PATH_STEP = 6 # Maximum of number of straight moves
 FAST_PATH_SLEEP_SEC = 0.2 # Duration of delay per instruction during fast path
 ANDROID_FAST_PATH_SLEEP_SEC = 0.5
+ANDROID_UPDATE_INTERVAL_SEC = 0.1 # Shortest time between two updates to the Android; updates in between are merged
+ANDROID_KEYFRAME_EVERY = 20 # Number of delta updates to the Android between two full updates
 BATTERY_DRAINER_STEP_X = 2
 BATTERY_DRAINER_STEP_Y = 2
 BATTERY_DRAINER_TURN = 'D' #Clockwise
@@ -75,10 +78,9 @@ MOVEMENTS = {
 # y
 #   x  0    1    2    3    4    5    6    7    8    9    10   11   12   13   14
 
-NUM_ROWS = COL_LENGTH = 20                              # Number of rows in the grid; length of one col
-NUM_COLS = ROW_LENGTH = 15                              # Number of cols in the grid; length of one row
-START = 1 + ROW_LENGTH + 1                              # Center of Start area --> 17
-GOAL = (COL_LENGTH * ROW_LENGTH) - ROW_LENGTH - 1       # Center of Goal area --> 284
+# The size of the arena, the default of Utils.grid.Grid. Everything else about the grid is worked out by Grid.
+NUM_ROWS = 20                                           # Number of rows in the grid; length of one col
+NUM_COLS = 15                                           # Number of cols in the grid; length of one row
 
 # Communication Constants
 MOVE = 0
@@ -86,34 +88,6 @@ TURN = 1
 
 MOVE_TURN = {0: 'MOVE', 1: 'TURN'}
 
-# Limit                                                  Outer limits of the grid for the robot center
-TOP_LEFT_LIMIT = (COL_LENGTH * ROW_LENGTH) - (2 * ROW_LENGTH) + 2               # 272 (18, 1)
-TOP_RIGHT_LIMIT = GOAL                                                          # 284 (18, 13)
-BOTTOM_LEFT_LIMIT = START                                                       # 17  (1, 1)
-BOTTOM_RIGHT_LIMIT = 2 * ROW_LENGTH - 1                                         # 29  (1, 13)
-LIMITS = {NORTH: range(TOP_LEFT_LIMIT, TOP_RIGHT_LIMIT + 1),
-          SOUTH: range(BOTTOM_LEFT_LIMIT, BOTTOM_RIGHT_LIMIT + 1),
-          EAST: range(BOTTOM_RIGHT_LIMIT, TOP_RIGHT_LIMIT + 1, ROW_LENGTH),
-          WEST: range(BOTTOM_LEFT_LIMIT, TOP_LEFT_LIMIT + 1, ROW_LENGTH)}
-
-# Borders                                                 Borders of the grid; robot center cannot reach here
-TOP_LEFT_CORNER = (COL_LENGTH * ROW_LENGTH) - ROW_LENGTH + 1                    # 286  (19, 0)
-TOP_RIGHT_CORNER = COL_LENGTH * ROW_LENGTH                                      # 300  (19, 14)
-BOTTOM_LEFT_CORNER = 1                                                          # 1    (0,  0)
-BOTTOM_RIGHT_CORNER = ROW_LENGTH                                                # 15   (0,  14)
-BORDERS = {NORTH: range(TOP_LEFT_CORNER, TOP_RIGHT_CORNER + 1),
-           SOUTH: range(BOTTOM_LEFT_CORNER, BOTTOM_RIGHT_CORNER + 1),
-           EAST: range(BOTTOM_RIGHT_CORNER, TOP_RIGHT_CORNER + 1, ROW_LENGTH),
-           WEST: range(BOTTOM_LEFT_CORNER, TOP_LEFT_CORNER + 1, ROW_LENGTH)}
-
-
-# Efficient movement limits                               Limits of the grid if robot is to move efficiently ?
-E_LIMITS = {
-    NORTH: range(TOP_LEFT_LIMIT - ROW_LENGTH, TOP_RIGHT_LIMIT - ROW_LENGTH + 1),            # (17, 1) to (17, 13)
-    SOUTH: range(BOTTOM_LEFT_LIMIT + ROW_LENGTH, BOTTOM_RIGHT_LIMIT + ROW_LENGTH + 1),      # (2, 1) to (2, 13)
-    EAST: range(BOTTOM_RIGHT_LIMIT - 1, TOP_RIGHT_LIMIT - 1 + 1, ROW_LENGTH),               # (1, 12) to (18, 12)
-    WEST: range(BOTTOM_LEFT_LIMIT + 1, TOP_LEFT_LIMIT + 1 + 1, ROW_LENGTH)}                 # (1, 2) to (18, 2)
-
 # Sensor Constants
 #   N
 # 1  0  3
@@ -157,6 +131,8 @@ ARDUINO_TURN_LEFT = 'A'
 ARDUINO_TURN_RIGHT = 'D'
 ARDUINO_TURN_TO_BACKWARD = 'S'
 ARDUIMO_MOVED = 'M'
+ARDUINO_COMMAND_WINDOW = 1 # Number of commands sent to the Arduino before waiting for the oldest to be acknowledged
+ARDUINO_ACK_TIMEOUT = None # Seconds to wait for an acknowledgement before giving up the commands in flight
 
 # RPi
 API_TAKEN_PHOTO = 'I'
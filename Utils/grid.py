@@ -0,0 +1,104 @@
+from Utils.constants import NUM_ROWS, NUM_COLS, NORTH, EAST, SOUTH, WEST
+
+"""This module defines the size of the grid a robot explores and the numbering of its cells."""
+
+
+class Grid:
+    """
+    This class holds the size of a grid and turns the (y, x) coordinates of its cells into cell indexes and back.
+
+    Cells are numbered from 1, left to right and bottom to top, so cell y * cols + x + 1 is at (y, x), with y counted
+    from the bottom row. The start zone is the 3 by 3 corner at the bottom left and the goal zone the one at the top
+    right. The arena is 20 by 15, but every map, planner and codec takes its size from the Grid of the map it works on,
+    so the same code runs on larger grids.
+    """
+    def __init__(self, rows=NUM_ROWS, cols=NUM_COLS):
+        """
+        Define a grid.
+
+        :param rows: The number of rows, the length of one col.
+        :param cols: The number of cols, the length of one row.
+        """
+        if rows < 3 or cols < 3:
+            raise ValueError('A grid must be at least 3 by 3 to fit the robot, not {} by {}'.format(rows, cols))
+
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.start_point = (1, 1)
+        self.goal_point = (rows - 2, cols - 2)
+        self.start = self.get_grid_index(*self.start_point)
+        self.goal = self.get_grid_index(*self.goal_point)
+        # Cell index offset of one step towards each facing.
+        self.step_offsets = {NORTH: cols, EAST: 1, SOUTH: -cols, WEST: -1}
+
+    @classmethod
+    def of(cls, grid_map):
+        """ Return the Grid of a map given as a list of rows. """
+        return cls(len(grid_map), len(grid_map[0]))
+
+    def __eq__(self, other):
+        return isinstance(other, Grid) and (self.rows, self.cols) == (other.rows, other.cols)
+
+    def __hash__(self):
+        return hash((self.rows, self.cols))
+
+    def __repr__(self):
+        return 'Grid({}, {})'.format(self.rows, self.cols)
+
+    def get_matrix_coords(self, cell):
+        """ Calculate and return the yx coordinates of a given cell index. """
+        return (cell - 1) // self.cols, (cell - 1) % self.cols
+
+    def get_grid_index(self, y, x):
+        """ Calculate and return the cell index given its xy coordinates. """
+        if not (0 <= y < self.rows and 0 <= x < self.cols):
+            raise IndexError
+
+        return (y * self.cols) + x + 1
+
+    def get_robot_cells(self, cell):
+        """ Calculate and return the list of indexes of the cells that the robot covers when centered on a cell. """
+        # 0, 1, 2
+        # 3, r, 4
+        # 5, 6, 7
+        cols = self.cols
+        return [cell + cols - 1, cell + cols, cell + cols + 1,
+                cell - 1, cell, cell + 1,
+                cell - (cols + 1), cell - cols, cell - (cols - 1)]
+
+    def is_inside(self, y, x):
+        """ Check if a cell is on the grid. """
+        return 0 <= y < self.rows and 0 <= x < self.cols
+
+    def is_at_border(self, y, x):
+        """ Check if the robot center cannot stand on a cell, as the robot would stick out of the grid. """
+        return y < 1 or y > self.rows - 2 or x < 1 or x > self.cols - 2
+
+    def is_on_edge(self, cell):
+        """ Check if a cell is in the outermost ring of the grid. """
+        y, x = self.get_matrix_coords(cell)
+        return y == 0 or y == self.rows - 1 or x == 0 or x == self.cols - 1
+
+    def is_in_efficiency_limit(self, y, x, facing):
+        """
+        Check if the robot center is one cell before the outer limit of the robot center along a wall, going clockwise
+        around the grid.
+
+        :param y: The y-coordinate of the robot center.
+        :param x: The x-coordinate of the robot center.
+        :param facing: The facing of the robot.
+        :return: True if the robot is in the limit, false otherwise.
+        """
+        if self.is_at_border(y, x):
+            return False
+        return (facing == EAST and y == self.rows - 3) or (facing == SOUTH and x == self.cols - 3) \
+            or (facing == WEST and y == 2) or (facing == NORTH and x == 2)
+
+    def flip_row(self, y):
+        """ Turn a row counted from the bottom into one counted from the top, as in arena files, and back. """
+        return self.rows - 1 - y
+
+
+# The grid of the arena.
+ARENA_GRID = Grid()
@@ -0,0 +1,153 @@
+import sys
+import threading
+from time import perf_counter
+
+from Utils.constants import IS_DEBUG_MODE, LOG_LEVELS
+
+"""This module defines the leveled logger that every module writes its console output through."""
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+LEVELS = {name: level for level, name in LEVEL_NAMES.items()}
+
+# The format of every line written, given the seconds since start, the name of the level, the module, the thread and
+# the message.
+LINE_FORMAT = '{time:9.3f} {level:<7} {name} [{thread}] {message}\n'
+
+
+def _ignore(message, *args):
+    """ Stand in for the methods of a logger whose level is disabled. """
+    pass
+
+
+class Logger:
+    """
+    This class writes the messages of one module, at the levels enabled for it.
+
+    Each method takes a message and the arguments to format it with, in the style of str.format. The message is only
+    formatted if its level is enabled. Whenever the levels change, the methods of disabled levels are swapped for a
+    function that does nothing, so a disabled call costs no more than calling an empty function: nothing is formatted,
+    locked or checked.
+
+    Use get_logger to get the logger of a module.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.level = INFO
+        self.debug = self.info = self.warning = self.error = _ignore
+
+    def is_enabled_for(self, level):
+        """ Check if messages at a level are written, to skip building an expensive message otherwise. """
+        return level >= self.level
+
+    def _refresh(self, level):
+        """ Enable the methods of the levels at or above a level, and disable the others. """
+        self.level = level
+        self.debug = self._debug if level <= DEBUG else _ignore
+        self.info = self._info if level <= INFO else _ignore
+        self.warning = self._warning if level <= WARNING else _ignore
+        self.error = self._error if level <= ERROR else _ignore
+
+    def _debug(self, message, *args):
+        _write(DEBUG, self.name, message, args)
+
+    def _info(self, message, *args):
+        _write(INFO, self.name, message, args)
+
+    def _warning(self, message, *args):
+        _write(WARNING, self.name, message, args)
+
+    def _error(self, message, *args):
+        _write(ERROR, self.name, message, args)
+
+
+def get_logger(name):
+    """
+    Return the logger of a module, creating it on first use.
+
+    :param name: The name of the module, usually __name__.
+    :return: The Logger.
+    """
+    with _lock:
+        logger = _loggers.get(name)
+        if logger is None:
+            logger = Logger(name)
+            logger._refresh(_get_effective_level(name))
+            _loggers[name] = logger
+        return logger
+
+
+def set_level(level, name=''):
+    """
+    Set the level of a module and the modules under it, such as 'Algo' for every module in Algo.
+
+    Safe to call from any thread while the others are logging.
+
+    :param level: The lowest level written, one of DEBUG, INFO, WARNING or ERROR, or its name.
+    :param name: The name of the module or package, or '' for every module.
+    :return: N/A
+    """
+    if isinstance(level, str):
+        if level.upper() not in LEVELS:
+            raise ValueError('Unknown log level {}'.format(level))
+        level = LEVELS[level.upper()]
+
+    with _lock:
+        _levels[name] = level
+        for logger in _loggers.values():
+            logger._refresh(_get_effective_level(logger.name))
+
+
+def set_levels(spec):
+    """
+    Set the levels of several modules at once.
+
+    :param spec: Comma separated levels, each either a level for every module or module=level, such as
+                 'WARNING,Algo.exploration=DEBUG'.
+    :return: N/A
+    """
+    for item in spec.split(','):
+        if item.strip():
+            name, separator, level = item.rpartition('=')
+            set_level(level.strip(), name.strip())
+
+
+def set_stream(stream):
+    """ Write the messages to a stream other than stdout, such as a file, or to stdout again if None. """
+    global _stream
+    with _write_lock:
+        _stream = stream
+
+
+def _get_effective_level(name):
+    """ Return the level set for a module, or for the nearest package above it that has one. """
+    while True:
+        if name in _levels:
+            return _levels[name]
+        if not name:
+            return INFO
+        name = name.rpartition('.')[0]
+
+
+def _write(level, name, message, args):
+    """ Format a message and write it as one line, so the lines of different threads do not interleave. """
+    if args:
+        message = message.format(*args)
+    line = LINE_FORMAT.format(time=perf_counter() - _start_time, level=LEVEL_NAMES[level], name=name,
+                              thread=threading.current_thread().name, message=message)
+    with _write_lock:
+        stream = _stream or sys.stdout
+        stream.write(line)
+        stream.flush()
+
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_loggers = {}
+_levels = {'': DEBUG if IS_DEBUG_MODE else INFO}
+_levels.update((name, LEVELS[level]) for name, level in LOG_LEVELS.items())
+_stream = None
+_start_time = perf_counter()
@@ -0,0 +1,205 @@
+from Utils.grid import ARENA_GRID
+
+"""This module defines the codec of the MDF strings, which describe the explored cells and the obstacles of a map."""
+
+# The explore string is these bits, then one bit per cell telling if it is explored, then these bits again.
+EXPLORE_PADDING = 0b11
+EXPLORE_PADDING_LENGTH = 2
+
+# _COUNTS[byte] is the number of bits set in a byte.
+_COUNTS = bytes(bin(byte).count('1') for byte in range(256))
+
+# _BITS[byte] is the bits of a byte, most significant first.
+_BITS = [tuple((byte >> bit) & 1 for bit in range(7, -1, -1)) for byte in range(256)]
+
+
+def _build_compact_table():
+    """
+    Build the table that gathers the obstacle bits of the explored cells of a byte of cells.
+
+    :return: A list indexed by (explored byte << 8) | obstacle byte, whose value is the obstacle bits of the explored
+             cells, in order, packed into the low _COUNTS[explored byte] bits. Only obstacle bytes that are a subset of
+             their explored byte are filled in, as an obstacle is always explored.
+    """
+    table = [0] * (256 * 256)
+    for known in range(256):
+        obstacles = known
+        while True:
+            value = 0
+            for bit in range(7, -1, -1):
+                if (known >> bit) & 1:
+                    value = (value << 1) | ((obstacles >> bit) & 1)
+            table[(known << 8) | obstacles] = value
+            if not obstacles:
+                break
+            obstacles = (obstacles - 1) & known
+    return table
+
+
+_COMPACT = _build_compact_table()
+
+
+class MdfCodec:
+    """
+    This class keeps the MDF strings of a map, packed as bits and updated cell by cell as the map changes.
+
+    The explore string is one bit per cell, so it is kept as an int with one bit set per explored cell and formatted
+    as hex when asked for. The obstacle string only has a bit for each cell that is not unexplored, so setting one cell
+    shifts every bit after it. It is kept as two bit masks per row, one of the cells that are not unexplored and one of
+    the obstacles, and each row is squeezed into the bits of the string a byte at a time through a lookup table. Only
+    the rows changed since the last call are squeezed again, and both strings are kept until the map changes.
+
+    The strings are the same as the ones built from a string of '0' and '1' through int(..., 2) and hex().
+    """
+    def __init__(self, exploration_status, discovered_map):
+        """
+        Pack the maps.
+
+        :param exploration_status: The map that shows whether each cell is explored or unexplored.
+        :param discovered_map: The map that shows whether each cell is an obstacle (1), free (0) or unexplored (2).
+        """
+        rows = len(discovered_map)
+        self._cols = len(discovered_map[0])
+        # The number of bits each row of the packed maps takes, rounded up to whole bytes so it can be looked up by
+        # byte.
+        self._row_bits = -(-self._cols // 8) * 8
+        self._row_chunk_shifts = list(range(self._row_bits - 8, -1, -8))
+
+        self._explore_length = EXPLORE_PADDING_LENGTH + rows * self._cols + EXPLORE_PADDING_LENGTH
+        self._explore = (EXPLORE_PADDING << (self._explore_length - EXPLORE_PADDING_LENGTH)) | EXPLORE_PADDING
+        for y, row in enumerate(exploration_status):
+            for x, explored in enumerate(row):
+                if explored:
+                    self._explore |= self._get_explore_bit(y, x)
+
+        self._known_rows = [0] * rows
+        self._obstacle_rows = [0] * rows
+        for y, row in enumerate(discovered_map):
+            for x, value in enumerate(row):
+                if value != 2:
+                    self._known_rows[y] |= self._get_row_bit(x)
+                if value == 1:
+                    self._obstacle_rows[y] |= self._get_row_bit(x)
+
+        # The obstacle bits of every row as (bits, number of bits), or None if the row changed since it was squeezed.
+        self._squeezed_rows = [None] * rows
+        self._explore_string = None
+        self._map_string = None
+
+    def _get_explore_bit(self, y, x):
+        return 1 << (self._explore_length - 1 - EXPLORE_PADDING_LENGTH - (y * self._cols + x))
+
+    def _get_row_bit(self, x):
+        return 1 << (self._row_bits - 1 - x)
+
+    def mark_explored(self, y, x):
+        """ Mark a cell as explored. """
+        self._explore |= self._get_explore_bit(y, x)
+        self._explore_string = None
+
+    def mark_unexplored(self, y, x):
+        """ Mark a cell as unexplored again. """
+        self._explore &= ~self._get_explore_bit(y, x)
+        self._explore_string = None
+
+    def set_discovered(self, y, x, value):
+        """
+        Change the value of a cell in the discovered map.
+
+        :param y: The y-coordinate of the cell.
+        :param x: The x-coordinate of the cell.
+        :param value: The new value of the cell, an obstacle (1), free (0) or unexplored (2).
+        :return: N/A
+        """
+        bit = self._get_row_bit(x)
+        if value == 2:
+            self._known_rows[y] &= ~bit
+        else:
+            self._known_rows[y] |= bit
+        if value == 1:
+            self._obstacle_rows[y] |= bit
+        else:
+            self._obstacle_rows[y] &= ~bit
+
+        self._squeezed_rows[y] = None
+        self._map_string = None
+
+    def get_explore_string(self):
+        """ Return the MDF string of the explored cells. """
+        if self._explore_string is None:
+            self._explore_string = '{:x}'.format(self._explore)
+        return self._explore_string
+
+    def get_map_string(self):
+        """ Return the MDF string of the obstacles among the cells that are not unexplored. """
+        if self._map_string is None:
+            value = 0
+            length = 0
+            for y in range(len(self._squeezed_rows)):
+                squeezed = self._squeezed_rows[y]
+                if squeezed is None:
+                    squeezed = self._squeezed_rows[y] = self._squeeze_row(y)
+                value = (value << squeezed[1]) | squeezed[0]
+                length += squeezed[1]
+
+            # Pad with zeros to whole hex digits.
+            pad_length = -length % 4
+            digits = (length + pad_length) // 4
+            self._map_string = '{:0{}x}'.format(value << pad_length, digits) if digits else ''
+        return self._map_string
+
+    def _squeeze_row(self, y):
+        """ Gather the obstacle bits of the cells of a row that are not unexplored, a byte at a time. """
+        known_row = self._known_rows[y]
+        obstacle_row = self._obstacle_rows[y]
+        value = 0
+        length = 0
+        for shift in self._row_chunk_shifts:
+            known = (known_row >> shift) & 0xff
+            count = _COUNTS[known]
+            value = (value << count) | _COMPACT[(known << 8) | ((obstacle_row >> shift) & 0xff)]
+            length += count
+        return value, length
+
+
+def decode_explore_string(explore_string, grid=ARENA_GRID):
+    """
+    Decode the MDF string of the explored cells.
+
+    :param explore_string: The explore string.
+    :param grid: The Grid of the map the string was built for.
+    :return: The map that shows whether each cell is explored (1) or unexplored (0), indexed as [y][x].
+    """
+    # The string is a number, so an odd number of digits is made whole bytes with a zero on the left.
+    if len(explore_string) % 2:
+        explore_string = '0' + explore_string
+    bits = _to_bits(explore_string)
+    cell_count = grid.size
+    # Drop the zeros the hex digits were padded with on the left, and the padding of the string itself.
+    start = len(bits) - cell_count - EXPLORE_PADDING_LENGTH
+    cells = bits[start:start + cell_count]
+    return [cells[i:i + grid.cols] for i in range(0, cell_count, grid.cols)]
+
+
+def decode_map_string(map_string, exploration_status):
+    """
+    Decode the MDF string of the obstacles.
+
+    :param map_string: The obstacle string.
+    :param exploration_status: The map of the explored cells the string was built for, indexed as [y][x].
+    :return: The map that shows whether each cell is an obstacle (1), free (0) or unexplored (2), indexed as [y][x].
+    """
+    # The string is padded on the right, so an odd number of digits is made whole bytes with a zero on the right.
+    if len(map_string) % 2:
+        map_string += '0'
+    bits = _to_bits(map_string)
+    if len(bits) < sum(sum(row) for row in exploration_status):
+        raise ValueError('The obstacle string has fewer bits than there are explored cells')
+
+    bits = iter(bits)
+    return [[next(bits) if explored else 2 for explored in row] for row in exploration_status]
+
+
+def _to_bits(hex_string):
+    """ Return the bits of a hex string of whole bytes, most significant first. """
+    return [bit for byte in bytes.fromhex(hex_string) for bit in _BITS[byte]]
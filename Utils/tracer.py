@@ -0,0 +1,242 @@
+import json
+import threading
+from time import perf_counter
+
+"""This module defines the tracer that records where the time of a physical run goes."""
+
+# Upper bounds in milliseconds of the buckets of the histograms. Durations beyond the last go in a bucket of their own.
+HISTOGRAM_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# The number of characters of a message kept in the trace. Android updates are long and only their size matters.
+MESSAGE_PREVIEW_LENGTH = 32
+
+# The phases of a run that the histograms report.
+PHASE_ARDUINO_MOVE_RTT = 'rtt_M'
+PHASE_ARDUINO_SENSOR_RTT = 'rtt_R'
+PHASE_RPI_PHOTO_RTT = 'rtt_I'
+PHASE_SENSOR_PARSE = 'sensor_parse'
+PHASE_PLANNER = 'planner'
+PHASE_ANDROID_UPDATE = 'update_android'
+
+
+class Tracer:
+    """
+    This class records timestamped events from every thread of a run, and reports them as histograms and as a trace.
+
+    Timestamps are taken from a monotonic clock. A span is a piece of work done by one thread, such as a planner call.
+    A round trip runs from a message being sent to its reply arriving. Round trips may overlap, as several commands can
+    be in flight at once, so they are shown on tracks of their own in the trace. Instants mark single messages.
+
+    Recording is off until enable() is called. While it is off, every method returns at once, and span() returns a
+    shared context manager that does nothing, so the calls can stay in the hot paths.
+    """
+    def __init__(self):
+        self.is_enabled = False
+        self._lock = threading.Lock()
+        self._origin = perf_counter()
+        self._events = []
+        self._durations = {}
+        self._null_span = _NullSpan()
+
+    def enable(self):
+        """ Start recording, dropping whatever was recorded before. """
+        with self._lock:
+            self._origin = perf_counter()
+            self._events = []
+            self._durations = {}
+        self.is_enabled = True
+
+    def disable(self):
+        """ Stop recording. What was recorded is kept until enable() is called again. """
+        self.is_enabled = False
+
+    @staticmethod
+    def now():
+        """ Return the current time on the clock of the tracer, in seconds. """
+        return perf_counter()
+
+    def instant(self, name, category, args=None):
+        """
+        Record a single event, such as a message being sent or received.
+
+        :param name: The name of the event.
+        :param category: The category of the event, such as the channel of a message.
+        :param args: A dict of details to show with the event, or None.
+        :return: N/A
+        """
+        if not self.is_enabled:
+            return
+
+        event = {'name': name, 'cat': category, 'ph': 'i', 's': 't', 'ts': self._micros(perf_counter()),
+                 'pid': 1, 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+
+    def span(self, name, args=None):
+        """
+        Time a piece of work done by the calling thread.
+
+        :param name: The phase the work belongs to.
+        :param args: A dict of details to show with the span, or None.
+        :return: A context manager that records the span when it exits.
+        """
+        if not self.is_enabled:
+            return self._null_span
+        return _Span(self, name, args)
+
+    def round_trip(self, name, start, end, args=None):
+        """
+        Record the time between a message being sent and its reply arriving.
+
+        :param name: The phase the round trip belongs to.
+        :param start: The time the message was sent, as returned by now().
+        :param end: The time the reply arrived, as returned by now().
+        :param args: A dict of details to show with the round trip, or None.
+        :return: N/A
+        """
+        if not self.is_enabled:
+            return
+
+        with self._lock:
+            trip_id = len(self._events)
+            begin = {'name': name, 'cat': 'round_trip', 'ph': 'b', 'id': trip_id, 'ts': self._micros(start),
+                     'pid': 1, 'tid': 0}
+            if args:
+                begin['args'] = args
+            self._events.append(begin)
+            self._events.append({'name': name, 'cat': 'round_trip', 'ph': 'e', 'id': trip_id,
+                                 'ts': self._micros(end), 'pid': 1, 'tid': 0})
+            self._durations.setdefault(name, []).append(end - start)
+
+    def add_span(self, name, start, end, args=None):
+        """
+        Record a piece of work done by the calling thread, timed by the caller.
+
+        :param name: The phase the work belongs to.
+        :param start: The time the work started, as returned by now().
+        :param end: The time the work ended, as returned by now().
+        :param args: A dict of details to show with the span, or None.
+        :return: N/A
+        """
+        if not self.is_enabled:
+            return
+
+        event = {'name': name, 'cat': 'span', 'ph': 'X', 'ts': self._micros(start),
+                 'dur': round((end - start) * 1e6, 3), 'pid': 1, 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self._events.append(event)
+            self._durations.setdefault(name, []).append(end - start)
+
+    def _micros(self, timestamp):
+        return round((timestamp - self._origin) * 1e6, 3)
+
+    def get_histograms(self):
+        """
+        Sum up the durations recorded for every phase.
+
+        :return: A dict from each phase to a dict with the count, the mean, the 50th, 90th and 99th percentiles and
+                 the max of its durations in milliseconds, and 'buckets', the count of durations up to each bound in
+                 HISTOGRAM_BUCKETS_MS followed by the count of the longer ones.
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+
+        histograms = {}
+        for name, values in durations.items():
+            values = [value * 1000 for value in values]
+            buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            bucket = 0
+            for value in values:
+                while bucket < len(HISTOGRAM_BUCKETS_MS) and value > HISTOGRAM_BUCKETS_MS[bucket]:
+                    bucket += 1
+                buckets[bucket] += 1
+
+            histograms[name] = {
+                'count': len(values),
+                'mean_ms': round(sum(values) / len(values), 3),
+                'p50_ms': round(_percentile(values, 50), 3),
+                'p90_ms': round(_percentile(values, 90), 3),
+                'p99_ms': round(_percentile(values, 99), 3),
+                'max_ms': round(values[-1], 3),
+                'buckets': buckets
+            }
+        return histograms
+
+    def format_histograms(self):
+        """ Return the histograms as a table, one row per phase. """
+        lines = ['{:<16} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+            'phase', 'count', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')]
+        for name, histogram in sorted(self.get_histograms().items()):
+            lines.append('{:<16} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10}'.format(
+                name, histogram['count'], histogram['mean_ms'], histogram['p50_ms'], histogram['p90_ms'],
+                histogram['p99_ms'], histogram['max_ms']))
+        return '\n'.join(lines)
+
+    def write_histograms(self, filename):
+        """ Write the histograms and the bounds of their buckets to a file as JSON. """
+        with open(filename, 'w') as file:
+            json.dump({'buckets_ms': HISTOGRAM_BUCKETS_MS, 'phases': self.get_histograms()}, file, indent=2)
+
+    def write_chrome_trace(self, filename):
+        """
+        Write every event recorded to a file in the Chrome trace format, which chrome://tracing and Perfetto open.
+
+        :param filename: The name of the file.
+        :return: N/A
+        """
+        with self._lock:
+            events = list(self._events)
+
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': 0, 'args': {'name': 'round trips'}}]
+        for tid in sorted({event['tid'] for event in events if event['tid']}):
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid,
+                             'args': {'name': thread_names.get(tid, 'thread {}'.format(tid))}})
+
+        with open(filename, 'w') as file:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, file)
+
+
+class _Span:
+    """ The context manager returned by Tracer.span while recording. """
+    def __init__(self, tracer, name, args):
+        self._tracer = tracer
+        self._name = name
+        self._args = args
+        self._start = None
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._tracer.add_span(self._name, self._start, perf_counter(), self._args)
+        return False
+
+
+class _NullSpan:
+    """ The context manager returned by Tracer.span while not recording. """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def message_args(message):
+    """ Return the details of a message to show with its event in the trace. """
+    return {'message': message[:MESSAGE_PREVIEW_LENGTH], 'bytes': len(message)}
+
+
+def _percentile(values, percent):
+    """ Return a percentile of a sorted list by the nearest rank. """
+    rank = max(0, -(-len(values) * percent // 100) - 1)
+    return values[int(rank)]
+
+
+# The tracer of the program, shared by every module.
+tracer = Tracer()
@@ -1,39 +1,28 @@
 from Utils.constants import *
-import os
-import sys
+from Utils.grid import ARENA_GRID
+from Utils.logger import get_logger, DEBUG
+from Utils.mdf import decode_explore_string, decode_map_string
 
 """ This module contains miscellaneous functions that are required throughout the program. """
 
-def get_matrix_coords(cell):
-    """ Calculate and return the yx coordinates of a given cell index. """
-    x = (cell - 1) % NUM_COLS
-    y = (cell - 1) // NUM_COLS
+_logger = get_logger(__name__)
+
 
-    return y, x
+def get_matrix_coords(cell):
+    """ Calculate and return the yx coordinates of a given cell index on the grid of the arena. """
+    return ARENA_GRID.get_matrix_coords(cell)
 
 
 def get_grid_index(y, x):
-    """ Calculate and return the cell index given its xy coordinates. """
-    if y not in range(COL_LENGTH) or x not in range(ROW_LENGTH):
-        raise IndexError
-
-    return (y * ROW_LENGTH) + x + 1
+    """ Calculate and return the cell index given its xy coordinates on the grid of the arena. """
+    return ARENA_GRID.get_grid_index(y, x)
 
 def get_robot_cells(cell):
-    """ Calculate and return the list of indexes of the cells that the robot currently covered. """
-    # 0, 1, 2
-    # 3, r, 4
-    # 5, 6, 7
-    cells = [cell + ROW_LENGTH - 1, cell + ROW_LENGTH, cell + ROW_LENGTH + 1,
-             cell - 1, cell, cell + 1,
-             cell - (ROW_LENGTH + 1), cell - ROW_LENGTH, cell - (ROW_LENGTH - 1)]
-
-    return cells
+    """ Calculate and return the list of indexes of the cells that the robot covers on the grid of the arena. """
+    return ARENA_GRID.get_robot_cells(cell)
 
 def is_at_border(y, x):
-    if y < 1 or y > 18 or x < 1 or x > 13:
-        return True
-    return False
+    return ARENA_GRID.is_at_border(y, x)
 
 
 def previous_cell(cell, facing):
@@ -95,13 +84,13 @@ def get_fastest_path_moves(fastest_path):
             else:
                 moves[-1] = moves[-1] + get_arduino_cmd(FORWARD)
 
-    print('Original Commands: {}'.format(moves))
+    _logger.debug('Original Commands: {}', moves)
 
     moves_android = []
     for move in moves:
         moves_android = moves_android + [move[i:i+FAST_PATH_STEP] for i in range(0, len(move), FAST_PATH_STEP)]
 
-    print('Android Commands: {}'.format(moves_android))
+    _logger.debug('Android Commands: {}', moves_android)
 
     return moves_android
 
@@ -118,7 +107,7 @@ def add_calibration_to_arduino_moves(moves_arduino, robot):
         new_move = ''
         for move in moves:
             new_move += move
-            print(move)
+            _logger.debug('{}', move)
             clone_robot.move_robot_algo(convert_arduino_cmd_to_direction(move))
             if is_calibration and clone_robot.is_calibrate_side_possible():
                 moves_ardiono_with_calibration.append(new_move)
@@ -127,7 +116,7 @@ def add_calibration_to_arduino_moves(moves_arduino, robot):
                 is_calibration = False
         if new_move != '':
             moves_ardiono_with_calibration.append(new_move)
-    print('Arduino Commands with Calibration: {}'.format(moves_ardiono_with_calibration))
+    _logger.debug('Arduino Commands with Calibration: {}', moves_ardiono_with_calibration)
 
     # Convert arduino forward movements Commands "WWWWDWAWW" will be converted to "4DWA2". 6 forward is max, 1 forward remains as W
     # 1 forward: W
@@ -143,76 +132,45 @@ def add_calibration_to_arduino_moves(moves_arduino, robot):
         else:
             moves_arduino.append(move)
 
-    print('New Arduino Commands: {}'.format(moves_arduino))
+    _logger.debug('New Arduino Commands: {}', moves_arduino)
 
     return moves_arduino
 
 
-def disable_print():
-    """ Suppress output from the print() function by piping stdout to /dev/null. """
-    if not IS_DEBUG_MODE:
-        sys.stdout = open(os.devnull, 'w')
-
-
-def enable_print():
-    """ Allow output from the print() function by piping stdout back to the console. """
-    if not IS_DEBUG_MODE:
-        sys.stdout = sys.__stdout__
-
 # explore_string = 'fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff3'
 def convert_explore_string_to_map(explore_string):
-    # Trim '0b' and padding sequences of ‘11’ at the beginning and end.
-    explore_string = bin(int(explore_string, 16))[4:-2]
-    # Convert string to list of list
     # Reverse the row direction to from top to bottom
-    explore_map = [[int(j) for j in explore_string[i:i+15]] for i in range(0, len(explore_string), 15)][::-1]
-    return explore_map
+    return decode_explore_string(explore_string)[::-1]
 
 # obstacle_string = '000000000400000001c800000000000700000000800000001f8000070000000002000000000'
 def convert_obstacle_string_to_map(obstacle_string, explore_map):
-    explored_map_count = sum([sum(row) for row in explore_map])
-    # Trim '0b' and padding sequences of ‘1111’ at the beginning.
-    # Trim the padding '0' at the end to match to the count of explored cells according to explored_map_count
-    obstacle_string = bin(int('f' + obstacle_string, 16))[6:][:explored_map_count]
-
-    # Initialize discovered map as all undiscovered (represented by 2)
-    discovered_string = [2 for _ in range(ROW_LENGTH * COL_LENGTH)]
-
-    # Convert explore map from list to string. (Inverse direction to match obstacle string, which is from bottom to up)
-    explore_string = [item for sublist in explore_map[::-1] for item in sublist]
-
-    # Fill 0 or 1 for explored cell
-    obstacle_string_index = 0
-    for i in range(len(explore_string)):
-        if explore_string[i] == 1:
-            discovered_string[i] = obstacle_string[obstacle_string_index]
-        obstacle_string_index += 1
-
-    # Convert string to list of list
+    # The explore map is from top to bottom, while the obstacle string is from bottom to top
     # Reverse the row direction to from top to bottom
-    discovered_map = [[int(j) for j in discovered_string[i:i+15]] for i in range(0, len(discovered_string), 15)][::-1]
-
-    return discovered_map
+    return decode_map_string(obstacle_string, explore_map[::-1])[::-1]
 
 def print_map_info(robot):
-    print('-' * 50)
+    """ Log the MDF strings and the maps of a robot at debug level. Building them is skipped if it is disabled. """
+    if not _logger.is_enabled_for(DEBUG):
+        return
+
+    _logger.debug('-' * 50)
     msgs = []
     msgs.append('"exploreMap":"%s"'%robot.get_explore_string())
     msgs.append('"obstacleMap":"%s"'%robot.get_map_string())
-    y, x = get_matrix_coords(robot.center)
+    y, x = robot.grid.get_matrix_coords(robot.center)
     msgs.append('"robotPosition":"%s,%s,%s"' % (str(x), str(y), str(robot.facing)))
-    msgs.append('"ARrobotPosition":"%s,%s,%s"' % (str(x), str(19 - y), str(robot.facing)))
+    msgs.append('"ARrobotPosition":"%s,%s,%s"' % (str(x), str(robot.grid.flip_row(y)), str(robot.facing)))
     msgs.append('"arrowPosition":"{}"'.format(','.join([str(value) for pos in robot.arrows for value in pos])))
     msgs.append('"ARarrowPosition":"{}"'.format(';'.join(robot.arrows_arduino)))
-    print('{' + ','.join(msgs) + '}')
+    _logger.debug('{}', '{' + ','.join(msgs) + '}')
 
-    print('Exploration Status Map:')
+    _logger.debug('Exploration Status Map:')
     for _ in robot.exploration_status[::-1]:
-        print(_)
+        _logger.debug('{}', _)
 
-    print('Discovered Map:')
+    _logger.debug('Discovered Map:')
     for _ in robot.discovered_map[::-1]:
-        print(_)
+        _logger.debug('{}', _)
 
     # if IS_ARROW_SCAN:
     #     print('Arrow Taken Status Map:')
@@ -224,4 +182,3 @@ def print_map_info(robot):
     #     for _ in robot.real_map:
     #         print(_)
 
-    print()
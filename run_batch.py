@@ -0,0 +1,51 @@
+import argparse
+from time import time
+
+from Controllers.batch import *
+from Utils.utils import *
+from Utils.logger import set_levels
+
+"""This module explores every arena with the simulated robot without the GUI and reports the results."""
+
+__author__ = 'MDPTeam15'
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Run simulated explorations over a set of arenas.')
+    parser.add_argument('patterns', nargs='*', default=['Maps/*/*.txt'],
+                        help='glob patterns of the arena files or arena libraries (default: Maps/*/*.txt)')
+    parser.add_argument('--json', help='file to write the results to as JSON, including the coverage over time')
+    parser.add_argument('--csv', help='file to write the results to as CSV, one row per arena')
+    parser.add_argument('--explore-limit', type=int,
+                        help='number of explored cells at which to stop (default: every cell of the arena)')
+    parser.add_argument('--time-limit', type=float, default=TIME_LIMITE,
+                        help='number of seconds after which to stop (default: %(default)s)')
+    parser.add_argument('--no-arrow-scan', dest='is_arrow_scan', action='store_false', default=IS_ARROW_SCAN,
+                        help='do not scan for arrows during exploration')
+    parser.add_argument('--log', help='levels to log at, as a level for every module and module=level pairs, such as '
+                                      'WARNING,Algo.exploration=DEBUG')
+    args = parser.parse_args()
+
+    if args.log:
+        set_levels(args.log)
+
+    start_time = time()
+    records = simulate_all(find_arenas(args.patterns), args.explore_limit, args.time_limit, args.is_arrow_scan)
+    total_time = time() - start_time
+
+    if args.json:
+        write_json(records, args.json)
+    if args.csv:
+        write_csv(records, args.csv)
+
+    print('{:<60} {:>8} {:>5} {:>5} {:>5} {:>5} {:>6} {:>8}'.format(
+        'arena', 'explored', 'wrong', 'steps', 'path', 'turns', 'arrows', 'seconds'))
+    for record in records:
+        if not record['is_parsed']:
+            print('{:<60} cannot be parsed'.format(record['arena']))
+            continue
+        print('{:<60} {:>8} {:>5} {:>5} {:>5} {:>5} {:>6} {:>8.3f}'.format(
+            record['arena'], record['explored'], record['wrong_cells'], record['steps'], record['path_length'],
+            record['turns'], '{}/{}'.format(record['arrows_found'], record['arrows_total']), record['wall_clock']))
+    print('{} arenas in {:.2f}s'.format(len(records), total_time))
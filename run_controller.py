@@ -1,16 +1,54 @@
-from Controllers.controller import Controller
+import argparse
+import asyncio
+
+from Controllers.async_controller import AsyncController
 from Utils.utils import *
+from Utils.tracer import tracer
+from Utils.logger import set_levels
 
 """This module starts an instance of the Algorithm application that controls the robot during a physical run."""
 
+
+def write_trace(trace_filename, histograms_filename):
+    """
+    Report the time spent in each phase of the run, and write what was recorded to the files asked for.
+
+    :param trace_filename: The file to write the Chrome trace to, or None.
+    :param histograms_filename: The file to write the histograms to as JSON, or None.
+    :return: N/A
+    """
+    print(tracer.format_histograms())
+    if trace_filename:
+        tracer.write_chrome_trace(trace_filename)
+    if histograms_filename:
+        tracer.write_histograms(histograms_filename)
+
+
 if __name__ == '__main__':
 
-    if not IS_DEBUG_MODE:
-        disable_print()
+    parser = argparse.ArgumentParser(description='Control the robot during a physical run.')
+    parser.add_argument('--trace', help='file to write a Chrome trace of the run to, for chrome://tracing or Perfetto')
+    parser.add_argument('--histograms', help='file to write the histograms of the time spent in each phase to')
+    parser.add_argument('--log', help='levels to log at, as a level for every module and module=level pairs, such as '
+                                      'WARNING,Algo.exploration=DEBUG')
+    args = parser.parse_args()
+
+    if args.log:
+        set_levels(args.log)
+
+    is_tracing = args.trace or args.histograms
+    if is_tracing:
+        tracer.enable()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
 
     # Initialize Controller
-    controller = Controller()
+    controller = AsyncController(loop)
 
-    # Keep main thread alive to keep daemons alive
-    while True:
-        pass
+    # Run until the RPi disconnects
+    try:
+        loop.run_until_complete(controller.run())
+    finally:
+        if is_tracing:
+            write_trace(args.trace, args.histograms)
@@ -0,0 +1,66 @@
+import argparse
+import os
+
+from Utils.arena_generator import PRESETS, SHAPES, generate_arenas, format_arena
+from Utils.arena_library import LIBRARY_EXTENSION, write_library
+from Utils.grid import ARENA_GRID
+
+"""This module generates reproducible random arenas, as arena files or as one arena library."""
+
+__author__ = 'MDPTeam15'
+
+
+def parse_shapes(value):
+    """ Parse the names of shapes separated by commas. """
+    shapes = value.split(',')
+    for shape in shapes:
+        if shape not in SHAPES:
+            raise argparse.ArgumentTypeError('unknown shape {}, expected some of {}'.format(shape, ','.join(SHAPES)))
+    return shapes
+
+
+def parse_count(value):
+    """ Parse a number of arenas, at least 1. """
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError('expected at least 1 arena, got {}'.format(value))
+    return count
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Generate random arenas for stress tests of the exploration and the '
+                                                 'fastest path.')
+    parser.add_argument('output', help='directory to write the arena files to, or an arena library file ending in '
+                                       '{} to pack them into'.format(LIBRARY_EXTENSION))
+    parser.add_argument('--count', type=parse_count, default=100, help='number of arenas (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the arenas (default: %(default)s)')
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='standard',
+                        help='settings to start from (default: %(default)s)')
+    parser.add_argument('--density', type=float, help='share of the cells to make obstacles')
+    parser.add_argument('--corridor-width', type=int, help='fewest free cells between two obstacles')
+    parser.add_argument('--arrows', type=int, dest='arrow_count', help='number of arrows per arena')
+    parser.add_argument('--shapes', type=parse_shapes,
+                        help='obstacle shapes to use, separated by commas, out of {}'.format(','.join(sorted(SHAPES))))
+    parser.add_argument('--rows', type=int, help='number of rows of the arenas (default: {})'.format(ARENA_GRID.rows))
+    parser.add_argument('--cols', type=int, help='number of columns of the arenas (default: {})'.format(ARENA_GRID.cols))
+    parser.add_argument('--allow-blocked', dest='is_path_required', action='store_false', default=None,
+                        help='allow arenas where the robot cannot reach the goal')
+    args = parser.parse_args()
+
+    settings = {name: getattr(args, name) for name in ['density', 'corridor_width', 'arrow_count', 'shapes',
+                                                        'is_path_required', 'rows', 'cols']
+                if getattr(args, name) is not None}
+    arenas = generate_arenas(args.count, args.seed, args.preset, **settings)
+
+    if args.output.endswith(LIBRARY_EXTENSION):
+        write_library(args.output, [(name, grid_map, None) for name, grid_map in arenas])
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        for name, grid_map in arenas:
+            with open(os.path.join(args.output, name + '.txt'), mode="w") as file:
+                file.write(format_arena(grid_map))
+
+    obstacle_counts = [sum(value != 0 for row in grid_map for value in row) for name, grid_map in arenas]
+    print('{} arenas written to {}, {} to {} obstacle cells'.format(
+        len(arenas), args.output, min(obstacle_counts), max(obstacle_counts)))
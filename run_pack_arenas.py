@@ -0,0 +1,45 @@
+import argparse
+import os
+
+from Controllers.batch import find_arenas
+from Utils.arena_library import ArenaLibrary, read_arena, get_way_point, write_library
+
+"""This module packs arena files into one library file that the batch simulator can open without parsing them."""
+
+__author__ = 'MDPTeam15'
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Pack arena files into an arena library.')
+    parser.add_argument('patterns', nargs='*', default=['Maps/*/*.txt'],
+                        help='glob patterns of the arena files (default: Maps/*/*.txt)')
+    parser.add_argument('-o', '--output', default='Maps/arenas.mdpa',
+                        help='library file to write (default: %(default)s)')
+    args = parser.parse_args()
+
+    filenames = [filename for filename in find_arenas(args.patterns) if filename.endswith('.txt')]
+    if not filenames:
+        parser.error('no arena files match {}'.format(' '.join(args.patterns)))
+
+    # Arenas are named by their path from the directory the files have in common, without the extension.
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(filename)) for filename in filenames])
+
+    arenas = []
+    for filename in filenames:
+        grid_map = read_arena(filename)
+        if grid_map is None:
+            print('{:<60} cannot be parsed, left out'.format(filename))
+            continue
+        name = os.path.splitext(os.path.relpath(os.path.abspath(filename), root))[0].replace(os.sep, '/')
+        arenas.append((name, grid_map, get_way_point(name)))
+
+    write_library(args.output, arenas)
+
+    # Read the library back to check every arena comes out as it went in.
+    with ArenaLibrary(args.output) as library:
+        for index, (name, grid_map, way_point) in enumerate(arenas):
+            if library.get_arena(index) != grid_map or library.get_way_point(index) != way_point:
+                raise RuntimeError('Arena {} does not read back the same'.format(name))
+
+    print('{} arenas packed into {} ({} bytes)'.format(len(arenas), args.output, os.path.getsize(args.output)))
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+from time import process_time
+
+from Connections.stand_in_server import StandInServer
+from Controllers.batch import load_arena, count_wrong_cells
+from Utils.utils import *
+from Utils.tracer import tracer
+from Utils.logger import set_levels
+from run_controller import write_trace
+
+"""This module runs the stand-in for the RPi, the Arduino and the Android on an arena, optionally with a controller."""
+
+__author__ = 'MDPTeam15'
+
+# Seconds without a message from the controller after which a benchmark counts the run as over.
+BENCHMARK_IDLE_TIMEOUT = 3.0
+
+
+def parse_script_item(value):
+    """ Parse an Android message to send given as seconds:message, such as 1:ex. """
+    delay, separator, message = value.partition(':')
+    if not separator or not message:
+        raise argparse.ArgumentTypeError('expected seconds:message, got {}'.format(value))
+    try:
+        return float(delay), message
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected seconds:message, got {}'.format(value))
+
+
+def run_controller(kind, server, window):
+    """
+    Run a controller against the server until the server disconnects it.
+
+    :param kind: 'async' for the AsyncController or 'thread' for the Controller.
+    :param server: The StandInServer, already started.
+    :param window: The number of Arduino commands the robot may have in flight, or None for the default.
+    :return: The controller.
+    """
+    if kind == 'async':
+        from Controllers.async_controller import AsyncController
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        controller = AsyncController(loop, server.host, server.port)
+        if window is not None:
+            controller._robot.actuator.window = window
+        loop.run_until_complete(controller.run())
+    else:
+        from Controllers.controller import Controller
+        controller = Controller(server.host, server.port)
+        if window is not None:
+            controller._robot.actuator.window = window
+        server.join()
+    return controller
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Stand in for the RPi, the Arduino and the Android on an arena, and '
+                                                 'optionally benchmark a controller against it.')
+    parser.add_argument('arena', help='arena file the simulated robot runs on')
+    parser.add_argument('--host', default=WIFI_HOST, help='address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=RPI_PORT,
+                        help='port to listen on, or 0 for any free port (default: %(default)s)')
+    parser.add_argument('--move-latency', type=float, default=0.0,
+                        help='seconds the Arduino takes per move, turn or calibration (default: %(default)s)')
+    parser.add_argument('--sensor-latency', type=float, default=0.0,
+                        help='seconds the Arduino takes per sensor reading (default: %(default)s)')
+    parser.add_argument('--photo-latency', type=float, default=0.0,
+                        help='seconds the RPi takes per photo (default: %(default)s)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='most seconds randomly added to every latency (default: %(default)s)')
+    parser.add_argument('--fragment', type=int, default=0,
+                        help='split every reply into writes of at most this many bytes (default: no splitting)')
+    parser.add_argument('--coalesce', type=float, default=0.0,
+                        help='seconds to hold replies back to write them together (default: no holding back)')
+    parser.add_argument('--send', type=parse_script_item, action='append', dest='script',
+                        help='Android message to send as seconds:message after connecting, may be repeated '
+                             '(default: 1:ex)')
+    parser.add_argument('--idle-timeout', type=float,
+                        help='seconds without a message after which to disconnect (default: {}s with --controller, '
+                             'never otherwise)'.format(BENCHMARK_IDLE_TIMEOUT))
+    parser.add_argument('--seed', type=int, help='seed of the jitter and the fragmentation')
+    parser.add_argument('--controller', choices=['async', 'thread'],
+                        help='run this controller against the server in the same process and report the run')
+    parser.add_argument('--window', type=int, help='number of Arduino commands the controller may have in flight')
+    parser.add_argument('--trace', help='file to write a Chrome trace of the controller to')
+    parser.add_argument('--histograms', help='file to write the histograms of the time the controller spent in each '
+                                             'phase to')
+    parser.add_argument('--log', help='levels to log at, as a level for every module and module=level pairs, such as '
+                                      'WARNING,Algo.exploration=DEBUG')
+    args = parser.parse_args()
+
+    if args.log:
+        set_levels(args.log)
+
+    real_map = load_arena(args.arena)
+    if real_map is None:
+        parser.error('cannot parse arena {}'.format(args.arena))
+
+    idle_timeout = args.idle_timeout
+    if idle_timeout is None and args.controller:
+        idle_timeout = BENCHMARK_IDLE_TIMEOUT
+
+    server = StandInServer(real_map, args.host, args.port, args.move_latency, args.sensor_latency, args.photo_latency,
+                           args.jitter, args.fragment, args.coalesce, args.script or [(1.0, ANDROID_EXPLORE)],
+                           idle_timeout, args.seed)
+    server.start()
+
+    if not args.controller:
+        print('Listening on {}:{}'.format(server.host, server.port))
+        server.join()
+        print(server.stats)
+    else:
+        if args.trace or args.histograms:
+            tracer.enable()
+
+        start_cpu = process_time()
+        robot = run_controller(args.controller, server, args.window)._robot
+        cpu_time = process_time() - start_cpu
+
+        stats = server.stats
+        print('Arena:           {}'.format(args.arena))
+        print('Explored:        {}'.format(robot.get_completion_count()))
+        print('Wrong cells:     {}'.format(count_wrong_cells(robot.discovered_map, real_map)))
+        print('Arduino:         {}'.format(', '.join('{} x{}'.format(command, count)
+                                                     for command, count in sorted(stats['arduino'].items()))))
+        print('Readings:        {}'.format(stats['readings']))
+        print('Photos:          {}'.format(stats['photos']))
+        print('Android updates: {}'.format(stats['android']))
+        print('Bytes:           {} received, {} sent in {} writes'.format(
+            stats['bytes_received'], stats['bytes_sent'], stats['writes']))
+        if stats['last_message_at'] is not None:
+            print('Run time:        {:.2f}s'.format(stats['last_message_at'] - stats['connected_at']))
+        print('Controller CPU:  {:.2f}s'.format(cpu_time))
+
+        if args.trace or args.histograms:
+            tracer.disable()
+            print()
+            write_trace(args.trace, args.histograms)
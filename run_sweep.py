@@ -0,0 +1,78 @@
+import argparse
+from time import time
+
+from Controllers.batch import find_arenas, write_json, write_csv
+from Controllers.sweep import *
+from Utils.utils import *
+from Utils.logger import set_levels
+
+"""This module explores every arena under a grid of settings across all cores and reports the results per setting."""
+
+__author__ = 'MDPTeam15'
+
+
+def parse_sensor_ranges(value):
+    """ Parse the ranges of all sensors given as comma separated numbers, such as 2,2,2,2,2,5. """
+    return [int(sensor_range) for sensor_range in value.split(',')]
+
+
+def parse_on_off(value):
+    """ Parse a setting given as on or off. """
+    if value not in ['on', 'off']:
+        raise argparse.ArgumentTypeError('expected on or off, got {}'.format(value))
+    return value == 'on'
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Run simulated explorations over a set of arenas for every '
+                                                 'combination of the given settings.')
+    parser.add_argument('patterns', nargs='*', default=['Maps/*/*.txt'],
+                        help='glob patterns of the arena files or arena libraries (default: Maps/*/*.txt)')
+    parser.add_argument('--calibration-side-steps', type=int, nargs='+',
+                        help='numbers of steps per side calibration to try')
+    parser.add_argument('--explore-limit', type=int, nargs='+',
+                        help='numbers of explored cells at which to stop to try')
+    parser.add_argument('--time-limit', type=float, nargs='+',
+                        help='numbers of seconds after which to stop to try')
+    parser.add_argument('--arrow-scan', type=parse_on_off, nargs='+', dest='is_arrow_scan',
+                        help='whether to scan for arrows, on or off, to try')
+    parser.add_argument('--sensor-ranges', type=parse_sensor_ranges, nargs='+',
+                        help='ranges of all sensors to try, each as comma separated numbers such as 2,2,2,2,2,5')
+    parser.add_argument('--processes', type=int, help='number of processes to use (default: one per core)')
+    parser.add_argument('--json', help='file to write every run to as JSON, including the coverage over time')
+    parser.add_argument('--csv', help='file to write every run to as CSV, one row per arena and variant')
+    parser.add_argument('--log', help='levels to log at, as a level for every module and module=level pairs, such as '
+                                      'WARNING,Algo.exploration=DEBUG')
+    args = parser.parse_args()
+
+    grid = {}
+    for name in DEFAULT_VARIANT:
+        if getattr(args, name) is not None:
+            grid[name] = getattr(args, name)
+    variants = expand_grid(grid)
+
+    if args.log:
+        set_levels(args.log)
+
+    start_time = time()
+    records = run_sweep(find_arenas(args.patterns), variants, args.processes)
+    total_time = time() - start_time
+
+    if args.json:
+        write_json(records, args.json)
+    if args.csv:
+        write_csv(records, args.csv, SWEEP_CSV_FIELDS)
+
+    for index, variant in enumerate(variants):
+        print('Variant {}: {}'.format(index, ', '.join('{}={}'.format(name, variant[name]) for name in sorted(variant))))
+    print()
+    print('{:>7} {:>6} {:>8} {:>8} {:>10} {:>9} {:>5} {:>9} {:>7} {:>12} {:>6} {:>8}'.format(
+        'variant', 'arenas', 'complete', 'explored', 'mean_steps', 'max_steps', 'wrong', 'mean_path', 'turns',
+        'calibrations', 'arrows', 'seconds'))
+    for summary in summarize(records):
+        print('{:>7} {:>6} {:>8} {:>8} {:>10} {:>9} {:>5} {:>9} {:>7} {:>12} {:>6} {:>8.3f}'.format(
+            summary['variant'], summary['arenas'], summary['complete'], summary['mean_explored'],
+            summary['mean_steps'], summary['max_steps'], summary['wrong_cells'], summary['mean_path_length'],
+            summary['mean_turns'], summary['mean_calibrations'], summary['arrows_found'], summary['wall_clock']))
+    print('{} runs in {:.2f}s'.format(len(records), total_time))
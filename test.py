@@ -32,7 +32,7 @@ moves_arduino = get_fastest_path_moves([0, 0, 1, 0, -1, 0, 0, 0, 0, 0, 0, 0, 1,
 clone_robot = Robot(exploration_status=self._robot.exploration_status,
                     facing=self._robot.facing,
                     discovered_map=self._robot.discovered_map,
-                    real_map=[[0] * ROW_LENGTH for _ in range(COL_LENGTH)])
+                    real_map=[[0] * NUM_COLS for _ in range(NUM_ROWS)])
 is_calibration = False
 moves_ardiono_with_calibration = []
 for moves in moves_arduino:
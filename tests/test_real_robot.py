@@ -0,0 +1,81 @@
+import copy
+import unittest
+
+from Utils.utils import *
+from Algo.real_robot import Robot
+from Connections.connection_client import MessageTimeout
+
+
+class FakeSender:
+    """ A sender the Arduino acknowledges a given number of commands through, and then nothing. """
+    def __init__(self, ack_count):
+        self.ack_count = ack_count
+        self.sent = []
+
+    def send_arduino(self, msg):
+        self.sent.append(msg)
+
+    def send_android(self, msg):
+        pass
+
+    def send_rpi(self, msg):
+        pass
+
+    def wait_arduino(self, msg_or_pattern, is_regex=False, timeout=None):
+        if self.ack_count == 0:
+            raise MessageTimeout('Timed out waiting for {}'.format(msg_or_pattern))
+        self.ack_count -= 1
+
+
+def make_robot(sender, window):
+    robot = Robot(exploration_status=[[0] * NUM_COLS for _ in range(NUM_ROWS)], facing=NORTH,
+                  discovered_map=[[2] * NUM_COLS for _ in range(NUM_ROWS)], sender=sender)
+    robot.actuator.window = window
+    robot.actuator.ack_timeout = 0.01
+    robot.mark_robot_standing()
+    return robot
+
+
+def get_map(robot):
+    return (copy.deepcopy(robot.exploration_status), copy.deepcopy(robot.discovered_map),
+            copy.deepcopy(robot.probability_map), robot.get_completion_count(), robot.get_explore_string(),
+            robot.get_map_string())
+
+
+class RollBackTest(unittest.TestCase):
+
+    def test_lost_moves_are_rolled_back(self):
+        # Only the first of three moves is acknowledged.
+        sender = FakeSender(ack_count=1)
+        robot = make_robot(sender, window=3)
+        for _ in range(3):
+            robot.move_robot(sender, FORWARD)
+        robot.flush_commands(sender)
+
+        expected_sender = FakeSender(ack_count=1)
+        expected = make_robot(expected_sender, window=3)
+        expected.move_robot(expected_sender, FORWARD)
+        expected.flush_commands(expected_sender)
+
+        self.assertEqual(sender.sent, [get_arduino_cmd(FORWARD)] * 3)
+        self.assertEqual((robot.center, robot.facing, robot.move_counts),
+                         (expected.center, expected.facing, expected.move_counts))
+        self.assertEqual(get_map(robot), get_map(expected))
+        # The cells the lost moves stood on can be seen as obstacles again.
+        for x in range(3):
+            self.assertFalse(robot.map_state.is_permanent(4, x))
+            self.assertFalse(robot.map_state.is_permanent(5, x))
+
+    def test_restored_cells_are_returned_as_updated(self):
+        sender = FakeSender(ack_count=0)
+        robot = make_robot(sender, window=1)
+        updated_cells = robot.move_robot(sender, FORWARD)
+
+        self.assertEqual(robot.center, get_grid_index(1, 1))
+        for x in range(3):
+            self.assertEqual(updated_cells[get_grid_index(3, x)], 2)
+            self.assertEqual(robot.exploration_status[3][x], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()